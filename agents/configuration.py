@@ -23,6 +23,11 @@ class PersonaConfiguration:
     task_maistro_role: str = "You are a helpful task management assistant. You help you create, organize, and manage the user's ToDo list."
     company_id: str = "default"
     scenario_id: Optional[str] = None
+    # 응답 생성 모델: solar | qwen3 | ollama
+    model_type: str = "ollama"
+    ollama_model_name: str = "gemma3:4b"
+    # Qwen3 추론 모드: default | cpu_bf16 | cpu_int8 | cpu_int4 (CPU 모드는 LoRA 병합 가중치 사용)
+    qwen3_inference_mode: str = "default"
 
     @classmethod
     def from_runnable_config(
@@ -5,6 +5,7 @@ import json
 import copy
 from datetime import datetime
 
+import time
 import asyncio
 from pydantic import BaseModel, Field
 
@@ -23,7 +24,6 @@ from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
 from graphDB.neo4j import (
-    Neo4jHybridSearch,
     save_conversation_log,
     async_save_conversation_log,
     async_check_schema
@@ -47,17 +47,27 @@ import agents.configuration as configuration
 # 🆕 키워드 분석 유틸리티 임포트
 from utils.keyword_analyzer import (
     analyze_user_query_keywords,
-    hybrid_search_neo4j
+    hybrid_search_neo4j,
+    embed_query,
+    warmup_from_env as warmup_keyword_analyzer_from_env
 )
 
 # 🆕 모델 유틸리티 임포트
 from utils.model_utils import (
     MODEL_TYPE,
-    generate_model_response
+    PersonaChatModel,
+    preload_models_from_env
 )
 
+# 🆕 공유 Neo4j 연결
+from utils.neo4j_pool import get_neo4j_search
+
 print("Enhanced Persona Assistant 로딩 중...")
 
+# PRELOAD_MODELS에 지정된 로컬 모델을 그래프 임포트 시점에 백그라운드로 로딩
+preload_models_from_env()
+warmup_keyword_analyzer_from_env()
+
 # MCP client setup function
 async def setup_mcp_client():
     client = MultiServerMCPClient(
@@ -130,15 +140,38 @@ async def handle_mcp_tools(state: MessagesState, config: RunnableConfig, store:
     finally:
         await client.__aexit__(None, None, None)
 
-# Neo4j 비동기 Cypher 실행을 위한 확장 메서드 추가
-async def async_execute_cypher(self, query: str, parameters: dict = None):
-    """Neo4j에서 비동기 Cypher 쿼리 실행"""
-    async with self._driver.session() as session:
-        result = await session.run(query, parameters or {})
-        return await result.data()
-
-# Neo4jHybridSearch 클래스에 메서드 추가 (monkeypatch)
-setattr(Neo4jHybridSearch, 'async_execute_cypher', async_execute_cypher)
+async def _timed(stage: str, awaitable, timings: Dict[str, float]):
+    """단계별 소요 시간(초)을 timings에 기록하며 await"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 3)
+
+async def _load_memories(store: BaseStore, todo_category: str, user_id: str):
+    """프로필/할일/지침 메모리를 동시에 조회"""
+    profile, todos, instructions = await asyncio.gather(
+        store.asearch(("profile", todo_category, user_id)),
+        store.asearch(("todo", todo_category, user_id)),
+        store.asearch(("instructions", todo_category, user_id)),
+    )
+    user_profile = profile[0].value if profile else None
+    todo = "\n".join(f"{mem.value}" for mem in todos)
+    instruction = instructions[0].value if instructions else ""
+    return user_profile, todo, instruction
+
+async def _analyze_and_search(query: str, company_id: str, neo4j_search, embedding_task, timings: Dict[str, float]):
+    """키워드 분석 후 하이브리드 검색 (벡터 검색은 미리 시작한 임베딩 태스크를, 풀텍스트 검색은 분석된 토큰을 재사용)"""
+    keyword_analysis = await _timed("keyword_analysis", analyze_user_query_keywords(query, company_id), timings)
+    search_results = await _timed(
+        "hybrid_search",
+        hybrid_search_neo4j(
+            query, keyword_analysis['transformed_query'], neo4j_search,
+            query_embedding=embedding_task, core_keywords=keyword_analysis['core_keywords']
+        ),
+        timings
+    )
+    return keyword_analysis, search_results
 
 # 🆕 키워드 분석이 통합된 페르소나 어시스턴트
 async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfig, store: BaseStore):
@@ -151,13 +184,14 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
     todo_category = configurable.todo_category
     company_id = configurable.company_id
     scenario_id = configurable.scenario_id
-    model_type = getattr(configurable, 'model_type', "gemma3:4b")
+    model_type = configurable.model_type
+    ollama_model_name = configurable.ollama_model_name
+    if model_type not in ("solar", "qwen3", "ollama"):
+        # 예전 설정처럼 Ollama 모델 이름(예: "gemma3:4b")을 model_type으로 넘긴 경우
+        model_type, ollama_model_name = "ollama", model_type
 
-    neo4j_search = Neo4jHybridSearch(
-        uri="bolt://localhost:7687",
-        username="neo4j",
-        password="password123"
-    )
+    # 턴마다 연결을 새로 맺지 않도록 프로세스 전역 인스턴스를 공유 (턴 종료 시 닫지 않음)
+    neo4j_search = get_neo4j_search()
 
     conversation_context = {
         'company_id': company_id,
@@ -165,22 +199,24 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
         'conversation_history': state["messages"][-5:] if len(state["messages"]) > 5 else state["messages"]
     }
     
+    timings: Dict[str, float] = {}
+    turn_start = time.perf_counter()
+    embedding_task = None
+    
     try:
         last_message = state["messages"][-1]
         if isinstance(last_message, HumanMessage):
             query = last_message.content
             print(f"User query: {query}")
             
-            # 🆕 유틸리티 함수로 키워드 분석 실행
-            keyword_analysis = await analyze_user_query_keywords(query, company_id)
-            print(f"Keyword Analysis: {keyword_analysis}")
-            
-            # 🆕 유틸리티 함수로 하이브리드 검색 실행
-            search_results = await hybrid_search_neo4j(
-                query, 
-                keyword_analysis['transformed_query'], 
-                neo4j_search
+            # 🆕 메모리 조회, 질문 임베딩, 키워드 분석→검색을 동시에 실행 (검색만 키워드 분석 결과에 의존)
+            embedding_task = asyncio.ensure_future(_timed("query_embedding", embed_query(query), timings))
+            embedding_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            (user_profile, todo, instructions), (keyword_analysis, search_results) = await asyncio.gather(
+                _timed("memory_lookup", _load_memories(store, todo_category, user_id), timings),
+                _timed("retrieval", _analyze_and_search(query, company_id, neo4j_search, embedding_task, timings), timings),
             )
+            print(f"Keyword Analysis: {keyword_analysis}")
             print(f"Search results: {search_results}")
             
             # 키워드 분석 결과를 검색 컨텍스트에 추가
@@ -196,39 +232,40 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
                 if keywords:
                     search_context += f"{category}: {', '.join([k['keyword'] for k in keywords])}\n"
             
-            # 검색 결과를 컨텍스트에 추가
+            # 검색 결과를 컨텍스트에 추가 (일부 검색 레그가 응답하지 않았으면 표시)
             search_context += "\n관련 정보:\n"
+            if search_results and search_results[0].get('partial'):
+                answered = ', '.join(search_results[0].get('answered_legs', [])) or '없음'
+                search_context += f"(일부 검색만 응답함: {answered})\n"
             for result in search_results:
-                search_context += f"- {result['content']} (점수: {result['score']:.2f})\n"
+                # 레그마다 원점수 척도가 다르므로 융합 점수와 결과를 낸 레그를 표시 (대체 검색 결과는 원점수)
+                score = result.get('final_score', result.get('score', 0.0))
+                legs = '+'.join(result.get('legs', [])) or result.get('search_type', 'fallback')
+                search_context += f"- {result['content']} (점수: {score:.3f}, {legs})\n"
         else:
             search_context = ""
             keyword_analysis = {}
+            user_profile, todo, instructions = await _timed(
+                "memory_lookup", _load_memories(store, todo_category, user_id), timings
+            )
+        
+        timings["context_total"] = round(time.perf_counter() - turn_start, 3)
+        print(f"Persona context stage timings: {timings}")
         
-        # 페르소나 및 메모리 정보 로드
+        # 페르소나 정보 로드
         persona_prompt = configurable.get_persona_prompt()
         scenario_info = configurable.get_scenario_info()
         
         scenario_context = ""
         if scenario_info:
             scenario_context = f"\n시나리오: {scenario_info['title']} - {scenario_info['description']}"
-    
-        # 메모리 정보 로드
-        namespace = ("profile", todo_category, user_id)
-        memories = await store.asearch(namespace)
-        user_profile = memories[0].value if memories else None
-    
-        namespace = ("todo", todo_category, user_id)
-        memories = await store.asearch(namespace)
-        todo = "\n".join(f"{mem.value}" for mem in memories)
-    
-        namespace = ("instructions", todo_category, user_id)
-        memories = await store.asearch(namespace)
-        instructions = memories[0].value if memories else ""
         
         try:
             all_tools = [UpdateMemory] 
             
             # 시스템 메시지 구성
+            # 턴마다 변하지 않는 페르소나/시나리오 블록을 맨 앞에 두어야
+            # 로컬 모델의 KV 캐시 프리픽스(이전 턴 포함)를 재사용할 수 있다
             system_msg = f"""당신은 {persona_prompt}
     
 당신의 역할은 위의 기업 페르소나에 맞게 고객 응대를 하는 것입니다.
@@ -236,8 +273,10 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
 <scenario context>
 {scenario_context}
 </scenario context>
-
-<keyword analysis>
+"""
+            
+            # 턴마다 바뀌는 검색/메모리 컨텍스트는 마지막 메시지 바로 앞에 둔다
+            turn_context_msg = f"""<keyword analysis>
 {search_context}
 </keyword analysis>
 
@@ -266,15 +305,28 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
 """
             
             # 🆕 모델 유틸리티로 응답 생성
-            messages = [SystemMessage(content=system_msg)] + state["messages"]
+            messages = (
+                [SystemMessage(content=system_msg)]
+                + state["messages"][:-1]
+                + [SystemMessage(content=turn_context_msg), state["messages"][-1]]
+            )
             
             try:
-                response_text = await generate_model_response(messages, model_type)
-                ai_message = AIMessage(content=response_text)
+                # 채팅 모델 래퍼로 호출해야 LangGraph messages 스트림에 토큰이 전달된다
+                thread_id = config.get("configurable", {}).get("thread_id")
+                chat_model = PersonaChatModel(
+                    model_type=model_type,
+                    ollama_model_name=ollama_model_name,
+                    cache_key=thread_id,
+                    qwen3_inference_mode=configurable.qwen3_inference_mode
+                )
+                response = await chat_model.ainvoke(messages, config)
+                ai_message = AIMessage(content=response.content)
                 
                 # 키워드 분석 정보를 포함한 대화 로그 저장
                 enhanced_conversation_context = conversation_context.copy()
                 enhanced_conversation_context['keyword_analysis'] = keyword_analysis
+                enhanced_conversation_context['stage_timings'] = timings
                 
                 await async_save_conversation_log(state, ai_message, enhanced_conversation_context)
                 
@@ -286,7 +338,9 @@ async def enhanced_persona_assistant(state: MessagesState, config: RunnableConfi
         finally:
             print("Enhanced persona assistant completed")
     finally:
-        await neo4j_search.async_close()
+        # 검색이 임베딩을 기다리기 전에 실패했다면 남은 임베딩 요청 정리
+        if embedding_task is not None and not embedding_task.done():
+            embedding_task.cancel()
 
 # Update memory tool
 class UpdateMemory(TypedDict):
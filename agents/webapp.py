@@ -0,0 +1,20 @@
+# agents/webapp.py
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from utils.neo4j_pool import close_neo4j, neo4j_health_check
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """LangGraph 서버 수명 주기: 종료 시 공유 Neo4j 드라이버/검색 인스턴스를 서버 이벤트 루프에서 닫는다"""
+    yield
+    await close_neo4j()
+    print("Neo4j 드라이버 종료 완료")
+
+# langgraph.json의 http.app으로 등록되어 LangGraph API 서버에 합쳐진다
+app = FastAPI(lifespan=lifespan)
+
+@app.get("/neo4j/health")
+async def neo4j_health():
+    return await neo4j_health_check()
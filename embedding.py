@@ -1,95 +1,277 @@
+import os
+import json
+import time
 import asyncio
-import openai
-from graphDB.neo4j import Neo4jHybridSearch
-
-# OpenAI API 키 설정
-
-async def embed_neo4j_data_openai():
-    """OpenAI 임베딩으로 Neo4j 데이터에 임베딩 추가"""
-    
-    print("OpenAI 임베딩 시작")
-    
-    # Neo4j 연결
-    neo4j = Neo4jHybridSearch(
-        uri="bolt://localhost:7687",
-        username="neo4j", 
-        password="password123"
-    )
-    
-    try:
-        # 임베딩이 없는 노드들 가져오기
-        fetch_query = """
-        MATCH (n:KnowledgeBase)
-        WHERE n.embedding IS NULL OR size(n.embedding) = 0
-        RETURN n.id as id, n.title as title, n.content as content
-        LIMIT 50
-        """
-        
-        def fetch_nodes():
-            with neo4j.graph.session() as session:
-                result = session.run(fetch_query)
-                return list(result)
-        
-        nodes = await asyncio.to_thread(fetch_nodes)
-        print(f"임베딩할 노드: {len(nodes)}개")
+import argparse
+from typing import Dict, List, Optional
+
+from utils.embedders import Embedder, get_embedder
+from utils.neo4j_pool import run_query, close_neo4j, neo4j_pool_status
+
+# 임베딩 백필 설정 (임베딩 백엔드/모델은 EMBEDDING_BACKEND 등 utils.embedders 설정을 따른다)
+BACKFILL_PAGE_SIZE = int(os.environ.get("EMBED_PAGE_SIZE", "500"))
+BACKFILL_BATCH_MAX_TOKENS = int(os.environ.get("EMBED_BATCH_MAX_TOKENS", "50000"))
+BACKFILL_BATCH_MAX_ITEMS = int(os.environ.get("EMBED_BATCH_MAX_ITEMS", "256"))
+BACKFILL_MAX_CHARS_PER_TEXT = int(os.environ.get("EMBED_MAX_CHARS_PER_TEXT", "6000"))
+BACKFILL_CONCURRENCY = int(os.environ.get("EMBED_CONCURRENCY", "4"))
+BACKFILL_MAX_RETRIES = int(os.environ.get("EMBED_MAX_RETRIES", "5"))
+BACKFILL_CHECKPOINT = os.environ.get("EMBED_CHECKPOINT", ".embedding_checkpoint.json")
+
+# 임베딩이 없는 노드를 id 순으로 페이지 단위 조회 (키셋 페이징이라 OFFSET 없이 이어서 읽음)
+FETCH_PAGE_QUERY = """
+MATCH (n:KnowledgeBase)
+WHERE n.id IS NOT NULL AND ($after IS NULL OR n.id > $after)
+  AND ($include_embedded OR n.embedding IS NULL OR size(n.embedding) = 0)
+RETURN n.id as id, n.title as title, n.content as content
+ORDER BY n.id
+LIMIT $limit
+"""
+
+# 지난 실행에서 실패한 노드를 id로 다시 조회
+FETCH_BY_IDS_QUERY = """
+MATCH (n:KnowledgeBase)
+WHERE n.id IN $ids
+RETURN n.id as id, n.title as title, n.content as content
+ORDER BY n.id
+"""
+
+# 배치 하나를 한 번의 UNWIND로 기록
+UPDATE_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (n:KnowledgeBase {id: row.id})
+SET n.embedding = row.embedding
+RETURN count(n) as updated
+"""
+
+EXISTING_VECTOR_INDEX_QUERY = """
+SHOW INDEXES YIELD name, type, options
+WHERE name = 'embedding_index'
+RETURN options
+"""
+
+def vector_index_query(dimensions: int) -> str:
+    # 인덱스 OPTIONS에는 파라미터를 쓸 수 없으므로 차원 수를 직접 넣는다
+    return f"""
+    CREATE VECTOR INDEX embedding_index IF NOT EXISTS
+    FOR (n:KnowledgeBase) ON (n.embedding)
+    OPTIONS {{indexConfig: {{
+        `vector.dimensions`: {int(dimensions)},
+        `vector.similarity_function`: 'cosine'
+    }}}}
+    """
+
+def estimate_tokens(text: str) -> int:
+    # 한국어 위주 텍스트라 문자 수 절반 정도로 근사 (model_utils의 Ollama 근사와 동일)
+    return len(text) // 2 + 1
+
+def node_text(node: Dict) -> str:
+    text = f"{node.get('title') or ''} {node.get('content') or ''}".strip()
+    return text[:BACKFILL_MAX_CHARS_PER_TEXT]
+
+def make_batches(nodes: List[Dict], max_tokens: int = BACKFILL_BATCH_MAX_TOKENS,
+                 max_items: int = BACKFILL_BATCH_MAX_ITEMS) -> List[List[Dict]]:
+    """토큰 예산과 개수 상한 안에서 노드를 배치로 묶음"""
+    batches, current, current_tokens = [], [], 0
+    for node in nodes:
+        tokens = estimate_tokens(node_text(node))
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(node)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+async def with_retries(label: str, func, max_retries: int = BACKFILL_MAX_RETRIES):
+    """지수 백오프 재시도 (1, 2, 4 ... 최대 30초)"""
+    for attempt in range(1, max_retries + 1):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(2 ** (attempt - 1), 30)
+            print(f"{label} 실패 ({attempt}/{max_retries}), {delay}초 후 재시도: {e}")
+            await asyncio.sleep(delay)
+
+class BackfillCheckpoint:
+    """마지막으로 완료한 노드 id와 누적 통계를 파일에 저장해 중단 지점부터 재개"""
+
+    def __init__(self, path: str = BACKFILL_CHECKPOINT, model: str = None):
+        self.path = path
+        self.state = {"last_id": None, "embedded": 0, "failed_ids": [], "retry_ids": [], "model": model}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            # 다른 임베딩 모델로 만든 체크포인트는 이어 쓰지 않는다
+            if saved.get("model") == model:
+                self.state.update(saved)
+                print(f"체크포인트에서 재개: last_id={self.state['last_id']}, 완료 {self.state['embedded']}개")
+            else:
+                print(f"체크포인트 모델({saved.get('model')})이 현재 모델({model})과 달라 처음부터 실행")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.state.update({"last_id": None, "embedded": 0, "failed_ids": [], "retry_ids": []})
+
+    def take_failed_ids(self) -> List:
+        """재시도할 실패 id를 꺼내고 실패 목록을 비움 (이번 실행의 실패만 다시 쌓이도록)
         
-        # 업데이트 쿼리
-        update_query = """
-        MATCH (n:KnowledgeBase {id: $id})
-        SET n.embedding = $embedding
-        RETURN n.id
+        아직 재시도하지 못한 id는 retry_ids에 남겨 재시도 중에 중단돼도 잃어버리지 않는다.
         """
-        
-        for i, node in enumerate(nodes):
+        failed_ids = list(dict.fromkeys(self.state.get("retry_ids", []) + self.state["failed_ids"]))
+        self.state.update({"failed_ids": [], "retry_ids": failed_ids})
+        return failed_ids
+
+    def finish(self):
+        """전체 페이지를 다 돌았으면 체크포인트 정리 - 남은 실패만 다음 실행에서 먼저 재시도"""
+        if self.state["failed_ids"]:
+            self.state.update({"last_id": None, "embedded": 0})
+            self.save()
+            print(f"실패한 노드 {len(self.state['failed_ids'])}개는 다음 실행에서 먼저 재시도")
+        else:
+            self.reset()
+
+async def check_vector_index_dimensions(dimensions: int):
+    """기존 벡터 인덱스 차원이 현재 임베딩 모델과 다르면 중단 (인덱스를 지우고 --all로 다시 임베딩해야 함)"""
+    rows = await run_query(EXISTING_VECTOR_INDEX_QUERY)
+    if not rows:
+        return
+    index_config = (rows[0].get("options") or {}).get("indexConfig") or {}
+    existing = index_config.get("vector.dimensions")
+    if existing is not None and int(existing) != dimensions:
+        raise RuntimeError(
+            f"embedding_index는 {existing}차원인데 현재 임베딩 모델은 {dimensions}차원입니다. "
+            f"DROP INDEX embedding_index 후 --all --reset으로 다시 실행하세요."
+        )
+
+async def backfill_embeddings(embedder: Optional[Embedder] = None,
+                              page_size: int = BACKFILL_PAGE_SIZE,
+                              concurrency: int = BACKFILL_CONCURRENCY,
+                              checkpoint_path: str = BACKFILL_CHECKPOINT,
+                              include_embedded: bool = False,
+                              reset: bool = False) -> Dict:
+    """KnowledgeBase 노드 전체를 페이지 단위로 읽어 배치 임베딩 후 UNWIND로 기록"""
+    embedder = embedder or await asyncio.to_thread(get_embedder)
+    print(f"임베딩 백엔드: {embedder.name} ({embedder.dimensions}차원)")
+    await check_vector_index_dimensions(embedder.dimensions)
+    checkpoint = BackfillCheckpoint(checkpoint_path, model=embedder.name)
+    if reset:
+        checkpoint.reset()
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    embedded_this_run = 0
+
+    async def process_batch(batch: List[Dict]) -> int:
+        async with semaphore:
+            ids = [node["id"] for node in batch]
             try:
-                # 텍스트 결합
-                text = f"{node['title']} {node['content']}"
-                
-                # OpenAI 임베딩 생성
-                response = await asyncio.to_thread(
-                    lambda: openai.embeddings.create(
-                        input=text,
-                        model="text-embedding-3-small"
-                    )
+                vectors = await with_retries(
+                    f"임베딩 배치({len(batch)}개)",
+                    lambda: embedder.embed([node_text(node) for node in batch])
                 )
-                
-                embedding = response.data[0].embedding
-                
-                # Neo4j 업데이트
-                def update_node():
-                    with neo4j.graph.session() as session:
-                        session.run(update_query, {
-                            "id": node["id"],
-                            "embedding": embedding
-                        })
-                
-                await asyncio.to_thread(update_node)
-                print(f"임베딩 완료: {i+1}/{len(nodes)} - {node['title']}")
-                
+                rows = [{"id": node_id, "embedding": vector} for node_id, vector in zip(ids, vectors)]
+                await with_retries(
+                    f"임베딩 기록({len(rows)}개)",
+                    lambda: run_query(UPDATE_BATCH_QUERY, {"rows": rows}, read_only=False)
+                )
+                return len(rows)
             except Exception as e:
-                print(f"임베딩 실패: {node['id']} - {e}")
-        
-        # 벡터 인덱스 생성 (OpenAI는 1536 차원)
-        index_query = """
-        CREATE VECTOR INDEX embedding_index IF NOT EXISTS
-        FOR (n:KnowledgeBase) ON (n.embedding)
-        OPTIONS {indexConfig: {
-            `vector.dimensions`: 1536,
-            `vector.similarity_function`: 'cosine'
-        }}
-        """
-        
-        def create_index():
-            with neo4j.graph.session() as session:
-                session.run(index_query)
-        
-        await asyncio.to_thread(create_index)
-        print("벡터 인덱스 생성 완료")
-        
+                print(f"배치 실패 ({ids[0]} ~ {ids[-1]}): {e}")
+                checkpoint.state["failed_ids"].extend(ids)
+                return 0
+
+    async def process_page(nodes: List[Dict]) -> int:
+        return sum(await asyncio.gather(*(process_batch(batch) for batch in make_batches(nodes))))
+
+    # 지난 실행에서 실패한 노드부터 다시 임베딩
+    retry_ids = checkpoint.take_failed_ids()
+    for i in range(0, len(retry_ids), page_size):
+        nodes = await run_query(FETCH_BY_IDS_QUERY, {"ids": retry_ids[i:i + page_size]})
+        retried = await process_page(nodes)
+        embedded_this_run += retried
+        checkpoint.state["embedded"] += retried
+        checkpoint.state["retry_ids"] = retry_ids[i + page_size:]
+        checkpoint.save()
+        print(f"실패 노드 재시도: {retried}/{len(nodes)}개 완료")
+
+    while True:
+        nodes = await run_query(FETCH_PAGE_QUERY, {
+            "after": checkpoint.state["last_id"],
+            "include_embedded": include_embedded,
+            "limit": page_size,
+        })
+        if not nodes:
+            break
+
+        page_start = time.perf_counter()
+        page_embedded = await process_page(nodes)
+
+        # 페이지의 모든 배치가 끝난 뒤에만 체크포인트를 전진시켜 재개 시 빠지는 노드가 없게 한다
+        embedded_this_run += page_embedded
+        checkpoint.state["last_id"] = nodes[-1]["id"]
+        checkpoint.state["embedded"] += page_embedded
+        checkpoint.save()
+
+        page_elapsed = time.perf_counter() - page_start
+        total_elapsed = time.perf_counter() - start
+        print(f"페이지 완료: {page_embedded}/{len(nodes)}개, {page_embedded / page_elapsed:.1f} nodes/sec "
+              f"(누적 {embedded_this_run}개, {embedded_this_run / total_elapsed:.1f} nodes/sec)")
+
+        if len(nodes) < page_size:
+            break
+
+    failed = len(checkpoint.state["failed_ids"])
+    checkpoint.finish()
+    await run_query(vector_index_query(embedder.dimensions), read_only=False)
+    print("벡터 인덱스 확인 완료")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "embedded": embedded_this_run,
+        "failed": failed,
+        "elapsed_sec": round(elapsed, 2),
+        "nodes_per_sec": round(embedded_this_run / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    print(f"임베딩 백필 완료: {summary}")
+    return summary
+
+async def embed_neo4j_data(**kwargs):
+    """설정된 임베딩 백엔드로 Neo4j 데이터에 임베딩 추가"""
+    print("임베딩 시작")
+    try:
+        return await backfill_embeddings(**kwargs)
     except Exception as e:
         print(f"임베딩 과정에서 오류: {e}")
     finally:
-        await neo4j.async_close()
+        print(f"Neo4j 풀 사용량: {neo4j_pool_status()}")
+        await close_neo4j()
 
 if __name__ == "__main__":
-    asyncio.run(embed_neo4j_data_openai())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="KnowledgeBase 노드 임베딩 백필")
+    parser.add_argument("--page-size", type=int, default=BACKFILL_PAGE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT)
+    parser.add_argument("--reset", action="store_true", help="체크포인트를 지우고 처음부터 실행")
+    parser.add_argument("--all", action="store_true", help="이미 임베딩된 노드도 다시 임베딩")
+    parser.add_argument("--backend", choices=["openai", "local"], help="임베딩 백엔드 (기본값: EMBEDDING_BACKEND)")
+    args = parser.parse_args()
+
+    asyncio.run(embed_neo4j_data(
+        embedder=get_embedder(args.backend),
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+        include_embedded=args.all,
+    ))
@@ -0,0 +1,324 @@
+import os
+import re
+import time
+import hashlib
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.neo4j_pool import run_query, close_neo4j, neo4j_pool_status
+
+# 약관 PDF 적재 설정
+DOCUMENTS_DIR = os.environ.get("INGEST_DOCUMENTS_DIR", "data/documents/skt")
+INGEST_MAX_CHUNK_CHARS = int(os.environ.get("INGEST_MAX_CHUNK_CHARS", "1500"))
+INGEST_MIN_CHUNK_CHARS = int(os.environ.get("INGEST_MIN_CHUNK_CHARS", "10"))
+INGEST_WRITE_BATCH = int(os.environ.get("INGEST_WRITE_BATCH", "200"))
+
+# 약관 구조 제목: "제1장 총칙", "제2절 ...", "제3조(목적)", "제3조의2 (...)", "부칙"
+# (본문의 "제5조에 따라", "제2장에서"처럼 문장 안에서 참조하는 경우는 제목으로 보지 않는다)
+CHAPTER_PATTERN = re.compile(r'^\s*(제\s*\d+\s*[장절]|부\s*칙)(?:\s+(.*))?$')
+ARTICLE_PATTERN = re.compile(r'^\s*(제\s*\d+\s*조(?:\s*의\s*\d+)?)\s*(?:[\(（【\[]\s*([^\)）】\]]+?)\s*[\)）】\]])?\s*$')
+ARTICLE_INLINE_PATTERN = re.compile(r'^\s*(제\s*\d+\s*조(?:\s*의\s*\d+)?)\s*[\(（]([^\)）]{1,40})[\)）]\s*(.*)$')
+
+SOURCE_DOCUMENT_QUERY = """
+MATCH (d:SourceDocument {path: $path})
+RETURN d.file_hash as file_hash
+"""
+
+# 새 버전에 없는 청크만 삭제 (적재가 모두 끝난 뒤 실행해 중간에 실패해도 기존 청크가 남는다)
+DELETE_STALE_CHUNKS_QUERY = """
+MATCH (n:KnowledgeBase {source_file: $path})
+WHERE NOT n.content_hash IN $hashes
+DETACH DELETE n
+RETURN count(*) as removed
+"""
+
+# (파일, 내용 해시)로 MERGE - 3G/LTE/5G 약관에 같은 조항이 있어도 파일마다 따로 두어야
+# 다른 파일의 메타데이터로 덮어쓰이거나 그 파일을 재적재할 때 함께 지워지지 않는다
+UPSERT_CHUNKS_QUERY = """
+UNWIND $rows AS row
+MERGE (n:KnowledgeBase {source_file: row.source_file, content_hash: row.content_hash})
+ON CREATE SET n.id = row.id
+SET n.title = row.title,
+    n.content = row.content,
+    n.source = 'document',
+    n.page = row.page,
+    n.page_end = row.page_end,
+    n.chapter = row.chapter,
+    n.article = row.article,
+    n.article_title = row.article_title,
+    n.chunk_index = row.chunk_index
+RETURN count(n) as written
+"""
+
+RECORD_SOURCE_DOCUMENT_QUERY = """
+MERGE (d:SourceDocument {path: $path})
+SET d.file_hash = $file_hash,
+    d.pages = $pages,
+    d.chunks = $chunks,
+    d.ingested_at = datetime()
+"""
+
+SCHEMA_QUERIES = [
+    # 예전의 내용 해시 단독 유니크 제약은 파일 간 공통 조항을 막으므로 제거
+    "DROP CONSTRAINT knowledge_content_hash IF EXISTS",
+    """
+    CREATE CONSTRAINT knowledge_source_content_hash IF NOT EXISTS
+    FOR (n:KnowledgeBase) REQUIRE (n.source_file, n.content_hash) IS UNIQUE
+    """,
+    """
+    CREATE CONSTRAINT source_document_path IF NOT EXISTS
+    FOR (d:SourceDocument) REQUIRE d.path IS UNIQUE
+    """,
+    # 검색 경로(utils/keyword_analyzer.py)가 사용하는 풀텍스트 인덱스 - 한국어는 cjk 분석기 사용
+    """
+    CREATE FULLTEXT INDEX knowledge_search IF NOT EXISTS
+    FOR (n:KnowledgeBase) ON EACH [n.title, n.content]
+    OPTIONS {indexConfig: {`fulltext.analyzer`: 'cjk'}}
+    """,
+]
+
+@dataclass
+class Chunk:
+    """조항 단위 청크와 출처 메타데이터"""
+    source_file: str
+    page: int
+    page_end: int
+    chapter: str = ""
+    article: str = ""
+    article_title: str = ""
+    chunk_index: int = 0
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def content(self) -> str:
+        return re.sub(r'[ \t]+', ' ', "\n".join(self.lines)).strip()
+
+    @property
+    def content_hash(self) -> str:
+        normalized = re.sub(r'\s+', ' ', self.content)
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @property
+    def node_id(self) -> str:
+        # 같은 조항이라도 파일이 다르면 다른 노드
+        key = f"{self.source_file}\n{self.content_hash}"
+        return f"doc_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}"
+
+    def to_row(self, document_title: str) -> Dict:
+        heading = " ".join(part for part in (self.article, self.article_title) if part)
+        return {
+            "id": self.node_id,
+            "content_hash": self.content_hash,
+            "title": f"{document_title} {heading}".strip(),
+            "content": self.content,
+            "source_file": self.source_file,
+            "page": self.page,
+            "page_end": self.page_end,
+            "chapter": self.chapter,
+            "article": self.article,
+            "article_title": self.article_title,
+            "chunk_index": self.chunk_index,
+        }
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def iter_pdf_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """페이지를 하나씩 읽어 (페이지 번호, 텍스트)를 내보냄 - 문서 전체를 메모리에 올리지 않는다"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    for page_number, page in enumerate(reader.pages, start=1):
+        try:
+            yield page_number, page.extract_text() or ""
+        except Exception as e:
+            print(f"페이지 텍스트 추출 실패: {path} p.{page_number} - {e}")
+            yield page_number, ""
+
+def _match_article(line: str) -> Optional[Tuple[str, str, str]]:
+    """조항 제목 줄이면 (조 번호, 조 제목, 같은 줄에 이어진 본문) 반환"""
+    match = ARTICLE_INLINE_PATTERN.match(line)
+    if match:
+        return re.sub(r'\s+', '', match.group(1)), match.group(2).strip(), match.group(3).strip()
+    match = ARTICLE_PATTERN.match(line)
+    if match and len(line.strip()) <= 60:
+        return re.sub(r'\s+', '', match.group(1)), (match.group(2) or "").strip(), ""
+    return None
+
+def _split_long_line(line: str, max_chars: int) -> List[str]:
+    """한 줄이 청크 크기보다 길면 공백 기준으로 잘라 나눔"""
+    pieces = []
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(line[:cut].strip())
+        line = line[cut:].strip()
+    pieces.append(line)
+    return pieces
+
+def iter_clause_chunks(source_file: str, pages: Iterator[Tuple[int, str]],
+                       max_chars: int = INGEST_MAX_CHUNK_CHARS) -> Iterator[Chunk]:
+    """장/절/조 제목을 경계로 청크를 나누고, 긴 조항은 줄 단위로 max_chars 이하로 분할"""
+    chapter = ""
+    current: Optional[Chunk] = None
+    chunk_index = 0
+
+    def emit(chunk: Chunk) -> Chunk:
+        nonlocal chunk_index
+        chunk.chunk_index = chunk_index
+        chunk_index += 1
+        return chunk
+
+    def start_chunk(page: int, article: str = "", article_title: str = "") -> Chunk:
+        return Chunk(source_file, page, page, chapter, article, article_title)
+
+    for page_number, text in pages:
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            chapter_match = CHAPTER_PATTERN.match(line)
+            if chapter_match and len(line) <= 60:
+                if current and current.lines:
+                    yield emit(current)
+                chapter = " ".join(part for part in chapter_match.groups() if part).strip()
+                current = start_chunk(page_number)
+                continue
+
+            article = _match_article(line)
+            if article:
+                if current and current.lines:
+                    yield emit(current)
+                article_id, article_title, rest = article
+                current = start_chunk(page_number, article_id, article_title)
+                line = f"{article_id}({article_title}) {rest}".strip() if rest else line
+
+            for piece in _split_long_line(line, max_chars):
+                if current is None:
+                    current = start_chunk(page_number)
+                elif current.lines and sum(len(l) + 1 for l in current.lines) + len(piece) > max_chars:
+                    # 같은 조항의 다음 부분으로 이어서 분할
+                    yield emit(current)
+                    current = start_chunk(page_number, current.article, current.article_title)
+                current.lines.append(piece)
+                current.page_end = page_number
+
+    if current and current.lines:
+        yield emit(current)
+
+async def _write_rows(rows: List[Dict]) -> int:
+    if not rows:
+        return 0
+    result = await run_query(UPSERT_CHUNKS_QUERY, {"rows": rows}, read_only=False)
+    return result[0]["written"] if result else 0
+
+async def ingest_pdf(path: str, force: bool = False) -> Dict:
+    """PDF 하나를 조항 단위로 적재 (파일 해시가 그대로면 건너뜀)"""
+    start = time.perf_counter()
+    file_hash = file_sha256(path)
+    existing = await run_query(SOURCE_DOCUMENT_QUERY, {"path": path})
+    if existing and existing[0]["file_hash"] == file_hash and not force:
+        print(f"변경 없음, 건너뜀: {path}")
+        return {"file": path, "skipped": True}
+
+    document_title = os.path.splitext(os.path.basename(path))[0]
+    pages_seen = 0
+    chunks_written = 0
+    duplicates = 0
+    seen_hashes = set()
+    buffer: List[Dict] = []
+
+    def count_pages(pages):
+        nonlocal pages_seen
+        for page in pages:
+            pages_seen = page[0]
+            yield page
+
+    for chunk in iter_clause_chunks(path, count_pages(iter_pdf_pages(path))):
+        if len(chunk.content) < INGEST_MIN_CHUNK_CHARS:
+            continue
+        if chunk.content_hash in seen_hashes:
+            duplicates += 1
+            continue
+        seen_hashes.add(chunk.content_hash)
+        buffer.append(chunk.to_row(document_title))
+        if len(buffer) >= INGEST_WRITE_BATCH:
+            chunks_written += await _write_rows(buffer)
+            buffer = []
+    chunks_written += await _write_rows(buffer)
+    if not seen_hashes:
+        # 텍스트 추출 실패로 모든 청크가 지워지지 않도록 기존 청크와 파일 해시를 그대로 둔다
+        raise RuntimeError("적재할 청크를 추출하지 못했습니다")
+
+    # MERGE는 (파일, 내용 해시) 기준이라 바뀌지 않은 조항은 그대로(임베딩 포함) 남고, 사라진 조항만 지운다
+    removed = await run_query(DELETE_STALE_CHUNKS_QUERY, {"path": path, "hashes": list(seen_hashes)}, read_only=False)
+    stale_removed = removed[0]["removed"] if removed else 0
+
+    # 파일 해시는 마지막에 기록해 중간에 실패하면 다음 실행에서 다시 적재되게 한다
+    await run_query(RECORD_SOURCE_DOCUMENT_QUERY, {
+        "path": path,
+        "file_hash": file_hash,
+        "pages": pages_seen,
+        "chunks": chunks_written,
+    }, read_only=False)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "file": path,
+        "skipped": False,
+        "pages": pages_seen,
+        "chunks": chunks_written,
+        "duplicates": duplicates,
+        "stale_removed": stale_removed,
+        "elapsed_sec": round(elapsed, 2),
+        "pages_per_sec": round(pages_seen / elapsed, 2) if elapsed > 0 else 0.0,
+        "chunks_per_sec": round(chunks_written / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    print(f"적재 완료: {os.path.basename(path)} - {pages_seen}페이지, {chunks_written}개 청크 "
+          f"(중복 {duplicates}, 삭제 {stale_removed}), {stats['pages_per_sec']} pages/sec, {stats['chunks_per_sec']} chunks/sec")
+    return stats
+
+async def ingest_documents(directory: str = DOCUMENTS_DIR, force: bool = False, embed: bool = True) -> List[Dict]:
+    """디렉토리의 PDF 약관을 KnowledgeBase 노드로 적재하고 풀텍스트/벡터 인덱스를 만든다"""
+    try:
+        for query in SCHEMA_QUERIES:
+            await run_query(query, read_only=False)
+        print("제약조건/풀텍스트 인덱스 확인 완료")
+
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(".pdf")
+        )
+        results = []
+        for path in paths:
+            try:
+                results.append(await ingest_pdf(path, force=force))
+            except Exception as e:
+                print(f"적재 실패: {path} - {e}")
+                results.append({"file": path, "error": str(e)})
+
+        # 새 청크 임베딩 + 벡터 인덱스 생성 (임베딩 백엔드 차원을 따름)
+        if embed and any(r.get("chunks") for r in results):
+            from embedding import backfill_embeddings
+            await backfill_embeddings(checkpoint_path=None)
+
+        return results
+    finally:
+        print(f"Neo4j 풀 사용량: {neo4j_pool_status()}")
+        await close_neo4j()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="약관 PDF를 KnowledgeBase 노드로 적재")
+    parser.add_argument("--dir", default=DOCUMENTS_DIR, help="PDF 디렉토리")
+    parser.add_argument("--force", action="store_true", help="파일 해시가 같아도 다시 적재")
+    parser.add_argument("--skip-embeddings", action="store_true", help="임베딩/벡터 인덱스 생성 생략")
+    args = parser.parse_args()
+
+    asyncio.run(ingest_documents(args.dir, force=args.force, embed=not args.skip_embeddings))
@@ -300,18 +300,26 @@ elif st.session_state.step == "chat":
             user_message = {"role": "user", "content": user_input}
             st.session_state.chat_messages.append(user_message)
             
+            # 스트리밍 토큰을 표시할 자리
+            response_placeholder = chat_container.empty()
+            response_placeholder.write("<div class='bot-message'>응답 생성 중...</div>", unsafe_allow_html=True)
+            
+            def render_partial_response(partial_text):
+                response_placeholder.write(f"<div class='bot-message'>{partial_text}</div>", unsafe_allow_html=True)
+            
             # 비동기 함수로 LangGraph API 호출
             async def send_message():
                 client = await create_langgraph_client()
                 try:
-                    # 응답 생성 - generate_company_response_async 함수 사용
+                    # 응답 생성 - 토큰이 도착하는 대로 화면에 렌더링
                     response_content = await generate_company_response_async(
                         client,
                         st.session_state.thread_id,
                         user_input,
                         company['id'],
                         scenario['id'],
-                        user_id
+                        user_id,
+                        on_token=render_partial_response
                     )
                     
                     # AI 응답 메시지 추가
@@ -339,8 +347,7 @@ elif st.session_state.step == "chat":
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                with st.spinner('응답 생성 중...'):
-                    loop.run_until_complete(send_message())
+                loop.run_until_complete(send_message())
             except Exception as e:
                 st.error(f"비동기 실행 오류: {str(e)}")
             finally:
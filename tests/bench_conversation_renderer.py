@@ -0,0 +1,35 @@
+"""50턴 대화에서 턴마다 전체 렌더링 vs 증분 렌더링 비용 비교
+
+    python -m tests.bench_conversation_renderer
+"""
+import time
+
+from utils.model_utils import ConversationRenderer
+from tests.fake_chat_tokenizer import FakeQwen3Tokenizer, persona_conversation
+
+TURNS = 50
+
+
+def bench_full():
+    tokenizer = FakeQwen3Tokenizer()
+    start = time.perf_counter()
+    for conversation in persona_conversation(TURNS):
+        tokenizer.encode(tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=True))
+    return time.perf_counter() - start, tokenizer
+
+
+def bench_incremental():
+    tokenizer = FakeQwen3Tokenizer()
+    renderer = ConversationRenderer(tokenizer)
+    tokenizer.template_calls = tokenizer.rendered_messages = tokenizer.encoded_chars = 0
+    start = time.perf_counter()
+    for conversation in persona_conversation(TURNS):
+        renderer.render(conversation, "bench")
+    return time.perf_counter() - start, tokenizer
+
+
+if __name__ == "__main__":
+    for name, bench in (("full", bench_full), ("incremental", bench_incremental)):
+        elapsed, tokenizer = bench()
+        print(f"{name:12s} {TURNS}턴: {elapsed * 1000:.2f}ms, 템플릿 호출 {tokenizer.template_calls}회, "
+              f"렌더링한 메시지 {tokenizer.rendered_messages}개, 인코딩한 문자 {tokenizer.encoded_chars}자")
@@ -0,0 +1,89 @@
+"""기존 시나리오의 첫 턴에서 예전 생성 설정(max_length=4096, 종료 마커 없음)과
+호출별 토큰 예산 + 턴 종료 마커 설정의 생성 토큰 수와 소요 시간 비교
+
+    python -m tests.bench_generation_budget --model qwen3:cpu_bf16
+    python -m tests.bench_generation_budget --model qwen3 --max-new-tokens 256 --latency-slo 8
+
+모델을 로딩할 수 없으면(가중치/어댑터 없음) 건너뛴다.
+"""
+import argparse
+import time
+
+import torch
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from data.personas.company_personas import get_persona_prompt, scenarios
+from utils.model_utils import (
+    _ids_to_inputs,
+    build_generation_kwargs,
+    end_of_turn_stopping_criteria,
+    get_conversation_renderer,
+    messages_to_conversation,
+    model_registry,
+    resolve_max_new_tokens,
+)
+
+# 예전 generate_*_response의 생성 파라미터 (프롬프트를 포함한 전체 길이 제한)
+LEGACY_GENERATION_KWARGS = {
+    "do_sample": True,
+    "temperature": 0.2,
+    "max_length": 4096,
+    "repetition_penalty": 1.1,
+    "top_p": 0.95,
+}
+
+
+def scenario_messages(company_id, scenario):
+    system = f"당신은 {get_persona_prompt(company_id)}\n\n시나리오: {scenario['title']} - {scenario['description']}"
+    question = f"{scenario['description']} 관련해서 문의드려요. 어떻게 해야 하나요?"
+    return [SystemMessage(content=system), HumanMessage(content=question)]
+
+
+def run_generate(model, prompt_ids, generation_kwargs, stopping_criteria=None):
+    inputs = _ids_to_inputs(prompt_ids, model.device)
+    # 두 설정이 같은 샘플링 난수를 쓰도록 고정
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    with torch.no_grad():
+        outputs = model.generate(**inputs, stopping_criteria=stopping_criteria, **generation_kwargs)
+    return outputs.shape[-1] - len(prompt_ids), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="qwen3:cpu_bf16", help="레지스트리 모델 이름 (solar, qwen3, qwen3:cpu_bf16 ...)")
+    parser.add_argument("--max-new-tokens", type=int, default=None)
+    parser.add_argument("--latency-slo", type=float, default=None)
+    args = parser.parse_args()
+
+    try:
+        tokenizer, model = model_registry.get(args.model)
+    except Exception as e:
+        print(f"모델을 로딩할 수 없어 벤치마크를 건너뜁니다 ({args.model}): {str(e)}")
+        return
+
+    model_type = "solar" if args.model == "solar" else "qwen3"
+    renderer = get_conversation_renderer(args.model, tokenizer)
+    budget_kwargs = build_generation_kwargs(0.2, resolve_max_new_tokens(model_type, args.max_new_tokens, args.latency_slo))
+    totals = {"legacy": [0, 0.0], "budget": [0, 0.0]}
+
+    for company_id, company_scenarios in scenarios.items():
+        for scenario in company_scenarios:
+            prompt_ids = renderer.render(messages_to_conversation(scenario_messages(company_id, scenario)))
+            legacy = run_generate(model, prompt_ids, LEGACY_GENERATION_KWARGS)
+            budget = run_generate(
+                model, prompt_ids, budget_kwargs, end_of_turn_stopping_criteria(tokenizer, len(prompt_ids))
+            )
+            for name, (tokens, seconds) in (("legacy", legacy), ("budget", budget)):
+                totals[name][0] += tokens
+                totals[name][1] += seconds
+            print(f"{company_id}/{scenario['id']:22s} 예전 {legacy[0]:5d}토큰 {legacy[1]:7.2f}s | "
+                  f"예산+종료 마커 {budget[0]:5d}토큰 {budget[1]:7.2f}s")
+
+    print(f"합계: 예전 {totals['legacy'][0]}토큰 {totals['legacy'][1]:.2f}s, "
+          f"예산+종료 마커 {totals['budget'][0]}토큰 {totals['budget'][1]:.2f}s "
+          f"(max_new_tokens={budget_kwargs['max_new_tokens']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""`import agents.persona_agent` 소요 시간: NLP 라이브러리를 임포트 시점에 초기화하던 예전 방식 vs 지연 초기화
+
+    python -m tests.bench_import_time
+    python -m tests.bench_import_time --repeat 5
+
+측정마다 새 파이썬 프로세스를 띄워 모듈 캐시가 섞이지 않게 한다.
+- eager: 예전 keyword_analyzer처럼 NLTK/spaCy/KoNLPy/sentence_transformers를 임포트하고 초기화한 뒤 임포트
+- lazy: KEYWORD_ANALYZER_WARMUP=0으로 임포트 (첫 사용 때 초기화)
+- lazy+warmup: 기본 설정으로 임포트 (백그라운드 스레드에서 warmup)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["spacy", "konlpy", "nltk", "sentence_transformers", "openai"]
+
+# 예전 utils/keyword_analyzer.py가 임포트 시점에 하던 작업 (설치되지 않은 라이브러리는 건너뜀)
+EAGER_PRELUDE = """
+for name in ("konlpy.tag", "nltk", "spacy", "sentence_transformers"):
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+import utils.keyword_analyzer as keyword_analyzer
+keyword_analyzer.get_stopwords()
+keyword_analyzer.get_nlp_en()
+keyword_analyzer.get_korean_tokenizer()
+"""
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+{prelude}
+import agents.persona_agent
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+MODES = {
+    "eager": (EAGER_PRELUDE, {"KEYWORD_ANALYZER_WARMUP": "0"}),
+    "lazy": ("", {"KEYWORD_ANALYZER_WARMUP": "0"}),
+    "lazy+warmup": ("", {"KEYWORD_ANALYZER_WARMUP": "1"}),
+}
+
+
+def measure(prelude: str, env_overrides: dict) -> dict:
+    env = dict(os.environ, PRELOAD_MODELS="", **env_overrides)
+    code = MEASURE.format(prelude=prelude, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "import failed")
+    # 임포트 중 출력된 로그 뒤의 마지막 줄이 측정 결과
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, (prelude, env_overrides) in MODES.items():
+        try:
+            runs = [measure(prelude, env_overrides) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{mode:12s} 실패: {e}")
+            continue
+        results[mode] = statistics.median(run["seconds"] for run in runs)
+        print(f"{mode:12s} {results[mode] * 1000:8.0f}ms (중앙값 {args.repeat}회), "
+              f"임포트된 무거운 모듈: {', '.join(runs[-1]['loaded']) or '없음'}")
+
+    if "eager" in results and "lazy" in results:
+        print(f"임포트 시간 단축: {results['eager'] - results['lazy']:.2f}s ({results['eager'] / results['lazy']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
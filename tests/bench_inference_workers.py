@@ -0,0 +1,96 @@
+"""추론 워커 수에 따른 처리량/지연시간 부하 테스트
+
+    python -m tests.bench_inference_workers
+    python -m tests.bench_inference_workers --workers 1,2,4 --requests 64 --concurrency 16
+    python -m tests.bench_inference_workers --model qwen3:cpu_int8 --torch-threads 4
+
+기본값은 워커마다 작은 무작위 모델을 qwen3:cpu_bf16 이름으로 등록해 실제 생성 경로
+(렌더링 → 배치 스케줄러 → generate → 스트리밍 조각 전달)를 그대로 부하 테스트한다.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from utils.inference_workers import InferenceWorkerPool
+
+TINY_MODEL_NAME = "qwen3:cpu_bf16"
+
+
+def init_worker(torch_threads: int, use_tiny_model: bool):
+    """워커 프로세스 초기화: 워커끼리 CPU 코어를 나눠 쓰도록 스레드 수를 제한하고, 필요하면 작은 모델을 등록"""
+    import torch
+    from utils.model_utils import model_registry
+
+    torch.set_num_threads(torch_threads)
+    if use_tiny_model:
+        from tests.tiny_model import tiny_model, tiny_tokenizer
+        model_registry.register(TINY_MODEL_NAME, lambda: (tiny_tokenizer(), tiny_model(hidden_size=256, num_layers=4)))
+
+
+def wait_until_ready(pool: InferenceWorkerPool, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        states = [worker["state"] for worker in pool.health()]
+        if all(state == "ready" for state in states):
+            return
+        if "failed" in states:
+            raise RuntimeError(f"워커 모델 로딩 실패: {pool.health()}")
+        time.sleep(0.2)
+    raise TimeoutError("워커가 제한 시간 안에 준비되지 않았습니다")
+
+
+async def run_load(pool: InferenceWorkerPool, model_name: str, requests: int, concurrency: int, max_new_tokens: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    inference_mode = model_name.split(":", 1)[1] if ":" in model_name else None
+    model_type = "solar" if model_name == "solar" else "qwen3"
+
+    async def one(i):
+        messages = [SystemMessage(content="w10 w11 w12"), HumanMessage(content=f"w{20 + i % 200} w30 w31")]
+        async with semaphore:
+            start = time.perf_counter()
+            await pool.submit(
+                messages=messages,
+                model_type=model_type,
+                temperature=0.7,
+                max_new_tokens=max_new_tokens,
+                qwen3_inference_mode=inference_mode,
+            )
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None, help="레지스트리 모델 이름 (없으면 작은 무작위 모델)")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    model_name = args.model or TINY_MODEL_NAME
+    for num_workers in [int(n) for n in args.workers.split(",")]:
+        pool = InferenceWorkerPool(model_name, num_workers, initializer=init_worker, initargs=(args.torch_threads, args.model is None))
+        try:
+            wait_until_ready(pool, args.ready_timeout)
+            # 워커마다 첫 generate 초기화 비용 제외
+            asyncio.run(run_load(pool, model_name, num_workers, num_workers, 4))
+            elapsed, latencies = asyncio.run(run_load(pool, model_name, args.requests, args.concurrency, args.max_new_tokens))
+        finally:
+            pool.shutdown()
+
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"워커 {num_workers}개: {args.requests / elapsed:6.2f} req/s, "
+              f"p50 {statistics.median(latencies) * 1000:7.0f}ms, p95 {p95 * 1000:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
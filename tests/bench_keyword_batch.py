@@ -0,0 +1,69 @@
+"""대화 로그 재분석 처리량: 텍스트마다 extract_keywords를 호출하는 방식 vs extract_keywords_batch
+
+    python -m tests.bench_keyword_batch
+    python -m tests.bench_keyword_batch --texts 5000 --batch-size 512 --n-process 2
+
+설치된 형태소 분석기/spaCy를 그대로 사용한다. 캐시 효과가 섞이지 않도록 측정마다 새 캐시를 쓰고,
+로그처럼 같은 문장이 반복되는 코퍼스를 만든다.
+"""
+import argparse
+import time
+
+import utils.keyword_analyzer as keyword_analyzer
+from data.personas.company_personas import scenarios
+from utils.keyword_analyzer import KeywordAnalyzer, KeywordCache
+
+LOG_TEMPLATES = [
+    "{title} 관련해서 문의드려요. 어떻게 해야 하나요? ({n}번째 문의)",
+    "{description} 상담 요청합니다 order {n}",
+    "지난번 {title} 건 처리 결과가 궁금합니다",
+    "please help with {id} refund, ticket {n}",
+]
+
+
+def log_corpus(size: int):
+    scenario_list = [s for company_scenarios in scenarios.values() for s in company_scenarios]
+    texts = []
+    for i in range(size):
+        scenario = scenario_list[i % len(scenario_list)]
+        # 로그의 약 절반은 같은 문장이 반복된다
+        texts.append(LOG_TEMPLATES[i % len(LOG_TEMPLATES)].format(n=i % (size // 2 or 1), **scenario))
+    return texts
+
+
+def timed(fn):
+    keyword_analyzer.keyword_cache = KeywordCache(path=None)
+    start = time.perf_counter()
+    results = fn()
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    analyzer = KeywordAnalyzer()
+    texts = log_corpus(args.texts)
+    # 형태소 분석기/spaCy 초기화 비용 제외
+    keyword_analyzer.warmup()
+
+    single_seconds, single_results = timed(lambda: [analyzer.extract_keywords(text) for text in texts])
+    batch_seconds, batch_results = timed(lambda: analyzer.extract_keywords_batch(
+        texts, batch_size=args.batch_size, n_process=args.n_process
+    ))
+
+    def keyword_sets(results):
+        return [{item['keyword'] for item in keywords} for keywords in results]
+
+    print(f"텍스트 {len(texts)}개 (고유 {len(set(texts))}개), 한국어 분석기: {analyzer.tokenizer.korean_tokenizer.name}")
+    print(f"텍스트별 호출: {len(texts) / single_seconds:8.1f} texts/sec")
+    print(f"배치 호출    : {len(texts) / batch_seconds:8.1f} texts/sec")
+    print(f"속도 향상: {single_seconds / batch_seconds:.2f}x, "
+          f"결과 일치: {keyword_sets(single_results) == keyword_sets(batch_results)}")
+
+
+if __name__ == "__main__":
+    main()
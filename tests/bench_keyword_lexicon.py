@@ -0,0 +1,83 @@
+"""시나리오 질의 코퍼스에서 예전 카테고리/의도 판별(사전 단어마다 부분 문자열 검사)과
+미리 컴파일한 LexiconMatcher의 처리 시간 비교
+
+    python -m tests.bench_keyword_lexicon
+    python -m tests.bench_keyword_lexicon --repeat 200
+
+형태소 분석 비용이 섞이지 않도록 질의를 공백으로 나눈 단어를 키워드로 사용한다.
+"""
+import argparse
+import time
+
+from data.personas.company_personas import scenarios
+from utils.keyword_analyzer import BUSINESS_CATEGORIES, INTENT_PATTERNS, LexiconMatcher
+
+QUESTION_TEMPLATES = [
+    "{title} 관련해서 문의드려요. 어떻게 해야 하나요?",
+    "{description} 관련 요금이나 비용이 있나요?",
+    "{title} 신청했는데 오류가 나서 작동이 안됨. 해결 방법 알려주세요",
+    "{description} 환불이나 취소 정책이 궁금합니다",
+    "{title} 때문에 불만이 많습니다. 개선해 주세요",
+    "how do I fix the {id} problem? what is the price?",
+]
+
+
+def scenario_queries():
+    queries = []
+    for company_scenarios in scenarios.values():
+        for scenario in company_scenarios:
+            queries.append(scenario["initial_response"])
+            queries.extend(template.format(**scenario) for template in QUESTION_TEMPLATES)
+    return queries
+
+
+def naive_first_match(lexicon, text):
+    """예전 방식: 레이블 순서대로 사전 단어마다 부분 문자열 검사"""
+    for label, words in lexicon.items():
+        if text in words or any(word in text for word in words):
+            return label
+    return None
+
+
+def naive_analyze(query):
+    categories = [naive_first_match(BUSINESS_CATEGORIES, keyword) or '기타' for keyword in query.split()]
+    return categories, naive_first_match(INTENT_PATTERNS, query) or '일반문의'
+
+
+def make_matcher_analyze():
+    category_matcher = LexiconMatcher(BUSINESS_CATEGORIES)
+    intent_matcher = LexiconMatcher(INTENT_PATTERNS)
+
+    def analyze(query):
+        categories = [category_matcher.first_match(keyword) or '기타' for keyword in query.split()]
+        return categories, intent_matcher.first_match(query) or '일반문의'
+
+    return analyze
+
+
+def timed(analyze, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [analyze(query) for query in queries]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    queries = scenario_queries()
+    matcher_analyze = make_matcher_analyze()
+    naive_seconds, naive_results = timed(naive_analyze, queries, args.repeat)
+    matcher_seconds, matcher_results = timed(matcher_analyze, queries, args.repeat)
+
+    total = len(queries) * args.repeat
+    print(f"질의 {len(queries)}개 x {args.repeat}회")
+    print(f"부분 문자열 검사: {naive_seconds / total * 1e6:8.1f}us/질의")
+    print(f"LexiconMatcher : {matcher_seconds / total * 1e6:8.1f}us/질의")
+    print(f"속도 향상: {naive_seconds / matcher_seconds:.2f}x, 결과 일치: {naive_results == matcher_results}")
+
+
+if __name__ == "__main__":
+    main()
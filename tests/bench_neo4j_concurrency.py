@@ -0,0 +1,97 @@
+"""동시 검색 50개: 예전 방식(동기 세션을 asyncio.to_thread로 감싸기) vs 공유 비동기 드라이버의 run_query
+
+    python -m tests.bench_neo4j_concurrency
+    python -m tests.bench_neo4j_concurrency --concurrency 50 --rounds 5
+
+NEO4J_URI/NEO4J_USERNAME/NEO4J_PASSWORD로 지정한 Neo4j(풀텍스트 인덱스 포함)가 필요하다.
+연결할 수 없으면 건너뛴다.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from neo4j import GraphDatabase
+
+from data.personas.company_personas import scenarios
+from utils.keyword_analyzer import FULLTEXT_SEARCH_QUERY
+from utils.neo4j_pool import (
+    NEO4J_DATABASE,
+    NEO4J_PASSWORD,
+    NEO4J_URI,
+    NEO4J_USERNAME,
+    close_neo4j,
+    neo4j_health_check,
+    neo4j_pool_status,
+    run_query,
+)
+
+
+def search_terms(count: int):
+    words = [word for company_scenarios in scenarios.values() for s in company_scenarios for word in s["title"].split()]
+    return [f"{words[i % len(words)]} {words[(i * 3 + 1) % len(words)]}" for i in range(count)]
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    records = await coro
+    return time.perf_counter() - start, len(records)
+
+
+def make_threaded_query(driver):
+    """예전 검색 경로: 동기 세션을 워커 스레드에서 실행"""
+    def query(terms):
+        with driver.session(database=NEO4J_DATABASE) as session:
+            return session.run(FULLTEXT_SEARCH_QUERY, {"query": terms}).data()
+
+    return lambda terms: asyncio.to_thread(query, terms)
+
+
+async def run_round(search, terms):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(timed(search(t)) for t in terms))
+    return time.perf_counter() - start, [latency for latency, _ in results], sum(count for _, count in results)
+
+
+async def bench(name, search, terms, rounds):
+    # 연결 수립/쿼리 플랜 캐시 준비 비용 제외
+    await run_round(search, terms[:1])
+    walls, latencies, records = [], [], 0
+    for _ in range(rounds):
+        wall, round_latencies, round_records = await run_round(search, terms)
+        walls.append(wall)
+        latencies.extend(round_latencies)
+        records += round_records
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:14s} 라운드 {statistics.median(walls) * 1000:7.0f}ms, "
+          f"p50 {statistics.median(latencies) * 1000:6.0f}ms, p95 {p95 * 1000:6.0f}ms, "
+          f"{len(latencies) / sum(walls):6.1f} queries/sec, 레코드 {records}개")
+
+
+async def main_async(args):
+    health = await neo4j_health_check()
+    if health["status"] != "ok":
+        print(f"Neo4j에 연결할 수 없어 벤치마크를 건너뜁니다: {health.get('error')}")
+        return
+
+    terms = search_terms(args.concurrency)
+    sync_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    try:
+        await bench("to_thread+동기", make_threaded_query(sync_driver), terms, args.rounds)
+        await bench("run_query", lambda t: run_query(FULLTEXT_SEARCH_QUERY, {"query": t}), terms, args.rounds)
+    finally:
+        sync_driver.close()
+        print(f"풀 지표: {neo4j_pool_status()}")
+        await close_neo4j()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Qwen3 추론 모드별(기존 fp16 + LoRA 어댑터 / 병합 bf16 / int8 / int4) 디코딩 속도와 상주 메모리 비교
+
+    python -m tests.bench_qwen3_cpu_modes
+    python -m tests.bench_qwen3_cpu_modes --modes cpu_bf16,cpu_int8 --new-tokens 32
+
+모드마다 별도 프로세스에서 로딩해 메모리 측정이 섞이지 않게 한다.
+어댑터(QWEN3_ADAPTER_DIR)가 없으면 건너뛴다.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import time
+
+from utils.model_utils import QWEN3_ADAPTER_DIR, QWEN3_INFERENCE_MODES
+
+CONVERSATION = [
+    {"role": "system", "content": "당신은 SKT 고객센터 상담원입니다."},
+    {"role": "user", "content": "유심 보호 서비스는 어떻게 신청하나요? 요금도 있나요?"},
+]
+
+
+def _rss_mb() -> float:
+    """현재 상주 메모리 (MB)"""
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _bench_mode(mode: str, new_tokens: int, results):
+    try:
+        import torch
+        from utils.model_utils import _ids_to_inputs, get_conversation_renderer, model_registry, qwen3_model_name
+
+        name = qwen3_model_name(mode)
+        start = time.perf_counter()
+        tokenizer, model = model_registry.get(name)
+        load_seconds = time.perf_counter() - start
+        inputs = _ids_to_inputs(get_conversation_renderer(name, tokenizer).render(CONVERSATION), model.device)
+
+        with torch.no_grad():
+            # 첫 호출의 초기화 비용 제외
+            model.generate(**inputs, do_sample=False, max_new_tokens=4)
+            start = time.perf_counter()
+            model.generate(**inputs, do_sample=False, max_new_tokens=new_tokens, min_new_tokens=new_tokens)
+            decode_seconds = time.perf_counter() - start
+
+        results.put({
+            "mode": mode,
+            "device": str(model.device),
+            "load_seconds": load_seconds,
+            "tokens_per_second": new_tokens / decode_seconds,
+            "rss_mb": _rss_mb(),
+            # Linux의 ru_maxrss 단위는 KB
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    except Exception as e:
+        results.put({"mode": mode, "error": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default=",".join(QWEN3_INFERENCE_MODES))
+    parser.add_argument("--new-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    if not os.path.isdir(QWEN3_ADAPTER_DIR):
+        print(f"Qwen3 어댑터가 없어 벤치마크를 건너뜁니다: {QWEN3_ADAPTER_DIR}")
+        return
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        process = context.Process(target=_bench_mode, args=(mode, args.new_tokens, results))
+        process.start()
+        process.join()
+        try:
+            result = results.get(timeout=5)
+        except queue.Empty:
+            result = {"mode": mode, "error": f"exit code {process.exitcode}"}
+        if "error" in result:
+            print(f"{mode:9s} 실패: {result['error']}")
+            continue
+        print(f"{mode:9s} ({result['device']}) {result['tokens_per_second']:6.2f} tokens/sec, "
+              f"상주 {result['rss_mb']:8.0f}MB, 최대 {result['peak_rss_mb']:8.0f}MB, 로딩 {result['load_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
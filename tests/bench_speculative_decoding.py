@@ -0,0 +1,97 @@
+"""CPU에서 일반 탐욕 디코딩 vs 추측(assisted) 디코딩의 속도와 초안 토큰 수락률 비교
+
+    python -m tests.bench_speculative_decoding
+    python -m tests.bench_speculative_decoding --target Qwen/Qwen3-1.7B --draft Qwen/Qwen3-0.6B
+
+기본값은 다운로드 없이 만드는 작은 무작위 모델이다. 초안 모델은 같은 가중치에서 앞쪽 레이어만 남긴
+사본(레이어 생략 방식)이라 수락률은 실제 모델 조합보다 낮게 나올 수 있다.
+"""
+import argparse
+import copy
+import time
+
+import torch
+
+from utils.model_utils import (
+    SpeculativeStats,
+    _generate_assisted,
+    _ids_to_inputs,
+    end_of_turn_stopping_criteria,
+    load_draft_model,
+)
+from tests.tiny_model import greedy_kwargs, prompt_ids, tiny_model, tiny_tokenizer
+
+
+def tiny_pair(draft_layers: int):
+    tokenizer = tiny_tokenizer()
+    target = tiny_model(hidden_size=256, num_layers=8)
+    draft = copy.deepcopy(target)
+    draft.model.layers = draft.model.layers[:draft_layers]
+    draft.config.num_hidden_layers = draft_layers
+    return tokenizer, target, draft, prompt_ids(64)
+
+
+def hub_pair(target_id: str, draft_id: str):
+    tokenizer, target = load_draft_model(target_id)
+    _, draft = load_draft_model(draft_id)
+    prompt = tokenizer.apply_chat_template(
+        [{"role": "user", "content": "유심 보호 서비스는 어떻게 신청하나요?"}], tokenize=False, add_generation_prompt=True
+    )
+    return tokenizer, target, draft, tokenizer.encode(prompt)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default=None, help="페르소나 모델 역할의 HF 모델 ID (없으면 작은 무작위 모델)")
+    parser.add_argument("--draft", default=None, help="초안 모델 HF 모델 ID")
+    parser.add_argument("--draft-layers", type=int, default=2, help="작은 무작위 모델에서 초안 모델이 쓸 레이어 수")
+    parser.add_argument("--lookahead", type=int, default=5)
+    parser.add_argument("--new-tokens", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.target and args.draft:
+        tokenizer, target, draft, ids = hub_pair(args.target, args.draft)
+    else:
+        tokenizer, target, draft, ids = tiny_pair(args.draft_layers)
+
+    generation_kwargs = greedy_kwargs(args.new_tokens)
+    assisted_kwargs = {
+        "assistant_model": draft,
+        "num_assistant_tokens": args.lookahead,
+        "num_assistant_tokens_schedule": "constant",
+    }
+    inputs = _ids_to_inputs(ids, target.device)
+
+    # 첫 호출의 초기화 비용 제외
+    with torch.no_grad():
+        target.generate(**inputs, **greedy_kwargs(4))
+    _generate_assisted(tokenizer, target, ids, greedy_kwargs(4), assisted_kwargs)
+
+    baseline_seconds, baseline_tokens = 0.0, 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        with torch.no_grad():
+            # _generate_assisted와 같은 종료 조건
+            outputs = target.generate(
+                **inputs, stopping_criteria=end_of_turn_stopping_criteria(tokenizer, len(ids)), **generation_kwargs
+            )
+        baseline_seconds += time.perf_counter() - start
+        baseline_tokens += outputs.shape[-1] - len(ids)
+    baseline_text = tokenizer.decode(outputs[0][len(ids):], skip_special_tokens=True).strip()
+
+    stats = SpeculativeStats()
+    for _ in range(args.repeat):
+        assisted_text = _generate_assisted(tokenizer, target, ids, generation_kwargs, assisted_kwargs, stats)
+
+    baseline_tps = baseline_tokens / baseline_seconds
+    assisted_tps = stats.new_tokens / stats.seconds
+    print(f"일반 디코딩: {baseline_tps:.1f} tokens/sec")
+    print(f"추측 디코딩: {assisted_tps:.1f} tokens/sec (lookahead {args.lookahead}), "
+          f"수락률 {stats.acceptance_rate:.1%} ({stats.accepted_tokens}/{stats.proposed_tokens}), "
+          f"검증 단계당 {stats.new_tokens / stats.steps:.2f}토큰")
+    print(f"속도 향상: {assisted_tps / baseline_tps:.2f}x, 출력 일치: {assisted_text == baseline_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""chat template 동작을 흉내 내는 테스트용 토크나이저 (transformers 없이 렌더링 로직 검증)"""
+
+
+class FakeQwen3Tokenizer:
+    """Qwen3 chat template처럼 마지막 사용자 메시지 뒤의 assistant 메시지에만 빈 <think></think> 블록을 붙인다"""
+
+    def __init__(self):
+        self.template_calls = 0
+        self.rendered_messages = 0
+        self.encoded_chars = 0
+
+    def encode(self, text, add_special_tokens=True):
+        self.encoded_chars += len(text)
+        # 문자 단위 토큰 (경계에서 나눠 인코딩해도 결과가 같음)
+        return [ord(ch) for ch in text]
+
+    def apply_chat_template(self, conversation, tokenize=False, add_generation_prompt=False):
+        self.template_calls += 1
+        self.rendered_messages += len(conversation)
+        last_query = max((i for i, m in enumerate(conversation) if m["role"] == "user"), default=-1)
+        parts = []
+        for i, message in enumerate(conversation):
+            if message["role"] == "assistant" and i > last_query and i == len(conversation) - 1:
+                parts.append(f"<|im_start|>assistant\n<think>\n\n</think>\n\n{message['content']}<|im_end|>\n")
+            else:
+                parts.append(f"<|im_start|>{message['role']}\n{message['content']}<|im_end|>\n")
+        if add_generation_prompt:
+            parts.append("<|im_start|>assistant\n")
+        return "".join(parts)
+
+
+def persona_conversation(turns):
+    """enhanced_persona_assistant와 같은 레이아웃의 턴별 대화
+
+    [페르소나 system] + 이전 대화(사용자/assistant) + [턴 컨텍스트 system, 새 사용자 메시지].
+    턴 컨텍스트는 그 턴에만 붙고 다음 턴의 이전 대화에는 남지 않는다.
+    """
+    persona = {"role": "system", "content": "당신은 SKT 고객센터 상담원입니다."}
+    history = []
+    for turn in range(turns):
+        user = {"role": "user", "content": f"{turn}번째 질문입니다. 요금제 변경하려면 어떻게 하나요?"}
+        turn_context = {"role": "system", "content": f"참고 자료 {turn}: 유심 보호 서비스 안내"}
+        yield [persona] + history + [turn_context, user]
+        history += [user, {"role": "assistant", "content": f"{turn}번째 답변입니다. 고객님, 안내해 드리겠습니다."}]
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from utils.model_utils import BatchingScheduler
+from tests.tiny_model import greedy_kwargs, prompt_ids, tiny_model, tiny_tokenizer
+
+NEW_TOKENS = 16
+
+
+def fake_scheduler(max_batch_size, calls):
+    scheduler = BatchingScheduler(lambda: None, window_ms=50, max_batch_size=max_batch_size)
+
+    def generate_batch(prompt_ids, generation_kwargs, streams=None):
+        calls.append(len(prompt_ids))
+        return [f"reply-{ids[0]}" for ids in prompt_ids]
+
+    scheduler._generate_batch = generate_batch
+    return scheduler
+
+
+def submit_all(scheduler):
+    async def run():
+        return await asyncio.gather(
+            scheduler.submit([1], {"temperature": 0.2}),
+            scheduler.submit([2], {"temperature": 0.2}),
+            scheduler.submit([3], {"temperature": 0.7}),
+        )
+    return asyncio.run(run())
+
+
+def test_scheduler_batches_requests_with_same_generation_kwargs():
+    calls = []
+    assert submit_all(fake_scheduler(8, calls)) == ["reply-1", "reply-2", "reply-3"]
+    assert sorted(calls) == [1, 2]
+
+
+def test_scheduler_with_batch_size_one_runs_each_request_alone():
+    calls = []
+    assert submit_all(fake_scheduler(1, calls)) == ["reply-1", "reply-2", "reply-3"]
+    assert calls == [1, 1, 1]
+
+
+def test_streaming_request_joins_the_same_batch():
+    calls = []
+    scheduler = BatchingScheduler(lambda: None, window_ms=50, max_batch_size=8)
+
+    def generate_batch(prompt_ids, generation_kwargs, streams=None):
+        calls.append(len(prompt_ids))
+        for ids, sink in zip(prompt_ids, streams or [None] * len(prompt_ids)):
+            if sink is not None:
+                sink("reply-")
+                sink(str(ids[0]))
+        return [f"reply-{ids[0]}" for ids in prompt_ids]
+
+    scheduler._generate_batch = generate_batch
+
+    async def run():
+        async def collect():
+            return [text async for text in scheduler.submit_stream([1], {"temperature": 0.2})]
+        return await asyncio.gather(collect(), scheduler.submit([2], {"temperature": 0.2}))
+
+    assert asyncio.run(run()) == [["reply-", "1"], "reply-2"]
+    assert calls == [2]
+
+
+def test_streamed_chunks_match_the_batched_reply():
+    tokenizer, model = tiny_tokenizer(), tiny_model()
+    scheduler = BatchingScheduler(lambda: (tokenizer, model), window_ms=50, max_batch_size=8)
+
+    async def run():
+        async def collect():
+            return [text async for text in scheduler.submit_stream(prompt_ids(12), greedy_kwargs(NEW_TOKENS))]
+        chunks, reply = await asyncio.gather(collect(), scheduler.submit(prompt_ids(12), greedy_kwargs(NEW_TOKENS)))
+        scheduler._worker.cancel()
+        return chunks, reply
+
+    chunks, reply = asyncio.run(run())
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == reply
+
+
+def tokens_per_second(tokenizer, model, concurrency, max_batch_size):
+    """동시 요청 concurrency개를 실제 generate로 처리했을 때의 생성 처리량"""
+    scheduler = BatchingScheduler(lambda: (tokenizer, model), window_ms=20, max_batch_size=max_batch_size)
+
+    async def run():
+        start = time.perf_counter()
+        replies = await asyncio.gather(*(
+            scheduler.submit(prompt_ids(12, i), greedy_kwargs(NEW_TOKENS)) for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        scheduler._worker.cancel()
+        return replies, elapsed
+
+    replies, elapsed = asyncio.run(run())
+    assert len(replies) == concurrency
+    return concurrency * NEW_TOKENS / elapsed
+
+
+def test_generate_throughput_rises_with_concurrency():
+    tokenizer, model = tiny_tokenizer(), tiny_model()
+    tokens_per_second(tokenizer, model, 2, 8)  # 첫 generate 호출의 초기화 비용 제외
+
+    single = tokens_per_second(tokenizer, model, 1, 8)
+    batched = tokens_per_second(tokenizer, model, 8, 8)
+    unbatched = tokens_per_second(tokenizer, model, 8, 1)
+    print(f"tokens/sec: 동시 1개 {single:.0f}, 동시 8개 배치 {batched:.0f}, 동시 8개 배치 없음 {unbatched:.0f}")
+
+    assert batched > 1.5 * single
+    assert batched > 1.5 * unbatched
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from utils.model_utils import ConversationRenderer
+from tests.fake_chat_tokenizer import FakeQwen3Tokenizer, persona_conversation
+
+
+def full_prompt_ids(tokenizer, conversation):
+    return tokenizer.encode("") + tokenizer.encode(
+        tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=True)
+    )
+
+
+def test_incremental_render_matches_full_render_with_think_blocks():
+    tokenizer = FakeQwen3Tokenizer()
+    renderer = ConversationRenderer(tokenizer)
+    assert renderer.delta_rendering
+
+    for conversation in persona_conversation(50):
+        assert renderer.render(conversation, "thread-1") == full_prompt_ids(tokenizer, conversation)
+
+
+def test_render_cost_does_not_grow_with_history():
+    tokenizer = FakeQwen3Tokenizer()
+    renderer = ConversationRenderer(tokenizer)
+    conversations = list(persona_conversation(50))
+    for conversation in conversations[:49]:
+        renderer.render(conversation, "thread-1")
+
+    tokenizer.rendered_messages = tokenizer.encoded_chars = 0
+    renderer.render(conversations[49], "thread-1")
+    # 마지막 턴은 캐시 이후 메시지(이전 두 턴의 응답/질문, 턴 컨텍스트, 새 질문)만 렌더링/인코딩
+    assert tokenizer.rendered_messages < 20
+    assert tokenizer.encoded_chars < 400
+
+
+def test_cached_prefix_stops_before_the_turn_context():
+    tokenizer = FakeQwen3Tokenizer()
+    renderer = ConversationRenderer(tokenizer)
+    conversations = list(persona_conversation(3))
+    for conversation in conversations:
+        renderer.render(conversation, "thread-1")
+
+    # 지난 턴 컨텍스트는 다음 턴 대화에 없으므로 그 앞의 사용자 메시지까지만 보관
+    cached = renderer._states["thread-1"].messages
+    assert cached == conversations[2][:4]
+    assert cached[-1]["role"] == "user"
+
+
+def test_truncated_history_falls_back_to_full_render():
+    tokenizer = FakeQwen3Tokenizer()
+    renderer = ConversationRenderer(tokenizer)
+    conversations = list(persona_conversation(3))
+    renderer.render(conversations[1], "thread-1")
+
+    # 가장 오래된 턴이 잘린 대화
+    truncated = conversations[2][:1] + conversations[2][3:]
+    assert renderer.render(truncated, "thread-1") == full_prompt_ids(tokenizer, truncated)
@@ -0,0 +1,152 @@
+import asyncio
+import importlib
+import json
+import sys
+import types
+
+import pytest
+
+from utils.embedders import Embedder
+
+NODE_IDS = [f'kb-{i:02d}' for i in range(10)]
+PAGE_SIZE = 4
+
+
+class StubEmbedder(Embedder):
+    backend = 'stub'
+
+    def __init__(self, fail_on=None):
+        super().__init__('stub-model')
+        self.batches = []
+        self.fail_on = fail_on
+
+    @property
+    def dimensions(self):
+        return 3
+
+    async def embed(self, texts):
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError('embedding API unavailable')
+        self.batches.append(len(texts))
+        return [[float(len(text)), 0.5, -0.25] for text in texts]
+
+
+class FakeGraph:
+    """backfill_embeddings가 쓰는 Cypher만 흉내 내는 KnowledgeBase 노드 저장소"""
+
+    def __init__(self, module, crash_after=None):
+        self.module = module
+        self.nodes = {node_id: {'id': node_id, 'title': f'약관 {node_id}', 'content': f'{node_id} 조항 본문',
+                                'embedding': None} for node_id in NODE_IDS}
+        self.queries = []
+        # 이 id 다음 페이지를 읽을 때 한 번 중단 (프로세스가 죽은 것처럼 예외가 밖으로 전달됨)
+        self.crash_after = crash_after
+
+    @staticmethod
+    def _row(node):
+        return {'id': node['id'], 'title': node['title'], 'content': node['content']}
+
+    async def run_query(self, query, parameters=None, read_only=True):
+        parameters = parameters or {}
+        self.queries.append((query, parameters))
+        if query == self.module.FETCH_PAGE_QUERY:
+            if self.crash_after is not None and parameters['after'] == self.crash_after:
+                self.crash_after = None
+                raise ConnectionError('Neo4j connection lost')
+            ids = [node_id for node_id in sorted(self.nodes)
+                   if (parameters['after'] is None or node_id > parameters['after'])
+                   and (parameters['include_embedded'] or self.nodes[node_id]['embedding'] is None)]
+            return [self._row(self.nodes[node_id]) for node_id in ids[:parameters['limit']]]
+        if query == self.module.FETCH_BY_IDS_QUERY:
+            return [self._row(self.nodes[node_id]) for node_id in sorted(parameters['ids'])]
+        if query == self.module.UPDATE_BATCH_QUERY:
+            for row in parameters['rows']:
+                self.nodes[row['id']]['embedding'] = row['embedding']
+            return [{'updated': len(parameters['rows'])}]
+        return []
+
+    def writes(self):
+        return [[row['id'] for row in parameters['rows']]
+                for query, parameters in self.queries if query == self.module.UPDATE_BATCH_QUERY]
+
+
+@pytest.fixture
+def embedding(monkeypatch):
+    """neo4j 드라이버 없이 embedding 모듈을 임포트 (run_query는 테스트마다 FakeGraph로 교체)"""
+    fake_pool = types.ModuleType('utils.neo4j_pool')
+    fake_pool.run_query = fake_pool.close_neo4j = None
+    fake_pool.neo4j_pool_status = lambda: {}
+    monkeypatch.setitem(sys.modules, 'utils.neo4j_pool', fake_pool)
+    monkeypatch.delitem(sys.modules, 'embedding', raising=False)
+    module = importlib.import_module('embedding')
+
+    # 재시도 대기 없이 한 번만 시도
+    with_retries = module.with_retries
+    monkeypatch.setattr(module, 'with_retries', lambda label, func: with_retries(label, func, max_retries=1))
+    return module
+
+
+def backfill(module, graph, embedder, checkpoint_path):
+    module.run_query = graph.run_query
+    return asyncio.run(module.backfill_embeddings(
+        embedder=embedder, page_size=PAGE_SIZE, concurrency=2, checkpoint_path=str(checkpoint_path)
+    ))
+
+
+def test_make_batches_respects_token_and_item_limits(embedding):
+    nodes = [{'id': i, 'title': '', 'content': '가' * 20} for i in range(5)]
+    assert [len(b) for b in embedding.make_batches(nodes, max_tokens=1000, max_items=2)] == [2, 2, 1]
+    # 노드 하나가 11토큰이므로 25토큰 예산에는 두 개씩 들어간다
+    assert [len(b) for b in embedding.make_batches(nodes, max_tokens=25, max_items=10)] == [2, 2, 1]
+
+
+def test_backfill_embeds_in_batches_and_writes_each_batch_with_one_unwind(embedding, tmp_path):
+    graph = FakeGraph(embedding)
+    embedder = StubEmbedder()
+    summary = backfill(embedding, graph, embedder, tmp_path / 'checkpoint.json')
+
+    assert summary['embedded'] == 10 and summary['failed'] == 0
+    assert embedder.batches == [4, 4, 2]
+    assert graph.writes() == [NODE_IDS[0:4], NODE_IDS[4:8], NODE_IDS[8:10]]
+    assert 'UNWIND $rows AS row' in embedding.UPDATE_BATCH_QUERY
+    assert all(node['embedding'] is not None for node in graph.nodes.values())
+    assert '`vector.dimensions`: 3' in graph.queries[-1][0]
+    assert not (tmp_path / 'checkpoint.json').exists()
+
+
+def test_backfill_resumes_from_the_checkpoint_after_a_crash(embedding, tmp_path):
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    graph = FakeGraph(embedding, crash_after='kb-03')
+
+    with pytest.raises(ConnectionError):
+        backfill(embedding, graph, StubEmbedder(), checkpoint_path)
+    saved = json.loads(checkpoint_path.read_text(encoding='utf-8'))
+    assert saved['last_id'] == 'kb-03' and saved['embedded'] == 4
+
+    # 재개: 이미 기록한 첫 페이지는 다시 임베딩하지 않고 체크포인트 다음 id부터 읽는다
+    graph.queries.clear()
+    embedder = StubEmbedder()
+    summary = backfill(embedding, graph, embedder, checkpoint_path)
+    first_fetch = next(parameters for query, parameters in graph.queries if query == embedding.FETCH_PAGE_QUERY)
+    assert first_fetch['after'] == 'kb-03'
+    assert embedder.batches == [4, 2]
+    assert graph.writes() == [NODE_IDS[4:8], NODE_IDS[8:10]]
+    assert summary['embedded'] == 6
+    assert all(node['embedding'] is not None for node in graph.nodes.values())
+    assert not checkpoint_path.exists()
+
+
+def test_failed_batch_is_retried_first_on_the_next_run(embedding, tmp_path):
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    graph = FakeGraph(embedding)
+
+    summary = backfill(embedding, graph, StubEmbedder(fail_on='kb-05'), checkpoint_path)
+    assert summary['embedded'] == 6 and summary['failed'] == 4
+    assert json.loads(checkpoint_path.read_text(encoding='utf-8'))['failed_ids'] == NODE_IDS[4:8]
+
+    graph.queries.clear()
+    summary = backfill(embedding, graph, StubEmbedder(), checkpoint_path)
+    assert graph.queries[1] == (embedding.FETCH_BY_IDS_QUERY, {'ids': NODE_IDS[4:8]})
+    assert graph.writes() == [NODE_IDS[4:8]]
+    assert summary['embedded'] == 4 and summary['failed'] == 0
+    assert not checkpoint_path.exists()
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+import utils.embedders as embedders
+import utils.keyword_analyzer as keyword_analyzer
+from utils.embedders import Embedder
+from utils.keyword_analyzer import EmbeddingCache
+
+
+class StubEmbedder(Embedder):
+    backend = 'stub'
+
+    def __init__(self):
+        super().__init__('stub-model')
+        self.calls = 0
+
+    @property
+    def dimensions(self):
+        return 3
+
+    async def embed(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 0.5, -0.25] for text in texts]
+
+
+@pytest.fixture
+def stub_embedder(monkeypatch, tmp_path):
+    embedder = StubEmbedder()
+    monkeypatch.setattr(embedders, 'get_embedder', lambda backend=None: embedder)
+    monkeypatch.setattr(keyword_analyzer, 'query_embedding_cache',
+                        EmbeddingCache(path=str(tmp_path / 'embeddings.sqlite3')))
+    return embedder
+
+
+def test_cached_query_makes_no_embedding_call(stub_embedder):
+    async def run():
+        first = await keyword_analyzer.embed_query('유심 보호 서비스 신청')
+        # 공백/대소문자만 다른 질문도 같은 캐시 키
+        second = await keyword_analyzer.embed_query('  유심 보호  서비스 신청 ')
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert stub_embedder.calls == 1
+    assert keyword_analyzer.query_embedding_cache.stats()['hits'] == 1
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'embeddings.sqlite3')
+    key = EmbeddingCache.make_key('stub:stub-model', '요금제 변경')
+    cache = EmbeddingCache(path=path)
+    asyncio.run(cache.aput(key, 'stub:stub-model', [0.5, 0.25, -1.0]))
+    cache.close()
+
+    reopened = EmbeddingCache(path=path)
+    assert asyncio.run(reopened.aget(key)) == [0.5, 0.25, -1.0]
+    assert reopened.stats()['disk_hits'] == 1
+    reopened.close()
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / 'embeddings.sqlite3'), ttl=-1)
+    cache.put('key', 'stub:stub-model', [1.0])
+    assert cache.get('key') is None
+    assert cache.stats()['expired'] == 2
+    cache.close()
+
+
+def test_keys_differ_by_model():
+    assert EmbeddingCache.make_key('openai:a', '유심') != EmbeddingCache.make_key('local:b', '유심')
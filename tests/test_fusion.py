@@ -0,0 +1,27 @@
+from utils.keyword_analyzer import reciprocal_rank_fusion, weighted_score_fusion
+
+
+def result(node_id, score):
+    return {'node_id': node_id, 'content': f'{node_id} 본문', 'title': node_id, 'score': score}
+
+
+def test_rrf_dedupes_by_node_id_and_ranks_shared_nodes_first():
+    fused = reciprocal_rank_fusion({'fulltext': [result('a', 7.5), result('b', 3.0)],
+                                    'vector': [result('b', 0.91), result('c', 0.88)]})
+    assert [r['node_id'] for r in fused] == ['b', 'a', 'c']
+    assert fused[0]['search_type'] == 'hybrid'
+    assert fused[0]['legs'] == ['fulltext', 'vector']
+
+
+def test_rrf_ignores_raw_score_scale():
+    fused = reciprocal_rank_fusion({'fulltext': [result('a', 1000.0)], 'vector': [result('b', 0.1)]},
+                                   weights={'fulltext': 1.0, 'vector': 1.0})
+    assert fused[0]['final_score'] == fused[1]['final_score']
+
+
+def test_weighted_fusion_normalizes_each_leg():
+    fused = weighted_score_fusion({'fulltext': [result('a', 12.0), result('b', 2.0)],
+                                   'vector': [result('c', 0.9), result('d', 0.5)]},
+                                  weights={'fulltext': 1.0, 'vector': 0.5})
+    scores = {r['node_id']: r['final_score'] for r in fused}
+    assert scores == {'a': 1.0, 'b': 0.0, 'c': 0.5, 'd': 0.0}
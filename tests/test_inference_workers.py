@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from utils.inference_workers import InferenceWorkerPool, _WorkerHandle
+
+
+def make_pool(states):
+    # 프로세스를 띄우지 않고 라우팅/결과 전달 로직만 확인
+    pool = InferenceWorkerPool.__new__(InferenceWorkerPool)
+    pool.num_workers = len(states)
+    pool._workers = {i: _WorkerHandle(worker_id=i, requests=None, heartbeat=None, state=state) for i, state in enumerate(states)}
+    pool._pending = {}
+    pool._started = {}
+    pool._lock = threading.Lock()
+    return pool
+
+
+def test_cache_key_routing_is_sticky():
+    pool = make_pool(["ready"] * 4)
+    assert pool._pick_worker("thread-1") is pool._pick_worker("thread-1")
+
+
+def test_cache_key_routing_skips_failed_worker():
+    pool = make_pool(["ready"] * 4)
+    preferred = pool._pick_worker("thread-1")
+    preferred.state = "failed"
+    assert pool._pick_worker("thread-1").state == "ready"
+
+
+def test_streamed_chunks_reach_the_consumer_queue():
+    pool = make_pool(["ready"])
+
+    async def run():
+        chunks = asyncio.Queue()
+        pool._pending[7] = (asyncio.get_running_loop(), chunks, 0)
+        pool._resolve(7, chunk="안녕")
+        pool._resolve(7, chunk="하세요")
+        pool._resolve(7)
+        return [await chunks.get() for _ in range(3)]
+
+    assert asyncio.run(run()) == [("chunk", "안녕"), ("chunk", "하세요"), ("done", None)]
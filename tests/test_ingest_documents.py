@@ -0,0 +1,110 @@
+import asyncio
+import importlib
+import sys
+import types
+
+import pytest
+
+OLD_PAGES = [(1, "제1조(목적)\n이 약관은 이동전화 서비스 이용 조건을 정합니다.\n"
+                 "제2조(요금)\n기본 요금은 매월 청구합니다.")]
+NEW_PAGES = [(1, "제1조(목적)\n이 약관은 이동전화 서비스 이용 조건을 정합니다.\n"
+                 "제2조(요금)\n기본 요금은 매월 말일에 청구합니다.")]
+
+
+class FakeGraph:
+    """ingest_pdf가 쓰는 Cypher만 흉내 내는 KnowledgeBase/SourceDocument 저장소"""
+
+    def __init__(self, module, fail_upsert=False):
+        self.module = module
+        self.chunks = {}
+        self.documents = {}
+        self.queries = []
+        self.fail_upsert = fail_upsert
+
+    async def run_query(self, query, parameters=None, read_only=True):
+        parameters = parameters or {}
+        self.queries.append(query)
+        if query == self.module.SOURCE_DOCUMENT_QUERY:
+            document = self.documents.get(parameters["path"])
+            return [{"file_hash": document["file_hash"]}] if document else []
+        if query == self.module.UPSERT_CHUNKS_QUERY:
+            if self.fail_upsert:
+                raise ConnectionError("Neo4j connection lost")
+            for row in parameters["rows"]:
+                key = (row["source_file"], row["content_hash"])
+                self.chunks[key] = {**self.chunks.get(key, {}), **row}
+            return [{"written": len(parameters["rows"])}]
+        if query == self.module.DELETE_STALE_CHUNKS_QUERY:
+            stale = [key for key in self.chunks
+                     if key[0] == parameters["path"] and key[1] not in parameters["hashes"]]
+            for key in stale:
+                del self.chunks[key]
+            return [{"removed": len(stale)}]
+        if query == self.module.RECORD_SOURCE_DOCUMENT_QUERY:
+            self.documents[parameters["path"]] = parameters
+        return []
+
+    def contents(self):
+        return sorted(chunk["content"] for chunk in self.chunks.values())
+
+
+@pytest.fixture
+def ingest(monkeypatch):
+    """neo4j 드라이버/PDF 파서 없이 ingest_documents 모듈을 임포트"""
+    fake_pool = types.ModuleType("utils.neo4j_pool")
+    fake_pool.run_query = fake_pool.close_neo4j = None
+    fake_pool.neo4j_pool_status = lambda: {}
+    monkeypatch.setitem(sys.modules, "utils.neo4j_pool", fake_pool)
+    monkeypatch.delitem(sys.modules, "ingest_documents", raising=False)
+    return importlib.import_module("ingest_documents")
+
+
+def ingest_version(module, graph, pages, file_hash, monkeypatch, path="terms.pdf"):
+    monkeypatch.setattr(module, "run_query", graph.run_query)
+    monkeypatch.setattr(module, "iter_pdf_pages", lambda p: iter(pages))
+    monkeypatch.setattr(module, "file_sha256", lambda p: file_hash)
+    return asyncio.run(module.ingest_pdf(path))
+
+
+def test_reingest_upserts_then_deletes_only_stale_chunks(ingest, monkeypatch):
+    graph = FakeGraph(ingest)
+    ingest_version(ingest, graph, OLD_PAGES, "v1", monkeypatch)
+    unchanged = next(c for c in graph.chunks.values() if c["article"] == "제1조")
+    unchanged["embedding"] = [0.1, 0.2]
+
+    graph.queries.clear()
+    stats = ingest_version(ingest, graph, NEW_PAGES, "v2", monkeypatch)
+
+    assert graph.queries == [ingest.SOURCE_DOCUMENT_QUERY, ingest.UPSERT_CHUNKS_QUERY,
+                             ingest.DELETE_STALE_CHUNKS_QUERY, ingest.RECORD_SOURCE_DOCUMENT_QUERY]
+    assert stats["stale_removed"] == 1
+    assert graph.contents() == ["제1조(목적)\n이 약관은 이동전화 서비스 이용 조건을 정합니다.",
+                                "제2조(요금)\n기본 요금은 매월 말일에 청구합니다."]
+    # 바뀌지 않은 조항은 같은 노드로 남아 임베딩을 다시 만들 필요가 없다
+    assert unchanged["embedding"] == [0.1, 0.2] and unchanged in graph.chunks.values()
+    assert graph.documents["terms.pdf"]["file_hash"] == "v2"
+
+
+def test_failed_reingest_keeps_old_chunks_and_file_hash(ingest, monkeypatch):
+    graph = FakeGraph(ingest)
+    ingest_version(ingest, graph, OLD_PAGES, "v1", monkeypatch)
+    before = graph.contents()
+
+    graph.fail_upsert = True
+    with pytest.raises(ConnectionError):
+        ingest_version(ingest, graph, NEW_PAGES, "v2", monkeypatch)
+
+    assert graph.contents() == before
+    assert graph.documents["terms.pdf"]["file_hash"] == "v1"
+
+
+def test_empty_extraction_does_not_delete_existing_chunks(ingest, monkeypatch):
+    graph = FakeGraph(ingest)
+    ingest_version(ingest, graph, OLD_PAGES, "v1", monkeypatch)
+    before = graph.contents()
+
+    with pytest.raises(RuntimeError):
+        ingest_version(ingest, graph, [(1, "")], "v2", monkeypatch)
+
+    assert graph.contents() == before
+    assert graph.documents["terms.pdf"]["file_hash"] == "v1"
@@ -0,0 +1,138 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+import utils.keyword_analyzer as keyword_analyzer
+from utils.keyword_analyzer import KeywordCache, KoreanTokenizerBackend, LexiconMatcher
+
+
+class CountingBackend(KoreanTokenizerBackend):
+    name = 'counting'
+
+    def __init__(self):
+        self.calls = 0
+
+    def pos(self, text):
+        self.calls += 1
+        return [(word, 'Noun') for word in text.split()]
+
+
+class FakeNeo4jSearch:
+    async def async_hybrid_search(self, query, filters):
+        return [{'node_id': 'n1', 'content': '유심 보호 서비스 안내', 'title': '유심', 'score': 1.0}]
+
+
+@pytest.fixture
+def counting_backend(monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(keyword_analyzer, 'get_korean_tokenizer', lambda: backend)
+    monkeypatch.setattr(keyword_analyzer, 'keyword_cache', KeywordCache(path=None))
+    # 실제 Neo4j 대신 결과가 없는 풀텍스트 조회로 대체 (검색 인스턴스의 폴백이 사용됨)
+    fake_pool = types.ModuleType('utils.neo4j_pool')
+
+    async def run_query(query, parameters=None, read_only=True):
+        return []
+
+    fake_pool.run_query = run_query
+    monkeypatch.setitem(sys.modules, 'utils.neo4j_pool', fake_pool)
+    return backend
+
+
+def fake_neo4j_pool(monkeypatch, fulltext=None, vector=None):
+    """풀텍스트/벡터 Cypher에 따라 레코드를 돌려주거나 예외를 던지는 run_query"""
+    fake_pool = types.ModuleType('utils.neo4j_pool')
+
+    async def run_query(query, parameters=None, read_only=True):
+        response = fulltext if query == keyword_analyzer.FULLTEXT_SEARCH_QUERY else vector
+        if isinstance(response, Exception):
+            raise response
+        return response or []
+
+    fake_pool.run_query = run_query
+    monkeypatch.setitem(sys.modules, 'utils.neo4j_pool', fake_pool)
+
+
+def test_query_is_tokenized_once_per_turn(counting_backend):
+    async def run():
+        analysis = await keyword_analyzer.analyze_user_query_keywords('유심 보호 서비스 신청 방법')
+        results = await keyword_analyzer.preprocess_and_search_neo4j(
+            '유심 보호 서비스 신청 방법', analysis['transformed_query'], FakeNeo4jSearch(),
+            core_keywords=analysis['core_keywords']
+        )
+        return analysis, results
+
+    analysis, results = asyncio.run(run())
+    assert counting_backend.calls == 1
+    assert set(analysis['core_keywords']) == {'유심', '보호', '서비스', '신청', '방법'}
+    assert results[0]['node_id'] == 'n1'
+
+
+def test_fulltext_leg_tokenizes_without_core_keywords(counting_backend):
+    asyncio.run(keyword_analyzer.preprocess_and_search_neo4j('유심 보호', '유심 보호', FakeNeo4jSearch()))
+    assert counting_backend.calls == 1
+
+
+
+def test_lexicon_matcher_matches_substrings_in_lexicon_order():
+    matcher = LexiconMatcher({'요금': ['요금제', '요금'], '유심': ['유심', 'usim']})
+    assert matcher.match_all('유심 요금제 변경') == ['요금', '유심']
+    assert matcher.first_match('usim 교체') == '유심'
+    assert matcher.first_match('해지 문의') is None
+
+
+def test_keyword_cache_evicts_least_recently_used():
+    cache = KeywordCache(max_entries=2, path=None)
+    cache.put('a', ['유심'])
+    cache.put('b', ['요금'])
+    assert cache.get('a') == ['유심']
+    cache.put('c', ['해지'])
+    assert cache.get('b') is None
+    assert cache.get('a') == ['유심']
+    assert cache.stats()['hits'] == 2
+
+
+def test_keyword_cache_returns_copies():
+    cache = KeywordCache(max_entries=2, path=None)
+    cache.put('a', ['유심'])
+    cache.get('a').append('변경')
+    assert cache.get('a') == ['유심']
+
+
+VECTOR_RECORDS = [{'node_id': 'v1', 'content': '유심 교체 절차', 'title': '유심', 'score': 0.9}]
+FULLTEXT_RECORDS = [{'node_id': 'f1', 'content': '유심 보호 서비스 가입', 'title': '유심', 'score': 4.2}]
+
+
+def hybrid_search(query_embedding):
+    return asyncio.run(keyword_analyzer.hybrid_search_neo4j(
+        '유심 보호', '유심 보호', FakeNeo4jSearch(), query_embedding=query_embedding, core_keywords=['유심', '보호']
+    ))
+
+
+def test_failed_fulltext_leg_marks_results_partial(counting_backend, monkeypatch):
+    fake_neo4j_pool(monkeypatch, fulltext=RuntimeError('fulltext index missing'), vector=VECTOR_RECORDS)
+    results = hybrid_search([0.1, 0.2])
+    assert [r['node_id'] for r in results] == ['v1']
+    assert results[0]['partial'] is True
+    assert results[0]['answered_legs'] == ['vector']
+
+
+def test_missing_embedding_marks_vector_leg_failed(counting_backend, monkeypatch):
+    fake_neo4j_pool(monkeypatch, fulltext=FULLTEXT_RECORDS, vector=VECTOR_RECORDS)
+
+    async def embed_query(query):
+        return None
+
+    monkeypatch.setattr(keyword_analyzer, 'embed_query', embed_query)
+    results = hybrid_search(None)
+    assert [r['node_id'] for r in results] == ['f1']
+    assert results[0]['partial'] is True
+    assert results[0]['answered_legs'] == ['fulltext']
+
+
+def test_both_legs_answering_is_not_partial(counting_backend, monkeypatch):
+    fake_neo4j_pool(monkeypatch, fulltext=FULLTEXT_RECORDS, vector=VECTOR_RECORDS)
+    results = hybrid_search([0.1, 0.2])
+    assert {r['node_id'] for r in results} == {'f1', 'v1'}
+    assert all(r['partial'] is False for r in results)
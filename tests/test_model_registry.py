@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from utils.model_utils import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeModel:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def get_memory_footprint(self):
+        return self.nbytes
+
+
+def make_registry(budget_mb, events):
+    registry = ModelRegistry(max_resident_bytes=budget_mb * MB)
+
+    def loader(name, size_mb):
+        def load():
+            resident = [n for n, s in registry.status().items() if s["state"] == "loaded"]
+            events.append((name, resident))
+            return object(), FakeModel(size_mb * MB)
+        return load
+
+    registry.register("a", loader("a", 60), estimated_mb=60)
+    registry.register("b", loader("b", 60), estimated_mb=60)
+    return registry
+
+
+def test_evicts_before_loading_when_estimate_exceeds_budget():
+    events = []
+    registry = make_registry(100, events)
+    registry.get("a")
+    registry.get("b")
+    # b를 로딩하는 시점에는 a가 이미 언로드되어 있어야 한다
+    assert events == [("a", []), ("b", [])]
+    assert registry.status()["a"]["state"] == "unloaded"
+
+
+def test_measured_size_is_used_after_unload():
+    events = []
+    registry = make_registry(100, events)
+    registry.register("c", lambda: (object(), FakeModel(30 * MB)))
+    registry.get("c")
+    registry.unload("c")
+    registry.get("a")
+    registry.get("c")
+    # c의 측정값(30MB)으로 예산 안에 들어가므로 a는 유지
+    assert registry.status()["a"]["state"] == "loaded"
+    assert registry.status()["c"]["state"] == "loaded"
@@ -0,0 +1,125 @@
+import asyncio
+import importlib
+import sys
+import types
+
+import pytest
+
+TURNS = 100
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = records
+
+    async def data(self):
+        return self._records
+
+
+class FakeTransaction:
+    async def run(self, query, parameters):
+        return FakeResult([{'node_id': 'n1', 'content': query, 'score': 1.0}])
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_read(self, work):
+        return await work(FakeTransaction())
+
+    execute_write = execute_read
+
+
+class FakeDriver:
+    """드라이버 하나가 세션을 몇 번 빌려줬는지 기록 (실제 드라이버는 세션마다 풀의 연결을 재사용)"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.closed = False
+
+    def session(self, **kwargs):
+        self.sessions += 1
+        return FakeSession()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeHybridSearch:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    async def async_close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def neo4j_pool(monkeypatch):
+    """neo4j 드라이버 / graphDB 모듈을 대체한 상태로 utils.neo4j_pool을 새로 임포트"""
+    fake_neo4j = types.ModuleType('neo4j')
+    fake_neo4j.AsyncGraphDatabase = types.SimpleNamespace(driver=None)
+    fake_neo4j.AsyncDriver = FakeDriver
+    fake_neo4j.READ_ACCESS, fake_neo4j.WRITE_ACCESS = 'READ', 'WRITE'
+    fake_graph_db = types.ModuleType('graphDB.neo4j')
+    fake_graph_db.Neo4jHybridSearch = FakeHybridSearch
+    monkeypatch.setitem(sys.modules, 'neo4j', fake_neo4j)
+    monkeypatch.setitem(sys.modules, 'graphDB', types.ModuleType('graphDB'))
+    monkeypatch.setitem(sys.modules, 'graphDB.neo4j', fake_graph_db)
+    monkeypatch.delitem(sys.modules, 'utils.neo4j_pool', raising=False)
+
+    module = importlib.import_module('utils.neo4j_pool')
+    drivers = []
+
+    def driver(uri, auth=None, **settings):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    monkeypatch.setattr(module.AsyncGraphDatabase, 'driver', driver)
+    yield module, drivers
+    # 대체 모듈로 임포트한 utils.neo4j_pool이 다른 테스트에 남지 않도록 패키지 속성에서 제거
+    vars(sys.modules['utils']).pop('neo4j_pool', None)
+
+
+def test_driver_is_reused_across_turns(neo4j_pool):
+    module, drivers = neo4j_pool
+
+    async def turn(i):
+        # 페르소나 턴처럼 검색 인스턴스를 가져오고 풀텍스트/벡터 레그를 동시에 실행
+        search = module.get_neo4j_search()
+        fulltext, vector = await asyncio.gather(
+            module.run_query('FULLTEXT', {'query': f'유심 {i}'}),
+            module.run_query('VECTOR', {'limit': 3}),
+        )
+        return search, fulltext, vector
+
+    async def run():
+        return [await turn(i) for i in range(TURNS)]
+
+    turns = asyncio.run(run())
+
+    assert module.pool_metrics.drivers_created == 1
+    assert len(drivers) == 1 and not drivers[0].closed
+    assert drivers[0].sessions == TURNS * 2
+    assert module.pool_metrics.sessions_opened == TURNS * 2
+    assert module.pool_metrics.active_sessions == 0
+    assert len({id(search) for search, _, _ in turns}) == 1
+    assert turns[-1][1] == [{'node_id': 'n1', 'content': 'FULLTEXT', 'score': 1.0}]
+
+
+def test_new_event_loop_replaces_and_closes_the_driver(neo4j_pool):
+    module, drivers = neo4j_pool
+
+    asyncio.run(module.run_query('FULLTEXT'))
+    asyncio.run(module.run_query('FULLTEXT'))
+
+    assert module.pool_metrics.drivers_created == 2
+    # 이전 루프는 이미 멈췄으므로 별도 스레드에서 닫힌다
+    for _ in range(100):
+        if drivers[0].closed:
+            break
+        asyncio.run(asyncio.sleep(0.01))
+    assert drivers[0].closed and not drivers[1].closed
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("ollama")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import utils.model_utils as model_utils
+
+TURNS = 20
+REPLY_PARTS = ["안녕하세요,", " 고객님."]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """/api/chat만 흉내 내는 keep-alive HTTP/1.1 서버 핸들러 (연결마다 한 번 setup)"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests += 1
+        base = {"model": request["model"], "created_at": "2026-01-01T00:00:00Z"}
+        if request.get("stream"):
+            parts = [dict(base, message={"role": "assistant", "content": text}, done=False) for text in REPLY_PARTS]
+            parts.append(dict(base, message={"role": "assistant", "content": ""}, done=True, done_reason="stop"))
+        else:
+            parts = [dict(base, message={"role": "assistant", "content": "".join(REPLY_PARTS)}, done=True, done_reason="stop")]
+        body = "".join(json.dumps(part, ensure_ascii=False) + "\n" for part in parts).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.connections = 0
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(model_utils, "OLLAMA_HOST", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(model_utils, "_ollama_client", None)
+    monkeypatch.setattr(model_utils, "_ollama_client_loop", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def turn_messages(turn):
+    return [SystemMessage(content="당신은 SKT 고객센터 상담원입니다."), HumanMessage(content=f"{turn}번째 질문입니다.")]
+
+
+def test_turns_reuse_one_connection(fake_ollama):
+    async def run():
+        latencies = []
+        for turn in range(TURNS):
+            start = time.perf_counter()
+            if turn % 2:
+                reply = "".join([text async for text in model_utils.stream_ollama_response(turn_messages(turn))])
+            else:
+                reply = await model_utils.generate_ollama_response(turn_messages(turn))
+            latencies.append(time.perf_counter() - start)
+            assert reply == "".join(REPLY_PARTS)
+        return latencies
+
+    latencies = asyncio.run(run())
+    print(f"{TURNS}턴: 연결 {fake_ollama.connections}개 (턴당 {fake_ollama.connections / TURNS:.2f}), "
+          f"p50 {statistics.median(latencies) * 1000:.1f}ms")
+    assert fake_ollama.requests == TURNS
+    assert fake_ollama.connections == 1
+
+
+def test_client_from_a_previous_loop_is_closed(fake_ollama):
+    async def turn():
+        await model_utils.generate_ollama_response(turn_messages(0))
+        return model_utils.get_ollama_client()
+
+    first = asyncio.run(turn())
+    second = asyncio.run(turn())
+    assert second is not first
+
+    # 이전 루프는 이미 닫혔으므로 별도 스레드에서 닫힌다
+    deadline = time.monotonic() + 5
+    while not first._client.is_closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert first._client.is_closed
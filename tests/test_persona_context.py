@@ -0,0 +1,98 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_core")
+pytest.importorskip("trustcall")
+pytest.importorskip("langchain_mcp_adapters")
+pytest.importorskip("neo4j")
+pytest.importorskip("graphDB.neo4j")
+
+import agents.persona_agent as persona_agent
+
+MEMORY_SECONDS = 0.3
+EMBEDDING_SECONDS = 0.4
+ANALYSIS_SECONDS = 0.1
+SEARCH_SECONDS = 0.05
+
+
+class SlowStore:
+    """네임스페이스마다 MEMORY_SECONDS가 걸리는 메모리 저장소"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def asearch(self, namespace):
+        self.calls.append(namespace[0])
+        await asyncio.sleep(MEMORY_SECONDS)
+        if namespace[0] == "todo":
+            return [SimpleNamespace(value={"task": "유심 교체"}), SimpleNamespace(value={"task": "요금 확인"})]
+        return [SimpleNamespace(value={"name": "홍길동"})]
+
+
+@pytest.fixture
+def slow_stages(monkeypatch):
+    async def embed_query(query):
+        await asyncio.sleep(EMBEDDING_SECONDS)
+        return [0.1, 0.2]
+
+    async def analyze_user_query_keywords(query, company_id=None):
+        await asyncio.sleep(ANALYSIS_SECONDS)
+        return {"transformed_query": query, "core_keywords": query.split()}
+
+    async def hybrid_search_neo4j(original_query, transformed_query, neo4j_search, query_embedding=None,
+                                  core_keywords=None):
+        # 실제 검색처럼 벡터 레그가 미리 시작한 임베딩 태스크를 기다린다
+        assert await query_embedding == [0.1, 0.2]
+        await asyncio.sleep(SEARCH_SECONDS)
+        return [{"node_id": "n1", "content": "유심 보호 서비스 안내", "score": 0.9}]
+
+    monkeypatch.setattr(persona_agent, "embed_query", embed_query)
+    monkeypatch.setattr(persona_agent, "analyze_user_query_keywords", analyze_user_query_keywords)
+    monkeypatch.setattr(persona_agent, "hybrid_search_neo4j", hybrid_search_neo4j)
+
+
+def test_memory_namespaces_are_read_concurrently():
+    store = SlowStore()
+    start = time.perf_counter()
+    profile, todo, instructions = asyncio.run(persona_agent._load_memories(store, "general", "user-1"))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(store.calls) == ["instructions", "profile", "todo"]
+    assert profile == {"name": "홍길동"}
+    assert todo == "{'task': '유심 교체'}\n{'task': '요금 확인'}"
+    assert elapsed < MEMORY_SECONDS * 2
+
+
+def test_turn_wall_time_is_close_to_the_slowest_stage(slow_stages):
+    """enhanced_persona_assistant와 같은 구성: 임베딩을 먼저 시작하고 메모리 조회와 분석→검색을 동시에 실행"""
+    async def turn():
+        timings = {}
+        embedding_task = asyncio.ensure_future(
+            persona_agent._timed("query_embedding", persona_agent.embed_query("유심 보호"), timings)
+        )
+        memories, (analysis, results) = await asyncio.gather(
+            persona_agent._timed("memory_lookup", persona_agent._load_memories(SlowStore(), "general", "user-1"), timings),
+            persona_agent._timed(
+                "retrieval",
+                persona_agent._analyze_and_search("유심 보호", "skt", None, embedding_task, timings),
+                timings,
+            ),
+        )
+        return timings, analysis, results
+
+    start = time.perf_counter()
+    timings, analysis, results = asyncio.run(turn())
+    wall = time.perf_counter() - start
+
+    # 가장 긴 경로: 임베딩 → 검색 (메모리 조회와 키워드 분석은 그 뒤에 가려진다)
+    critical_path = EMBEDDING_SECONDS + SEARCH_SECONDS
+    sequential = MEMORY_SECONDS * 3 + EMBEDDING_SECONDS + ANALYSIS_SECONDS + SEARCH_SECONDS
+    assert set(timings) == {"query_embedding", "memory_lookup", "keyword_analysis", "hybrid_search", "retrieval"}
+    assert timings["retrieval"] >= critical_path - 0.01
+    assert wall < critical_path + 0.15 < sequential
+    assert analysis["core_keywords"] == ["유심", "보호"]
+    assert results[0]["node_id"] == "n1"
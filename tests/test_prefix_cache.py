@@ -0,0 +1,115 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import utils.model_utils as model_utils
+from utils.model_utils import PrefixKVCache
+from tests.tiny_model import greedy_kwargs, prompt_ids, tiny_model, tiny_tokenizer
+
+
+class FakeKVCache:
+    def __init__(self, length):
+        self.length = length
+        self.layers = [SimpleNamespace(keys=torch.zeros(1, 1, length, 4), values=torch.zeros(1, 1, length, 4))]
+
+    def get_seq_length(self):
+        return self.length
+
+    def crop(self, length):
+        self.length = length
+
+
+def test_prefix_cache_reuses_common_prefix_once():
+    cache = PrefixKVCache(max_bytes=1 << 20)
+    cache.put(("qwen3", "t1"), torch.tensor([1, 2, 3, 4, 5]), FakeKVCache(5))
+
+    past, prefix_length = cache.take(("qwen3", "t1"), torch.tensor([1, 2, 3, 9, 9, 9]))
+    assert prefix_length == 3
+    assert past.get_seq_length() == 3
+    # generate가 캐시를 변경하므로 꺼낸 항목은 남기지 않는다
+    assert cache.take(("qwen3", "t1"), torch.tensor([1, 2, 3])) == (None, 0)
+
+
+def test_prefix_cache_keeps_last_prompt_token_for_logits():
+    cache = PrefixKVCache(max_bytes=1 << 20)
+    cache.put(("qwen3", "t1"), torch.tensor([1, 2, 3]), FakeKVCache(3))
+    _, prefix_length = cache.take(("qwen3", "t1"), torch.tensor([1, 2, 3]))
+    assert prefix_length == 2
+
+
+def test_prefix_cache_evicts_least_recent_thread_over_budget():
+    # FakeKVCache(6)은 float32 2 x 6 x 4 = 192 bytes
+    cache = PrefixKVCache(max_bytes=320)
+    cache.put(("qwen3", "old"), torch.tensor([1] * 6), FakeKVCache(6))
+    cache.put(("qwen3", "new"), torch.tensor([2] * 6), FakeKVCache(6))
+    assert cache.total_bytes == 192
+    assert cache.take(("qwen3", "old"), torch.tensor([1] * 7)) == (None, 0)
+
+
+def test_prefix_cache_is_used_only_while_the_model_is_idle(monkeypatch):
+    monkeypatch.setattr(model_utils, "PREFIX_CACHE_POLICY", "auto")
+    scheduler = model_utils.get_batch_scheduler("solar")
+    assert model_utils.use_prefix_cache("solar", "t1")
+    assert not model_utils.use_prefix_cache("solar", None)
+
+    monkeypatch.setattr(scheduler, "pending", 1)
+    assert not model_utils.use_prefix_cache("solar", "t1")
+
+    monkeypatch.setattr(model_utils, "PREFIX_CACHE_POLICY", "prefix")
+    assert model_utils.use_prefix_cache("solar", "t1")
+
+
+class PrefillRecorder:
+    """arm() 이후 첫 forward(프리필)의 입력 토큰 수와 소요 시간을 기록"""
+
+    def __init__(self, model):
+        self.armed = False
+        self.tokens = 0
+        self.seconds = 0.0
+        self._start = 0.0
+        model.register_forward_pre_hook(self._before, with_kwargs=True)
+        model.register_forward_hook(self._after, with_kwargs=True)
+
+    def arm(self):
+        self.armed = True
+
+    def _before(self, module, args, kwargs):
+        if self.armed:
+            input_ids = kwargs.get("input_ids", args[0] if args else None)
+            self.tokens = input_ids.shape[-1]
+            self._start = time.perf_counter()
+
+    def _after(self, module, args, kwargs, output):
+        if self.armed:
+            self.seconds = time.perf_counter() - self._start
+            self.armed = False
+
+
+def test_turn_n_output_matches_and_prefills_only_the_new_suffix(monkeypatch):
+    monkeypatch.setattr(model_utils, "prefix_cache", PrefixKVCache(max_bytes=1 << 30))
+    tokenizer = tiny_tokenizer()
+    # float64로 돌려 캐시 사용 여부에 따른 연산 순서 차이가 탐욕 디코딩 결과를 바꾸지 않게 한다
+    model = tiny_model(hidden_size=256, num_layers=4).double()
+    recorder = PrefillRecorder(model)
+
+    history = prompt_ids(1024)
+    reply = model_utils._generate_with_prefix_cache(tokenizer, model, history, greedy_kwargs(8), ("tiny", "thread-1"))
+    turn_n = history + tokenizer.encode(reply, add_special_tokens=False) + prompt_ids(16, offset=99)
+
+    recorder.arm()
+    cached = model_utils._generate_with_prefix_cache(tokenizer, model, turn_n, greedy_kwargs(8), ("tiny", "thread-1"))
+    cached_tokens, cached_seconds = recorder.tokens, recorder.seconds
+
+    recorder.arm()
+    full = model_utils._generate_with_prefix_cache(tokenizer, model, turn_n, greedy_kwargs(8), ("tiny", "thread-2"))
+    full_tokens, full_seconds = recorder.tokens, recorder.seconds
+    print(f"turn N 프리필: 캐시 {cached_tokens}토큰 {cached_seconds * 1000:.1f}ms, 전체 {full_tokens}토큰 {full_seconds * 1000:.1f}ms")
+
+    assert cached == full
+    assert full_tokens == len(turn_n)
+    assert cached_tokens < 40
+    assert cached_seconds < full_seconds
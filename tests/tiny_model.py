@@ -0,0 +1,49 @@
+"""다운로드 없이 CPU에서 바로 만들 수 있는 테스트/벤치마크용 작은 무작위 모델과 토크나이저"""
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+VOCAB_SIZE = 256
+PAD_ID, EOS_ID, UNK_ID = 0, 1, 2
+FIRST_WORD_ID = 3
+
+
+def tiny_tokenizer():
+    """"w3 w4 ..." 형식의 단어 단위 토크나이저 (턴 종료 마커가 생성될 일이 없다)"""
+    vocab = {"<pad>": PAD_ID, "<eos>": EOS_ID, "<unk>": UNK_ID}
+    vocab.update({f"w{i}": i for i in range(FIRST_WORD_ID, VOCAB_SIZE)})
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, pad_token="<pad>", eos_token="<eos>", unk_token="<unk>")
+    # 실제 생성 경로(ConversationRenderer)를 그대로 타도록 메시지 내용만 이어 붙이는 단순한 템플릿
+    tokenizer.chat_template = "{% for message in messages %}{{ message['content'] }} {% endfor %}"
+    return tokenizer
+
+
+def tiny_model(hidden_size: int = 64, num_layers: int = 2, seed: int = 0):
+    """Llama 구조의 작은 무작위 가중치 모델 (Qwen3와 같은 DynamicCache 경로를 탄다)"""
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=VOCAB_SIZE,
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=num_layers,
+        num_attention_heads=4,
+        num_key_value_heads=4,
+        max_position_embeddings=4096,
+        pad_token_id=PAD_ID,
+        bos_token_id=EOS_ID,
+        eos_token_id=EOS_ID,
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+def prompt_ids(length: int, offset: int = 0):
+    """요청마다 다른 프롬프트 토큰 ID (특수 토큰 제외)"""
+    words = VOCAB_SIZE - FIRST_WORD_ID
+    return [FIRST_WORD_ID + (offset * 7 + i) % words for i in range(length)]
+
+
+def greedy_kwargs(new_tokens: int):
+    """EOS로 일찍 끝나지 않도록 정확히 new_tokens개를 생성하는 탐욕 디코딩 파라미터"""
+    return {"do_sample": False, "max_new_tokens": new_tokens, "min_new_tokens": new_tokens}
@@ -0,0 +1,140 @@
+# utils/embedders.py
+import os
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+# 임베딩 백엔드 설정 (EMBEDDING_BACKEND=openai|local)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LOCAL_EMBEDDING_MODEL = os.environ.get("LOCAL_EMBEDDING_MODEL", "distiluse-base-multilingual-cased")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.environ.get("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+# torch | onnx | onnx_int8 (ONNX 변환/동적 양자화는 sentence-transformers>=3.2 + optimum[onnxruntime] 필요)
+LOCAL_EMBEDDING_RUNTIME = os.environ.get("LOCAL_EMBEDDING_RUNTIME", "torch").lower()
+LOCAL_EMBEDDING_EXPORT_DIR = os.environ.get("LOCAL_EMBEDDING_EXPORT_DIR", "./models/embeddings")
+
+OPENAI_EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+class Embedder:
+    """임베딩 백엔드 인터페이스: embed()는 텍스트 목록을 받아 같은 순서의 벡터 목록을 반환"""
+    backend = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def name(self) -> str:
+        # 캐시 키/체크포인트에 쓰는 백엔드+모델 식별자
+        return f"{self.backend}:{self.model}"
+
+    @property
+    def dimensions(self) -> int:
+        raise NotImplementedError
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self.embed([text]))[0]
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI 임베딩 API (요청 한 번에 여러 텍스트)"""
+    backend = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        super().__init__(model)
+        import openai
+        self._client = openai.AsyncOpenAI()  # API 키는 환경변수에서 자동 로드
+
+    @property
+    def dimensions(self) -> int:
+        return OPENAI_EMBEDDING_DIMENSIONS.get(self.model, 1536)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        response = await self._client.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+class SentenceTransformerEmbedder(Embedder):
+    """로컬 sentence-transformers 모델 (CPU 배치 추론, 네트워크 불필요)"""
+    backend = "local"
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+                 runtime: str = LOCAL_EMBEDDING_RUNTIME, device: str = "cpu"):
+        super().__init__(model)
+        self.batch_size = batch_size
+        self.runtime = runtime
+        self._model = self._load(model, runtime, device)
+        # 모델 하나를 여러 코루틴이 동시에 호출하지 않도록 직렬화 (배치 안에서 이미 병렬 처리됨)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(model: str, runtime: str, device: str):
+        from sentence_transformers import SentenceTransformer
+
+        if runtime == "torch":
+            return SentenceTransformer(model, device=device)
+        if runtime == "onnx":
+            return SentenceTransformer(model, device=device, backend="onnx")
+        if runtime == "onnx_int8":
+            return SentenceTransformerEmbedder._load_onnx_int8(model, device)
+        raise ValueError(f"지원하지 않는 LOCAL_EMBEDDING_RUNTIME: {runtime}")
+
+    @staticmethod
+    def _load_onnx_int8(model: str, device: str):
+        """ONNX로 변환 후 동적 int8 양자화한 모델을 내보내기 디렉토리에 캐시해 사용"""
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        export_dir = os.path.join(LOCAL_EMBEDDING_EXPORT_DIR, model.replace("/", "__"))
+        quantized_file = "onnx/model_qint8_avx2.onnx"
+        if not os.path.exists(os.path.join(export_dir, quantized_file)):
+            print(f"로컬 임베딩 모델 int8 ONNX 변환: {model} -> {export_dir}")
+            onnx_model = SentenceTransformer(model, device=device, backend="onnx")
+            onnx_model.save_pretrained(export_dir)
+            export_dynamic_quantized_onnx_model(onnx_model, "avx2", export_dir)
+        return SentenceTransformer(
+            export_dir, device=device, backend="onnx", model_kwargs={"file_name": quantized_file}
+        )
+
+    @property
+    def name(self) -> str:
+        return f"{self.backend}:{self.model}:{self.runtime}"
+
+    @property
+    def dimensions(self) -> int:
+        return self._model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = self._model.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return vectors.tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self._encode, texts)
+
+EMBEDDER_BACKENDS = {
+    "openai": OpenAIEmbedder,
+    "local": SentenceTransformerEmbedder,
+}
+
+_embedders: Dict[str, Embedder] = {}
+_embedders_lock = threading.Lock()
+
+def get_embedder(backend: Optional[str] = None) -> Embedder:
+    """백엔드별 임베더 싱글톤 (기본값은 EMBEDDING_BACKEND)"""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend not in EMBEDDER_BACKENDS:
+        raise ValueError(f"지원하지 않는 EMBEDDING_BACKEND: {backend} (가능: {', '.join(EMBEDDER_BACKENDS)})")
+    with _embedders_lock:
+        if backend not in _embedders:
+            _embedders[backend] = EMBEDDER_BACKENDS[backend]()
+        return _embedders[backend]
@@ -0,0 +1,353 @@
+# utils/inference_workers.py
+import os
+import time
+import asyncio
+import threading
+import itertools
+import queue as queue_module
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+
+# 워커 프로세스 설정 (MODEL_WORKER_PROCESSES=0이면 API 프로세스 안에서 직접 생성)
+MODEL_WORKER_PROCESSES = int(os.environ.get("MODEL_WORKER_PROCESSES", "0"))
+WORKER_HEARTBEAT_INTERVAL = float(os.environ.get("MODEL_WORKER_HEARTBEAT_SEC", "5"))
+WORKER_HEARTBEAT_TIMEOUT = float(os.environ.get("MODEL_WORKER_HEARTBEAT_TIMEOUT_SEC", "120"))
+WORKER_REQUEST_TIMEOUT = float(os.environ.get("MODEL_WORKER_REQUEST_TIMEOUT_SEC", "600"))
+# 처리 중인 요청이 이 시간 동안 토큰을 하나도 내지 못하면 워커가 멈춘 것으로 보고 재시작
+# (하트비트 스레드는 generate가 멈춰도 계속 뛰므로 프로세스가 죽은 경우만 잡아낸다)
+WORKER_PROGRESS_TIMEOUT = float(os.environ.get("MODEL_WORKER_PROGRESS_TIMEOUT_SEC", "180"))
+# 모델 로딩에 실패한 워커의 재시작 대기 시간 (연속 실패마다 두 배, 최대값까지)
+WORKER_RESTART_BACKOFF = float(os.environ.get("MODEL_WORKER_RESTART_BACKOFF_SEC", "10"))
+WORKER_RESTART_BACKOFF_MAX = float(os.environ.get("MODEL_WORKER_RESTART_BACKOFF_MAX_SEC", "300"))
+
+# 워커 프로세스 안에서는 다시 워커 풀로 위임하지 않도록 표시
+_in_worker = False
+
+def worker_pool_enabled() -> bool:
+    return MODEL_WORKER_PROCESSES > 0 and not _in_worker
+
+def _worker_main(worker_id: int, model_name: str, request_queue, result_queue, heartbeat, progress, initializer=None, initargs=()):
+    """워커 프로세스 진입점: 모델을 한 번 로딩한 뒤 큐에서 요청을 받아 생성 결과(또는 스트리밍 조각)를 돌려준다
+
+    progress에는 처리 중인 요청이 마지막으로 토큰을 낸 시각을 기록한다 (대기 중이면 0).
+    """
+    global _in_worker
+    _in_worker = True
+
+    def beat():
+        while True:
+            heartbeat.value = time.time()
+            time.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+    threading.Thread(target=beat, daemon=True).start()
+
+    from utils.model_utils import stream_model_response, model_registry
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    async def run_request(request_id, kwargs, stream):
+        # 스트리밍이 아닌 요청도 워커 안에서는 스트리밍으로 생성해 토큰마다 진행 시각을 갱신
+        parts = []
+        async for text in stream_model_response(**kwargs):
+            progress.value = time.time()
+            if stream:
+                result_queue.put(("chunk", worker_id, request_id, text))
+            else:
+                parts.append(text)
+        return None if stream else "".join(parts).strip()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        model_registry.get(model_name)
+        result_queue.put(("ready", worker_id, None, None))
+    except Exception as e:
+        result_queue.put(("failed", worker_id, None, str(e)))
+        return
+
+    while True:
+        item = request_queue.get()
+        if item is None:
+            break
+        request_id, kwargs, stream = item
+        result_queue.put(("started", worker_id, request_id, None))
+        progress.value = time.time()
+        try:
+            text = loop.run_until_complete(run_request(request_id, kwargs, stream))
+            result_queue.put(("done", worker_id, request_id, text))
+        except Exception as e:
+            result_queue.put(("error", worker_id, request_id, str(e)))
+        finally:
+            progress.value = 0.0
+
+@dataclass
+class _WorkerHandle:
+    """부모 프로세스에서 관리하는 워커 상태"""
+    worker_id: int
+    requests: Any = field(repr=False)
+    heartbeat: Any = field(repr=False)
+    process: Any = field(default=None, repr=False)
+    progress: Any = field(default=None, repr=False)
+    state: str = "starting"  # starting | ready | failed | stopped
+    restarts: int = 0
+    in_flight: int = 0
+    started_at: float = 0.0
+    failures: int = 0  # 연속 모델 로딩 실패 횟수
+    failed_at: float = 0.0
+
+class InferenceWorkerPool:
+    """모델을 하나씩 소유한 워커 프로세스 N개에 생성 요청을 분배하고, 상태 확인과 비정상 종료 시 재시작을 담당
+
+    initializer(*initargs)는 각 워커 프로세스에서 모델을 로딩하기 전에 실행된다 (multiprocessing.Pool과 같은 방식).
+    """
+
+    def __init__(self, model_name: str, num_workers: int = None, initializer=None, initargs: Tuple = ()):
+        self.model_name = model_name
+        self.num_workers = num_workers or MODEL_WORKER_PROCESSES
+        self._initializer = initializer
+        self._initargs = initargs
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._workers: Dict[int, _WorkerHandle] = {}
+        # 요청 id -> (이벤트 루프, 결과 Future 또는 스트리밍 조각 asyncio.Queue, 워커 id)
+        self._pending: Dict[int, Tuple[asyncio.AbstractEventLoop, Any, int]] = {}
+        self._started: Dict[int, int] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for worker_id in range(self.num_workers):
+            handle = _WorkerHandle(
+                worker_id=worker_id,
+                requests=self._ctx.Queue(),
+                heartbeat=self._ctx.Value("d", time.time()),
+                progress=self._ctx.Value("d", 0.0),
+            )
+            self._workers[worker_id] = handle
+            self._start_worker(handle)
+
+        threading.Thread(target=self._collect_results, daemon=True, name=f"workers-{model_name}-results").start()
+        threading.Thread(target=self._monitor, daemon=True, name=f"workers-{model_name}-monitor").start()
+        print(f"추론 워커 풀 시작: {model_name} x {self.num_workers}")
+
+    def _start_worker(self, handle: _WorkerHandle):
+        handle.heartbeat.value = time.time()
+        handle.progress.value = 0.0
+        handle.process = self._ctx.Process(
+            target=_worker_main,
+            args=(handle.worker_id, self.model_name, handle.requests, self._results, handle.heartbeat,
+                  handle.progress, self._initializer, self._initargs),
+            daemon=True,
+            name=f"inference-worker-{self.model_name}-{handle.worker_id}",
+        )
+        handle.state = "starting"
+        handle.started_at = time.time()
+        handle.process.start()
+
+    def _pick_worker(self, cache_key=None) -> _WorkerHandle:
+        candidates = [w for w in self._workers.values() if w.state != "failed"] or list(self._workers.values())
+        if cache_key is not None:
+            # 같은 스레드는 같은 워커로 보내 워커 안의 프리픽스 캐시를 재사용 (실패한 워커는 건너뜀)
+            preferred = self._workers[hash(cache_key) % self.num_workers]
+            if preferred in candidates:
+                return preferred
+            return candidates[hash(cache_key) % len(candidates)]
+        return min(candidates, key=lambda w: w.in_flight)
+
+    def _enqueue(self, sink, kwargs: Dict, stream: bool) -> int:
+        if self._closed:
+            raise RuntimeError("추론 워커 풀이 종료되었습니다")
+        request_id = next(self._ids)
+        with self._lock:
+            handle = self._pick_worker(kwargs.get("cache_key"))
+            handle.in_flight += 1
+            self._pending[request_id] = (asyncio.get_running_loop(), sink, handle.worker_id)
+        handle.requests.put((request_id, kwargs, stream))
+        return request_id
+
+    async def submit(self, **kwargs) -> str:
+        """generate_model_response 인자를 워커에 전달하고 결과 텍스트를 기다린다"""
+        future = asyncio.get_running_loop().create_future()
+        request_id = self._enqueue(future, kwargs, stream=False)
+        try:
+            return await asyncio.wait_for(future, WORKER_REQUEST_TIMEOUT)
+        finally:
+            self._finish(request_id)
+
+    async def submit_stream(self, **kwargs) -> AsyncIterator[str]:
+        """stream_model_response 인자를 워커에 전달하고 디코딩된 텍스트 조각을 받는 대로 yield"""
+        chunks: asyncio.Queue = asyncio.Queue()
+        request_id = self._enqueue(chunks, kwargs, stream=True)
+        try:
+            while True:
+                # 조각 사이 간격이 요청 제한 시간을 넘으면 중단
+                kind, payload = await asyncio.wait_for(chunks.get(), WORKER_REQUEST_TIMEOUT)
+                if kind == "chunk":
+                    yield payload
+                elif kind == "error":
+                    raise RuntimeError(payload)
+                else:
+                    return
+        finally:
+            self._finish(request_id)
+
+    def _finish(self, request_id: int) -> Optional[Tuple]:
+        with self._lock:
+            pending = self._pending.pop(request_id, None)
+            self._started.pop(request_id, None)
+            if pending:
+                self._workers[pending[2]].in_flight -= 1
+        return pending
+
+    def _resolve(self, request_id: int, result: str = None, error: str = None, chunk: str = None):
+        with self._lock:
+            pending = self._pending.get(request_id)
+        if not pending:
+            return
+        loop, sink, _ = pending
+
+        if isinstance(sink, asyncio.Queue):
+            if chunk is not None:
+                item = ("chunk", chunk)
+            else:
+                item = ("error", error) if error is not None else ("done", None)
+            loop.call_soon_threadsafe(sink.put_nowait, item)
+            return
+        future = sink
+
+        def set_result():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+        loop.call_soon_threadsafe(set_result)
+
+    def _collect_results(self):
+        while not self._closed:
+            try:
+                kind, worker_id, request_id, payload = self._results.get(timeout=1)
+            except queue_module.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            handle = self._workers[worker_id]
+            if kind == "ready":
+                handle.state = "ready"
+                handle.failures = 0
+            elif kind == "failed":
+                self._mark_failed(handle, payload)
+            elif kind == "started":
+                with self._lock:
+                    self._started[request_id] = worker_id
+            elif kind == "chunk":
+                self._resolve(request_id, chunk=payload)
+            elif kind == "done":
+                self._resolve(request_id, result=payload)
+            elif kind == "error":
+                self._resolve(request_id, error=payload)
+
+    def _mark_failed(self, handle: _WorkerHandle, error: str):
+        """모델 로딩에 실패한 워커로 배정된 요청을 바로 실패 처리하고 재시작 대기 상태로 둔다"""
+        with self._lock:
+            handle.state = "failed"
+            handle.failures += 1
+            handle.failed_at = time.time()
+        print(f"추론 워커 {handle.worker_id} 모델 로딩 실패 ({handle.failures}회 연속, "
+              f"{self._restart_backoff(handle):.0f}초 후 재시작): {error}")
+
+        while True:
+            try:
+                item = handle.requests.get_nowait()
+            except queue_module.Empty:
+                break
+            if item is not None:
+                self._resolve(item[0], error=f"추론 워커 {handle.worker_id} 모델 로딩 실패: {error}")
+
+    @staticmethod
+    def _restart_backoff(handle: _WorkerHandle) -> float:
+        return min(WORKER_RESTART_BACKOFF * 2 ** max(handle.failures - 1, 0), WORKER_RESTART_BACKOFF_MAX)
+
+    def _monitor(self):
+        while not self._closed:
+            time.sleep(WORKER_HEARTBEAT_INTERVAL)
+            for handle in self._workers.values():
+                if self._closed:
+                    continue
+                if handle.state == "failed":
+                    # 로딩 실패 워커는 백오프 후 재시작 (일시적인 메모리 부족/파일 잠금 등에서 회복)
+                    if time.time() - handle.failed_at >= self._restart_backoff(handle):
+                        print(f"추론 워커 {handle.worker_id} 재시작 (모델 로딩 재시도)")
+                        handle.process.join(timeout=5)
+                        handle.restarts += 1
+                        self._start_worker(handle)
+                    continue
+                alive = handle.process.is_alive()
+                stale = time.time() - handle.heartbeat.value > WORKER_HEARTBEAT_TIMEOUT
+                # 하트비트는 살아 있어도 처리 중인 요청이 진행되지 않으면 generate가 멈춘 것
+                last_progress = handle.progress.value
+                hung = last_progress > 0 and time.time() - last_progress > WORKER_PROGRESS_TIMEOUT
+                if alive and not stale and not hung:
+                    continue
+
+                print(f"추론 워커 {handle.worker_id} 재시작 (alive={alive}, heartbeat_stale={stale}, hung={hung})")
+                if alive:
+                    handle.process.terminate()
+                handle.process.join(timeout=5)
+
+                # 죽은 워커가 처리 중이던 요청은 실패 처리 (큐에 남은 요청은 새 워커가 처리)
+                with self._lock:
+                    lost = [rid for rid, wid in self._started.items() if wid == handle.worker_id]
+                for request_id in lost:
+                    self._resolve(request_id, error=f"추론 워커 {handle.worker_id}가 비정상 종료되었습니다")
+
+                handle.restarts += 1
+                self._start_worker(handle)
+
+    def health(self) -> List[Dict]:
+        """워커별 상태 보고"""
+        now = time.time()
+        return [
+            {
+                "worker_id": handle.worker_id,
+                "pid": handle.process.pid if handle.process else None,
+                "state": handle.state,
+                "alive": bool(handle.process and handle.process.is_alive()),
+                "heartbeat_age": round(now - handle.heartbeat.value, 1),
+                "progress_age": round(now - handle.progress.value, 1) if handle.progress.value else None,
+                "in_flight": handle.in_flight,
+                "restarts": handle.restarts,
+            }
+            for handle in self._workers.values()
+        ]
+
+    def shutdown(self, timeout: float = 10):
+        self._closed = True
+        for handle in self._workers.values():
+            handle.requests.put(None)
+        for handle in self._workers.values():
+            handle.process.join(timeout=timeout)
+            if handle.process.is_alive():
+                handle.process.terminate()
+            handle.state = "stopped"
+
+_pools: Dict[str, InferenceWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+def get_worker_pool(model_name: str) -> InferenceWorkerPool:
+    """레지스트리 모델 이름별 워커 풀 싱글톤"""
+    with _pools_lock:
+        if model_name not in _pools:
+            _pools[model_name] = InferenceWorkerPool(model_name)
+        return _pools[model_name]
+
+def shutdown_worker_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -1,120 +1,427 @@
 # utils/keyword_analyzer.py
+import os
 import re
+import time
+import atexit
+import shelve
+import array
+import sqlite3
+import hashlib
 import asyncio
-from collections import Counter
-from typing import List, Dict, Set
-
-# 토크나이저 및 불용어 처리 라이브러리
-from konlpy.tag import Okt, Mecab
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import spacy
-
-# 임베딩 라이브러리
-from sentence_transformers import SentenceTransformer
-
-# NLTK 데이터 다운로드 (최초 실행시)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-
-# spaCy 모델 로드 (영어)
-try:
-    nlp_en = spacy.load("en_core_web_sm")
-except OSError:
-    print("spaCy English model not found. Install with: python -m spacy download en_core_web_sm")
-    nlp_en = None
-
-# 한국어 형태소 분석기 초기화
-try:
-    korean_tokenizer = Okt()
-except Exception:
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import List, Dict, Set, Optional, Tuple
+
+# spaCy, KoNLPy(JVM), NLTK는 임포트만으로도 무거우므로
+# 처음 사용할 때 초기화한다. 서버는 warmup()/warmup_in_background()로 미리 데울 수 있다.
+_init_lock = threading.RLock()
+_UNSET = object()
+
+# NLTK 데이터를 찾지 못했을 때 사용하는 기본 불용어
+DEFAULT_ENGLISH_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'in', 'is', 'it',
+    'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with', 'the', 'this', 'but', 'they',
+    'have', 'had', 'what', 'said', 'each', 'which', 'she', 'do', 'how', 'their', 'if', 'up', 'out',
+    'many', 'then', 'them', 'these', 'so', 'some', 'her', 'would', 'make', 'like', 'into', 'him',
+    'time', 'two', 'more', 'very', 'when', 'come', 'may', 'its', 'only', 'think', 'now', 'work',
+    'life', 'also', 'way', 'after', 'back', 'other', 'well', 'get', 'through', 'new', 'year', 'could'
+}
+
+DEFAULT_KOREAN_STOPWORDS = {
+    '이', '그', '저', '것', '의', '가', '을', '를', '에', '와', '과', '도', '는', '은', '으로', '로', 
+    '에서', '부터', '까지', '이다', '있다', '없다', '하다', '되다', '같다', '다른', '많다', '적다',
+    '좋다', '나쁘다', '크다', '작다', '높다', '낮다', '그리고', '또는', '하지만', '그러나', '그래서',
+    '따라서', '즉', '또한', '예를 들어', '때문에', '위해', '아니다', '수', '개', '명', '번', '등',
+    '및', '또', '더', '가장', '매우', '정말', '아주', '너무', '조금', '약간', '거의', '완전히',
+    '전혀', '항상', '때로는', '가끔', '자주', '드물게', '언제나', '결코', '절대', '모든', '어떤',
+    '각각', '서로', '함께', '혼자', '다시', '새로', '이미', '아직', '계속', '다음', '이전', '현재',
+    '과거', '미래', '여기', '거기', '어디', '언제', '어떻게', '왜', '무엇', '누구', '얼마나'
+}
+
+nlp_en = _UNSET
+korean_tokenizer = _UNSET
+_stopwords = None
+
+def _ensure_nltk_data():
+    """NLTK 데이터 확인 (없으면 다운로드)"""
+    import nltk
     try:
-        korean_tokenizer = Mecab()
-    except Exception:
-        korean_tokenizer = None
-        print("Korean tokenizer not available. Install KoNLPy: pip install konlpy")
-
-# NLTK 불용어 로드
-try:
-    ENGLISH_STOPWORDS = set(stopwords.words('english'))
-    KOREAN_STOPWORDS = set(stopwords.words('korean')) if 'korean' in stopwords.fileids() else set()
-except:
-    ENGLISH_STOPWORDS = {
-        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'in', 'is', 'it',
-        'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will', 'with', 'the', 'this', 'but', 'they',
-        'have', 'had', 'what', 'said', 'each', 'which', 'she', 'do', 'how', 'their', 'if', 'up', 'out',
-        'many', 'then', 'them', 'these', 'so', 'some', 'her', 'would', 'make', 'like', 'into', 'him',
-        'time', 'two', 'more', 'very', 'when', 'come', 'may', 'its', 'only', 'think', 'now', 'work',
-        'life', 'also', 'way', 'after', 'back', 'other', 'well', 'get', 'through', 'new', 'year', 'could'
-    }
-    KOREAN_STOPWORDS = {
-        '이', '그', '저', '것', '의', '가', '을', '를', '에', '와', '과', '도', '는', '은', '으로', '로', 
-        '에서', '부터', '까지', '이다', '있다', '없다', '하다', '되다', '같다', '다른', '많다', '적다',
-        '좋다', '나쁘다', '크다', '작다', '높다', '낮다', '그리고', '또는', '하지만', '그러나', '그래서',
-        '따라서', '즉', '또한', '예를 들어', '때문에', '위해', '아니다', '수', '개', '명', '번', '등',
-        '및', '또', '더', '가장', '매우', '정말', '아주', '너무', '조금', '약간', '거의', '완전히',
-        '전혀', '항상', '때로는', '가끔', '자주', '드물게', '언제나', '결코', '절대', '모든', '어떤',
-        '각각', '서로', '함께', '혼자', '다시', '새로', '이미', '아직', '계속', '다음', '이전', '현재',
-        '과거', '미래', '여기', '거기', '어디', '언제', '어떻게', '왜', '무엇', '누구', '얼마나'
-    }
+        nltk.data.find('tokenizers/punkt')
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('punkt')
+        nltk.download('stopwords')
 
-# 임베딩 모델 초기화 (전역)
-embedding_model = None
+def get_nlp_en():
+    """spaCy 영어 모델 싱글톤 (설치되지 않았으면 None)"""
+    global nlp_en
+    if nlp_en is _UNSET:
+        with _init_lock:
+            if nlp_en is _UNSET:
+                try:
+                    import spacy
+                    nlp_en = spacy.load("en_core_web_sm")
+                except (ImportError, OSError):
+                    print("spaCy English model not found. Install with: python -m spacy download en_core_web_sm")
+                    nlp_en = None
+    return nlp_en
 
-def get_embedding_model():
-    """임베딩 모델 싱글톤"""
-    global embedding_model
-    if embedding_model is None:
-        try:
-            embedding_model = SentenceTransformer('distiluse-base-multilingual-cased')
-        except Exception as e:
-            print(f"Embedding model load failed: {e}")
-            embedding_model = None
-    return embedding_model
+# 한국어 형태소 분석 백엔드 (KOREAN_TOKENIZER=auto|mecab|okt|regex)
+KOREAN_TOKENIZER = os.environ.get("KOREAN_TOKENIZER", "auto").lower()
+
+# 백엔드별 품사 태그를 Okt 태그 체계로 통일해 어떤 백엔드를 써도 같은 기준으로 키워드를 고른다
+SEJONG_TO_COMMON_POS = {
+    'NNG': 'Noun', 'NNP': 'Noun', 'NNB': 'Noun', 'NR': 'Noun', 'NP': 'Noun', 'XR': 'Noun',
+    'VV': 'Verb', 'VX': 'Verb',
+    'VA': 'Adjective',
+    'MAG': 'Adverb', 'MAJ': 'Adverb',
+    'SL': 'Alpha', 'SH': 'Alpha',
+    'SN': 'Number',
+}
+
+MEANINGFUL_KOREAN_POS = ('Noun', 'Verb', 'Adjective', 'Adverb', 'Alpha', 'Number')
+
+_KOREAN_BENCHMARK_TEXT = "유심 보호 서비스는 어떻게 신청하나요 요금제 변경과 해지 위약금도 알려주세요"
 
-# 임베딩 라이브러리
-import openai
+class KoreanTokenizerBackend:
+    """한국어 형태소 분석 백엔드 인터페이스: pos()는 (단어, 공통 품사) 목록을 반환"""
+    name = "base"
+    
+    def pos(self, text: str) -> List[Tuple[str, str]]:
+        raise NotImplementedError
+
+class OktBackend(KoreanTokenizerBackend):
+    """KoNLPy Okt (JVM) - 어간 추출 결과를 그대로 사용"""
+    name = "okt"
+    
+    def __init__(self):
+        from konlpy.tag import Okt
+        self._okt = Okt()
+    
+    def pos(self, text: str) -> List[Tuple[str, str]]:
+        return self._okt.pos(text, stem=True)
+
+class MecabBackend(KoreanTokenizerBackend):
+    """KoNLPy Mecab - 세종 품사를 공통 품사로 바꾸고 용언은 Okt처럼 기본형('-다')으로 맞춘다"""
+    name = "mecab"
+    
+    def __init__(self):
+        from konlpy.tag import Mecab
+        self._mecab = Mecab()
+    
+    def pos(self, text: str) -> List[Tuple[str, str]]:
+        tagged = []
+        for word, tag in self._mecab.pos(text):
+            common = SEJONG_TO_COMMON_POS.get(tag.split('+')[0], 'Other')
+            if common in ('Verb', 'Adjective') and '+' not in tag:
+                word = word + '다'
+            tagged.append((word, common))
+        return tagged
+
+class RegexBackend(KoreanTokenizerBackend):
+    """외부 의존성 없는 대체 백엔드 - 어절에서 흔한 조사/어미를 떼어 명사로 취급"""
+    name = "regex"
+    
+    _SUFFIXES = sorted([
+        '으로는', '에서는', '에게서', '이에요', '인가요', '나요', '해요', '세요', '습니다', '입니다',
+        '으로', '에서', '에게', '까지', '부터', '처럼', '보다', '하고', '이랑', '라고', '는데', '은데',
+        '하는', '하면', '해서', '이고', '이나', '은', '는', '이', '가', '을', '를', '에', '의', '와',
+        '과', '도', '만', '로', '요',
+    ], key=len, reverse=True)
+    _TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+|\d+')
+    
+    def pos(self, text: str) -> List[Tuple[str, str]]:
+        tagged = []
+        for token in self._TOKEN_PATTERN.findall(text):
+            if token.isdigit():
+                tagged.append((token, 'Number'))
+            elif token.isascii():
+                tagged.append((token, 'Alpha'))
+            else:
+                for suffix in self._SUFFIXES:
+                    if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+                        token = token[:-len(suffix)]
+                        break
+                tagged.append((token, 'Noun'))
+        return tagged
 
-# OpenAI 클라이언트 초기화
-openai_client = None
+KOREAN_TOKENIZER_BACKENDS = {
+    'mecab': MecabBackend,
+    'okt': OktBackend,
+    'regex': RegexBackend,
+}
 
-def get_openai_client():
-    """OpenAI 클라이언트 싱글톤"""
-    global openai_client
-    if openai_client is None:
+def _available_korean_backends(names: List[str]) -> Dict[str, KoreanTokenizerBackend]:
+    backends = {}
+    for name in names:
         try:
-            openai_client = openai.OpenAI()  # API 키는 환경변수에서 자동 로드
+            backends[name] = KOREAN_TOKENIZER_BACKENDS[name]()
         except Exception as e:
-            print(f"OpenAI client initialization failed: {e}")
-            openai_client = None
-    return openai_client
+            print(f"Korean tokenizer backend '{name}' unavailable: {e}")
+    return backends
+
+def _benchmark_korean_backend(backend: KoreanTokenizerBackend, text: str = _KOREAN_BENCHMARK_TEXT,
+                              repeat: int = 5) -> float:
+    """문장 하나를 repeat번 분석하는 데 걸린 평균 시간(초) - 첫 호출(JVM/사전 초기화)은 제외"""
+    backend.pos(text)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        backend.pos(text)
+    return (time.perf_counter() - start) / repeat
+
+def select_korean_tokenizer(preference: str = KOREAN_TOKENIZER) -> KoreanTokenizerBackend:
+    """설치된 형태소 분석기 중 가장 빠른 백엔드 선택 (형태소 분석기가 없으면 regex 대체 백엔드)"""
+    if preference in KOREAN_TOKENIZER_BACKENDS:
+        backends = _available_korean_backends([preference])
+        if preference in backends:
+            return backends[preference]
+        print(f"Requested Korean tokenizer '{preference}' unavailable, falling back to auto selection")
+    
+    # regex는 항상 가장 빠르지만 정확도가 낮으므로 형태소 분석기가 없을 때만 사용
+    backends = _available_korean_backends(['mecab', 'okt'])
+    if not backends:
+        print("Korean tokenizer not available. Install KoNLPy: pip install konlpy (using regex fallback)")
+        return RegexBackend()
+    if len(backends) == 1:
+        return next(iter(backends.values()))
+    
+    timings = {name: _benchmark_korean_backend(backend) for name, backend in backends.items()}
+    selected = min(timings, key=timings.get)
+    print(f"Korean tokenizer selected: {selected} ({', '.join(f'{n}={t * 1000:.1f}ms' for n, t in timings.items())})")
+    return backends[selected]
+
+def get_korean_tokenizer() -> KoreanTokenizerBackend:
+    """한국어 형태소 분석 백엔드 싱글톤"""
+    global korean_tokenizer
+    if korean_tokenizer is _UNSET:
+        with _init_lock:
+            if korean_tokenizer is _UNSET:
+                korean_tokenizer = select_korean_tokenizer()
+    return korean_tokenizer
+
+def compare_korean_tokenizers(samples: List[str], reference: str = 'okt') -> Dict[str, Dict]:
+    """설치된 백엔드별 처리량(문장/초)과 기준 백엔드 대비 키워드 일치도(Jaccard 평균) 비교 보고"""
+    backends = _available_korean_backends(list(KOREAN_TOKENIZER_BACKENDS))
+    korean_stopwords = get_stopwords()[1]
+    
+    def keywords(backend, text):
+        return {word for word, pos in backend.pos(text)
+                if pos in MEANINGFUL_KOREAN_POS and len(word) >= 2 and word not in korean_stopwords}
+    
+    outputs = {}
+    report = {}
+    for name, backend in backends.items():
+        backend.pos(samples[0] if samples else _KOREAN_BENCHMARK_TEXT)
+        start = time.perf_counter()
+        outputs[name] = [keywords(backend, text) for text in samples]
+        elapsed = time.perf_counter() - start
+        report[name] = {'sentences_per_sec': len(samples) / elapsed if elapsed > 0 else float('inf')}
+    
+    if reference in outputs:
+        for name, results in outputs.items():
+            scores = [len(a & b) / len(a | b) if (a | b) else 1.0 for a, b in zip(results, outputs[reference])]
+            report[name]['agreement_with_' + reference] = sum(scores) / len(scores) if scores else 1.0
+    
+    for name, row in report.items():
+        print(f"[{name}] " + ", ".join(f"{k}={v:.3f}" for k, v in row.items()))
+    return report
+
+def get_stopwords():
+    """(영어 불용어, 한국어 불용어) - NLTK 불용어가 있으면 사용"""
+    global _stopwords
+    if _stopwords is None:
+        with _init_lock:
+            if _stopwords is None:
+                try:
+                    _ensure_nltk_data()
+                    from nltk.corpus import stopwords
+                    _stopwords = (
+                        set(stopwords.words('english')),
+                        set(stopwords.words('korean')) if 'korean' in stopwords.fileids() else set(),
+                    )
+                except Exception:
+                    _stopwords = (DEFAULT_ENGLISH_STOPWORDS, DEFAULT_KOREAN_STOPWORDS)
+    return _stopwords
+
+# 비즈니스 카테고리 사전 (순서가 우선순위)
+BUSINESS_CATEGORIES = {
+    '제품/서비스': ['제품', '서비스', '상품', '솔루션', '기능', '특징', '가격', '비용', '요금', 'product', 'service', 'price'],
+    '고객지원': ['문의', '질문', '도움', '지원', '상담', '문제', '해결', '답변', '설명', 'help', 'support', 'question'],
+    '주문/결제': ['주문', '구매', '결제', '카드', '계좌', '배송', '주소', '수량', '할인', 'order', 'payment', 'buy'],
+    '기술/기능': ['사용법', '설정', '설치', '연결', '로그인', '계정', '비밀번호', '업데이트', 'install', 'setup', 'login'],
+    '정책/약관': ['정책', '약관', '규정', '조건', '환불', '취소', '교환', '보증', '개인정보', 'policy', 'terms', 'refund']
+}
+
+# 질문 의도 패턴 (순서가 우선순위)
+INTENT_PATTERNS = {
+    '정보요청': ['무엇', '어떤', '어떻게', '언제', '어디서', '왜', '설명', '알려', 'what', 'how', 'when', 'where', 'why'],
+    '문제해결': ['문제', '오류', '안됨', '작동', '해결', '고장', '버그', 'problem', 'error', 'fix', 'broken'],
+    '구매의도': ['구매', '사고싶', '주문', '결제', '가격', '할인', '비용', 'buy', 'purchase', 'order', 'price'],
+    '불만/개선': ['불만', '개선', '문제', '이상', '잘못', '실망', 'complaint', 'improve', 'wrong', 'disappointed']
+}
+
+class LexiconMatcher:
+    """레이블별 단어 목록을 Aho-Corasick 오토마톤으로 컴파일해 텍스트 한 번 순회로 포함된 레이블을 찾는 매처"""
+    
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        self.labels = list(lexicon.keys())
+        priority = {label: i for i, label in enumerate(self.labels)}
+        
+        # 트라이 구성: 노드별 전이, 실패 링크, 출력(레이블 우선순위 집합)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+        for label, words in lexicon.items():
+            for word in words:
+                node = 0
+                for char in word:
+                    if char not in self._goto[node]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append(set())
+                        self._goto[node][char] = len(self._goto) - 1
+                    node = self._goto[node][char]
+                self._output[node].add(priority[label])
+        
+        # BFS로 실패 링크 계산
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fallback = self._fail[node]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+    
+    def match_all(self, text: str) -> List[str]:
+        """텍스트에 단어가 하나라도 포함된 레이블을 우선순위 순으로 반환"""
+        found: Set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found |= self._output[node]
+        return [self.labels[i] for i in sorted(found)]
+    
+    def first_match(self, text: str) -> Optional[str]:
+        """우선순위가 가장 높은 레이블 (없으면 None)"""
+        matches = self.match_all(text)
+        return matches[0] if matches else None
+
+# 형태소 분석 결과 캐시 설정 (KEYWORD_CACHE_PATH를 지정하면 디스크에도 저장해 재시작 후에도 재사용)
+KEYWORD_CACHE_SIZE = int(os.environ.get("KEYWORD_CACHE_SIZE", "4096"))
+KEYWORD_CACHE_PATH = os.environ.get("KEYWORD_CACHE_PATH")
+
+class KeywordCache:
+    """정규화한 텍스트를 키로 핵심 키워드 추출 결과를 보관하는 LRU 캐시 (선택적으로 shelve 디스크 계층)"""
+    
+    def __init__(self, max_entries: int = KEYWORD_CACHE_SIZE, path: Optional[str] = KEYWORD_CACHE_PATH):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._shelf = None
+        if path:
+            try:
+                self._shelf = shelve.open(path)
+                atexit.register(self.close)
+            except Exception as e:
+                print(f"Keyword cache shelf open failed: {e}")
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', text).strip().lower()
+    
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(self._entries[key])
+            if self._shelf is not None and key in self._shelf:
+                value = self._shelf[key]
+                self._remember(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return list(value)
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, value: List[str]):
+        with self._lock:
+            self._remember(key, list(value))
+            if self._shelf is not None:
+                self._shelf[key] = list(value)
+    
+    def _remember(self, key: str, value: List[str]):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'persistent': self._shelf is not None,
+        }
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+            if self._shelf is not None:
+                self._shelf.clear()
+    
+    def close(self):
+        with self._lock:
+            if self._shelf is not None:
+                self._shelf.close()
+                self._shelf = None
+
+keyword_cache = KeywordCache()
 
 class AdvancedTokenizer:
     """고급 토크나이저 - 라이브러리 기반 형태소 분석 및 핵심 단어 추출"""
     
-    def __init__(self):
-        self.korean_tokenizer = korean_tokenizer
-        self.english_stopwords = ENGLISH_STOPWORDS
-        self.korean_stopwords = KOREAN_STOPWORDS
-        self.nlp_en = nlp_en
-        
+    @property
+    def korean_tokenizer(self):
+        return get_korean_tokenizer()
+    
+    @property
+    def nlp_en(self):
+        return get_nlp_en()
+    
+    @property
+    def english_stopwords(self) -> Set[str]:
+        return get_stopwords()[0]
+    
+    @property
+    def korean_stopwords(self) -> Set[str]:
+        return get_stopwords()[1]
+    
     def korean_morphological_analysis(self, text: str) -> List[str]:
         """한국어 형태소 분석하여 핵심 단어만 추출"""
         if not self.korean_tokenizer:
             return text.split()
             
         try:
-            pos_tags = self.korean_tokenizer.pos(text, stem=True)
-            meaningful_pos = ['Noun', 'Verb', 'Adjective', 'Adverb', 'Alpha', 'Number']
+            pos_tags = self.korean_tokenizer.pos(text)
             
             keywords = []
             for word, pos in pos_tags:
-                if (pos in meaningful_pos and 
+                if (pos in MEANINGFUL_KOREAN_POS and 
                     len(word) >= 2 and 
                     word not in self.korean_stopwords):
                     keywords.append(word)
@@ -128,63 +435,149 @@ class AdvancedTokenizer:
         """영어 형태소 분석하여 핵심 단어만 추출"""
         try:
             if self.nlp_en:
-                doc = self.nlp_en(text)
-                keywords = []
-                for token in doc:
-                    if (not token.is_stop and 
-                        not token.is_punct and 
-                        not token.is_space and
-                        token.pos_ in ['NOUN', 'VERB', 'ADJ', 'ADV'] and
-                        len(token.lemma_) >= 2):
-                        keywords.append(token.lemma_.lower())
-                return keywords
+                return self._english_keywords_from_doc(self.nlp_en(text))
             else:
+                english_stopwords = self.english_stopwords  # NLTK 데이터 확인 포함
+                from nltk.tokenize import word_tokenize
                 tokens = word_tokenize(text.lower())
                 return [word for word in tokens 
-                       if word not in self.english_stopwords 
+                       if word not in english_stopwords 
                        and len(word) >= 2 
                        and word.isalpha()]
         except Exception as e:
             print(f"English tokenization error: {e}")
             return text.split()
     
+    @staticmethod
+    def _english_keywords_from_doc(doc) -> List[str]:
+        keywords = []
+        for token in doc:
+            if (not token.is_stop and 
+                not token.is_punct and 
+                not token.is_space and
+                token.pos_ in ['NOUN', 'VERB', 'ADJ', 'ADV'] and
+                len(token.lemma_) >= 2):
+                keywords.append(token.lemma_.lower())
+        return keywords
+    
     def extract_core_keywords(self, text: str) -> List[str]:
-        """텍스트에서 핵심 키워드만 추출"""
+        """텍스트에서 핵심 키워드만 추출 (공백/대소문자 정규화 텍스트 기준으로 캐시)"""
+        cache_key = self._cache_key(text)
+        cached = keyword_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        keywords = self._extract_core_keywords(text)
+        keyword_cache.put(cache_key, keywords)
+        return keywords
+    
+    @staticmethod
+    def _split_scripts(text: str):
+        """텍스트를 한국어 문장 / 영어 문장으로 분리 (해당 문자가 없으면 None)"""
         korean_text = re.findall(r'[가-힣]+', text)
         english_text = re.findall(r'[a-zA-Z]+', text)
-        
+        return (' '.join(korean_text) if korean_text else None,
+                ' '.join(english_text) if english_text else None)
+    
+    @staticmethod
+    def _merge_keywords(text: str, korean_keywords: List[str], english_keywords: List[str]) -> List[str]:
         keywords = []
+        keywords.extend(korean_keywords)
+        keywords.extend(english_keywords)
+        keywords.extend(re.findall(r'\d+', text))
+        return list(set(keywords))
+    
+    def _cache_key(self, text: str) -> str:
+        # 백엔드마다 결과가 조금씩 다르므로 디스크 캐시가 섞이지 않도록 백엔드 이름을 키에 포함
+        return f"{self.korean_tokenizer.name}:{KeywordCache.normalize(text)}"
+    
+    def _extract_core_keywords(self, text: str) -> List[str]:
+        korean_sentence, english_sentence = self._split_scripts(text)
+        korean_keywords = self.korean_morphological_analysis(korean_sentence) if korean_sentence else []
+        english_keywords = self.english_morphological_analysis(english_sentence) if english_sentence else []
+        return self._merge_keywords(text, korean_keywords, english_keywords)
+    
+    def extract_core_keywords_batch(self, texts: List[str], batch_size: int = 256,
+                                    n_process: int = 1) -> List[List[str]]:
+        """여러 텍스트의 핵심 키워드를 한 번에 추출 (extract_core_keywords와 같은 결과)
         
-        if korean_text:
-            korean_sentence = ' '.join(korean_text)
-            korean_keywords = self.korean_morphological_analysis(korean_sentence)
-            keywords.extend(korean_keywords)
+        배치 처리(batch_size/n_process)는 영어(spaCy nlp.pipe)에만 적용된다. 한국어 형태소 분석기에는
+        배치 API가 없으므로 중복을 제거한 문장을 하나씩 분석한다.
+        """
+        results: List[Optional[List[str]]] = [None] * len(texts)
         
-        if english_text:
-            english_sentence = ' '.join(english_text)
-            english_keywords = self.english_morphological_analysis(english_sentence)
-            keywords.extend(english_keywords)
+        # 캐시에 없는 텍스트만 정규화 키 기준으로 한 번씩 분석
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            cache_key = self._cache_key(text)
+            if cache_key in pending:
+                pending[cache_key].append(i)
+                continue
+            cached = keyword_cache.get(cache_key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[cache_key] = [i]
+        if not pending:
+            return results
         
-        numbers = re.findall(r'\d+', text)
-        keywords.extend(numbers)
+        sources = [texts[indices[0]] for indices in pending.values()]
+        split = [self._split_scripts(text) for text in sources]
         
-        return list(set(keywords))
+        # 한국어: 문장 경계를 넘어 품사가 바뀌지 않도록 중복 없는 문장마다 한 번씩 호출
+        unique_korean = list(dict.fromkeys(k for k, _ in split if k))
+        korean_results = {sentence: self.korean_morphological_analysis(sentence) for sentence in unique_korean}
+        
+        # 영어: spaCy nlp.pipe로 배치 처리
+        unique_english = list(dict.fromkeys(e for _, e in split if e))
+        english_results: Dict[str, List[str]] = {}
+        if unique_english and self.nlp_en:
+            try:
+                docs = self.nlp_en.pipe(unique_english, batch_size=batch_size, n_process=n_process)
+                for sentence, doc in zip(unique_english, docs):
+                    english_results[sentence] = self._english_keywords_from_doc(doc)
+            except Exception as e:
+                print(f"English batch tokenization error: {e}")
+                english_results.clear()
+        for sentence in unique_english:
+            if sentence not in english_results:
+                english_results[sentence] = self.english_morphological_analysis(sentence)
+        
+        for (cache_key, indices), text, (korean_sentence, english_sentence) in zip(pending.items(), sources, split):
+            keywords = self._merge_keywords(
+                text,
+                korean_results[korean_sentence] if korean_sentence else [],
+                english_results[english_sentence] if english_sentence else [],
+            )
+            keyword_cache.put(cache_key, keywords)
+            for i in indices:
+                results[i] = list(keywords)
+        
+        return results
 
 class KeywordAnalyzer:
     """사용자 질문에서 키워드를 추출하고 분석하는 클래스"""
     
     def __init__(self):
         self.tokenizer = AdvancedTokenizer()
+        # 카테고리/의도 사전은 생성 시 한 번만 컴파일
+        self.category_matcher = LexiconMatcher(BUSINESS_CATEGORIES)
+        self.intent_matcher = LexiconMatcher(INTENT_PATTERNS)
         
     def preprocess_text(self, text: str) -> str:
         """텍스트 전처리"""
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
     
-    def extract_keywords(self, text: str, min_length: int = 2, max_keywords: int = 10) -> List[Dict]:
-        """라이브러리 기반 키워드 추출 및 빈도 분석"""
-        processed_text = self.preprocess_text(text)
-        core_keywords = self.tokenizer.extract_core_keywords(processed_text)
+    def tokenize(self, text: str) -> List[str]:
+        """전처리 후 형태소 분석 (질문 하나당 한 번만 호출하고 결과를 재사용)"""
+        return self.tokenizer.extract_core_keywords(self.preprocess_text(text))
+    
+    def extract_keywords(self, text: str, min_length: int = 2, max_keywords: int = 10,
+                         core_keywords: Optional[List[str]] = None) -> List[Dict]:
+        """라이브러리 기반 키워드 추출 및 빈도 분석 (core_keywords가 있으면 형태소 분석 생략)"""
+        if core_keywords is None:
+            core_keywords = self.tokenize(text)
         filtered_keywords = [word for word in core_keywords if len(word) >= min_length]
         
         word_counts = Counter(filtered_keywords)
@@ -202,9 +595,21 @@ class KeywordAnalyzer:
         
         return keywords_info
     
-    def transform_query_to_keywords(self, query: str) -> str:
+    def extract_keywords_batch(self, texts: List[str], min_length: int = 2, max_keywords: int = 10,
+                               batch_size: int = 256, n_process: int = 1) -> List[List[Dict]]:
+        """대화 로그 재분석용 배치 키워드 추출 (텍스트별 결과는 extract_keywords와 동일, 배치 처리는 영어에만 적용)"""
+        processed_texts = [self.preprocess_text(text) for text in texts]
+        core_keywords_list = self.tokenizer.extract_core_keywords_batch(
+            processed_texts, batch_size=batch_size, n_process=n_process
+        )
+        return [
+            self.extract_keywords(text, min_length=min_length, max_keywords=max_keywords, core_keywords=core_keywords)
+            for text, core_keywords in zip(processed_texts, core_keywords_list)
+        ]
+    
+    def transform_query_to_keywords(self, query: str, core_keywords: Optional[List[str]] = None) -> str:
         """쿼리를 핵심 키워드만으로 변환"""
-        keywords_info = self.extract_keywords(query, min_length=1, max_keywords=20)
+        keywords_info = self.extract_keywords(query, min_length=1, max_keywords=20, core_keywords=core_keywords)
         core_keywords = [item['keyword'] for item in keywords_info]
         transformed_query = ' '.join(core_keywords)
         
@@ -213,58 +618,91 @@ class KeywordAnalyzer:
         
         return transformed_query
     
-    def categorize_keywords(self, keywords: List[Dict], categories: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
-        """키워드를 카테고리별로 분류"""
+    def categorize_keywords(self, keywords: List[Dict], categories: Dict[str, List[str]] = None) -> Dict[str, List[Dict]]:
+        """키워드를 카테고리별로 분류 (카테고리 단어가 키워드에 포함되면 해당 카테고리, 앞선 카테고리 우선)"""
+        if categories is None or categories is BUSINESS_CATEGORIES:
+            categories = BUSINESS_CATEGORIES
+            matcher = self.category_matcher
+        else:
+            matcher = LexiconMatcher(categories)
+        
         categorized = {category: [] for category in categories.keys()}
         categorized['기타'] = []
         
         for keyword_info in keywords:
-            keyword = keyword_info['keyword']
-            categorized_flag = False
-            
-            for category, category_words in categories.items():
-                if keyword in category_words or any(cat_word in keyword for cat_word in category_words):
-                    categorized[category].append(keyword_info)
-                    categorized_flag = True
-                    break
-            
-            if not categorized_flag:
-                categorized['기타'].append(keyword_info)
+            category = matcher.first_match(keyword_info['keyword'])
+            categorized[category or '기타'].append(keyword_info)
         
         return categorized
+    
+    def detect_intent(self, text: str) -> str:
+        """텍스트에 포함된 패턴으로 질문 의도 판별 (앞선 의도 우선, 없으면 일반문의)"""
+        return self.intent_matcher.first_match(text) or '일반문의'
+
+# 프로세스 전역 분석기
+_keyword_analyzer: Optional[KeywordAnalyzer] = None
+
+def get_keyword_analyzer() -> KeywordAnalyzer:
+    """키워드 분석기 싱글톤"""
+    global _keyword_analyzer
+    if _keyword_analyzer is None:
+        _keyword_analyzer = KeywordAnalyzer()
+    return _keyword_analyzer
+
+def warmup(include_embedding: bool = False) -> Dict[str, float]:
+    """형태소 분석기/spaCy/NLTK를 미리 초기화하고 단계별 소요 시간(초)을 반환"""
+    steps = [
+        ('stopwords', get_stopwords),
+        ('spacy', get_nlp_en),
+        ('korean_tokenizer', get_korean_tokenizer),
+        # 첫 호출에서 JVM/모델 내부 초기화가 끝나도록 실제 분석을 한 번 수행
+        ('analyzer', lambda: get_keyword_analyzer().tokenizer._extract_core_keywords("요금제 문의 price")),
+    ]
+    if include_embedding:
+        from utils.embedders import get_embedder
+        steps.append(('embedder', get_embedder))
+    
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Keyword analyzer warmup failed ({name}): {e}")
+        timings[name] = round(time.perf_counter() - start, 3)
+    print(f"Keyword analyzer warmup: {timings}")
+    return timings
+
+def warmup_in_background(include_embedding: bool = False) -> threading.Thread:
+    """그래프 임포트/서버 시작을 막지 않도록 백그라운드 스레드에서 warmup"""
+    thread = threading.Thread(target=warmup, args=(include_embedding,), daemon=True, name="keyword-warmup")
+    thread.start()
+    return thread
+
+def warmup_from_env() -> Optional[threading.Thread]:
+    """KEYWORD_ANALYZER_WARMUP 환경변수가 켜져 있으면(기본값) 백그라운드 warmup 시작"""
+    if os.environ.get("KEYWORD_ANALYZER_WARMUP", "1").lower() in ("0", "false", "no"):
+        return None
+    # 로컬 임베딩 백엔드는 모델 로딩이 오래 걸리므로 함께 데운다
+    from utils.embedders import EMBEDDING_BACKEND
+    return warmup_in_background(include_embedding=EMBEDDING_BACKEND == "local")
 
 async def analyze_user_query_keywords(query: str, company_id: str = None) -> Dict:
     """사용자 질문의 키워드를 분석하고 의도를 파악"""
-    analyzer = KeywordAnalyzer()
-    
-    keywords = analyzer.extract_keywords(query)
-    transformed_query = analyzer.transform_query_to_keywords(query)
-    
-    business_categories = {
-        '제품/서비스': ['제품', '서비스', '상품', '솔루션', '기능', '특징', '가격', '비용', '요금', 'product', 'service', 'price'],
-        '고객지원': ['문의', '질문', '도움', '지원', '상담', '문제', '해결', '답변', '설명', 'help', 'support', 'question'],
-        '주문/결제': ['주문', '구매', '결제', '카드', '계좌', '배송', '주소', '수량', '할인', 'order', 'payment', 'buy'],
-        '기술/기능': ['사용법', '설정', '설치', '연결', '로그인', '계정', '비밀번호', '업데이트', 'install', 'setup', 'login'],
-        '정책/약관': ['정책', '약관', '규정', '조건', '환불', '취소', '교환', '보증', '개인정보', 'policy', 'terms', 'refund']
-    }
-    
-    categorized_keywords = analyzer.categorize_keywords(keywords, business_categories)
+    analyzer = get_keyword_analyzer()
     
-    intent_patterns = {
-        '정보요청': ['무엇', '어떤', '어떻게', '언제', '어디서', '왜', '설명', '알려', 'what', 'how', 'when', 'where', 'why'],
-        '문제해결': ['문제', '오류', '안됨', '작동', '해결', '고장', '버그', 'problem', 'error', 'fix', 'broken'],
-        '구매의도': ['구매', '사고싶', '주문', '결제', '가격', '할인', '비용', 'buy', 'purchase', 'order', 'price'],
-        '불만/개선': ['불만', '개선', '문제', '이상', '잘못', '실망', 'complaint', 'improve', 'wrong', 'disappointed']
-    }
+    # 형태소 분석은 한 번만 하고 상위 키워드/변환 쿼리는 같은 토큰 목록에서 계산
+    # (JVM/spaCy 호출이 이벤트 루프를 막지 않도록 스레드에서 실행해 메모리 조회/임베딩 요청과 겹치게 한다)
+    core_keywords = await asyncio.to_thread(analyzer.tokenize, query)
+    keywords = analyzer.extract_keywords(query, core_keywords=core_keywords)
+    transformed_query = analyzer.transform_query_to_keywords(query, core_keywords=core_keywords)
     
-    detected_intent = '일반문의'
-    for intent, patterns in intent_patterns.items():
-        if any(pattern in transformed_query for pattern in patterns):
-            detected_intent = intent
-            break
+    categorized_keywords = analyzer.categorize_keywords(keywords)
+    detected_intent = analyzer.detect_intent(transformed_query)
     
     return {
         'raw_query': query,
+        'core_keywords': core_keywords,
         'transformed_query': transformed_query,
         'total_keywords': len(keywords),
         'top_keywords': keywords[:5],
@@ -274,182 +712,416 @@ async def analyze_user_query_keywords(query: str, company_id: str = None) -> Dic
         'complexity_score': len(keywords) * 0.1 + len(query.split()) * 0.05
     }
 
-async def preprocess_and_search_neo4j(original_query: str, transformed_query: str, neo4j_search) -> List[Dict]:
-    """키워드 기반 Neo4j 풀텍스트 검색"""
+# 검색 Cypher (파라미터만 바꿔 실행해 Neo4j 쿼리 플랜 캐시를 재사용)
+FULLTEXT_SEARCH_QUERY = """
+CALL db.index.fulltext.queryNodes('knowledge_search', $query)
+YIELD node, score 
+WHERE score > 0.3
+RETURN elementId(node) as node_id,
+       node.content as content, 
+       node.title as title, 
+       score 
+ORDER BY score DESC 
+LIMIT 3
+"""
+
+VECTOR_SEARCH_QUERY = """
+CALL db.index.vector.queryNodes('embedding_index', $limit, $queryEmbedding)
+YIELD node, score
+RETURN elementId(node) as node_id,
+       node.content as content, 
+       node.title as title, 
+       score
+ORDER BY score DESC
+"""
+
+async def preprocess_and_search_neo4j(original_query: str, transformed_query: str, neo4j_search,
+                                      core_keywords: Optional[List[str]] = None) -> List[Dict]:
+    """키워드 기반 Neo4j 풀텍스트 검색 (core_keywords가 있으면 형태소 분석을 다시 하지 않는다)
+    
+    결과가 없거나 검색이 실패하면 neo4j_search의 대체 검색 결과를 반환한다.
+    """
     try:
-        # 키워드 추출
-        analyzer = KeywordAnalyzer()
-        keywords_info = analyzer.extract_keywords(transformed_query, min_length=2, max_keywords=10)
+        search_results = await _fulltext_search(original_query, transformed_query, core_keywords)
+    except Exception as e:
+        print(f"Neo4j fulltext search error: {e}")
+        search_results = []
+    return search_results if search_results else await neo4j_search.async_hybrid_search(original_query, {})
+
+async def _fulltext_search(original_query: str, transformed_query: str,
+                           core_keywords: Optional[List[str]] = None) -> List[Dict]:
+    """풀텍스트 검색 레그 (대체 검색 없이 결과가 없으면 빈 목록, 실패하면 예외를 그대로 전달)"""
+    # 키워드 추출
+    analyzer = get_keyword_analyzer()
+    if core_keywords is not None:
+        keywords_info = analyzer.extract_keywords(transformed_query, 2, 10, core_keywords=core_keywords)
+    else:
+        # 형태소 분석이 이벤트 루프를 막아 벡터 레그와 겹치지 못하는 일이 없도록 스레드에서 실행
+        keywords_info = await asyncio.to_thread(analyzer.extract_keywords, transformed_query, 2, 10)
+    
+    excluded_words = {'어떻다', '되다', '있다', '하다', '이다', '같다', '보다', '말하다'}
+    keywords = [k['keyword'] for k in keywords_info 
+               if k['keyword'] not in excluded_words and len(k['keyword']) >= 2]
+    
+    # 원본 쿼리에서 직접 키워드 추출 + 동의어 매핑
+    if len(keywords) < 2:
+        direct_keywords = []
+        # 심카드/유심 동의어 처리
+        if '심카드' in original_query or '유심' in original_query:
+            direct_keywords.extend(['유심', '심카드'])
+        if '유출' in original_query:
+            direct_keywords.append('유출')
+        if '사건' in original_query or '사태' in original_query:
+            direct_keywords.extend(['사건', '사태'])
+        if '해킹' in original_query:
+            direct_keywords.extend(['해킹', '침입'])
+        keywords.extend(direct_keywords)
+    
+    # 동의어 확장
+    synonym_map = {
+        '심카드': ['유심', '심카드', 'USIM', 'SIM'],
+        '유심': ['유심', '심카드', 'USIM', 'SIM'],
+        '사건': ['사건', '사태', '문제'],
+        '해킹': ['해킹', '침입', '탈취']
+    }
+    
+    expanded_keywords = []
+    for keyword in keywords:
+        if keyword in synonym_map:
+            expanded_keywords.extend(synonym_map[keyword])
+        else:
+            expanded_keywords.append(keyword)
+    
+    keywords = list(set(expanded_keywords))  # 중복 제거
+    
+    if not keywords:
+        return []
+    
+    # 검색 쿼리 생성 - 공백으로 분리 (Neo4j 풀텍스트는 기본적으로 OR 처리)
+    search_query = " ".join(keywords[:3])  # 상위 3개 키워드만
+    print(f"Neo4j fulltext search query: {search_query}")
+    
+    from utils.neo4j_pool import run_query
+    records = await run_query(FULLTEXT_SEARCH_QUERY, {"query": search_query})
+    
+    search_results = []
+    for record in records:
+        content = record.get('content', '')
+        if content and content.strip():
+            search_results.append({
+                'node_id': record.get('node_id'),
+                'content': content,
+                'title': record.get('title', ''),
+                'score': record.get('score', 0.0)
+            })
+    
+    print(f"Found {len(search_results)} fulltext results")
+    return search_results
+
+# 질문 임베딩 캐시 설정 (EMBEDDING_CACHE_PATH를 지정하면 SQLite에도 저장)
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH")
+EMBEDDING_CACHE_TTL_SEC = float(os.environ.get("EMBEDDING_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_MAX_ROWS = int(os.environ.get("EMBEDDING_CACHE_MAX_ROWS", "100000"))
+
+class EmbeddingCache:
+    """(모델, 정규화 텍스트) 해시를 키로 하는 질문 임베딩 캐시 - 메모리 LRU + 선택적 SQLite(float32 BLOB) 계층"""
+    
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 ttl: float = EMBEDDING_CACHE_TTL_SEC, max_rows: int = EMBEDDING_CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "key TEXT PRIMARY KEY, model TEXT, created_at REAL, vector BLOB)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_created ON query_embeddings(created_at)")
+                self._db.commit()
+                atexit.register(self.close)
+            except Exception as e:
+                print(f"Embedding cache database open failed: {e}")
+                self._db = None
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{KeywordCache.normalize(text)}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[List[float]]:
+        now = time.time()
+        with self._lock:
+            vector = self._memory_get(key, now)
+            return vector if vector is not None else self._disk_get(key, now)
+    
+    async def aget(self, key: str) -> Optional[List[float]]:
+        """이벤트 루프용 조회: 메모리 계층은 바로 확인하고 SQLite 조회만 스레드에서 실행"""
+        now = time.time()
+        with self._lock:
+            vector = self._memory_get(key, now)
+            if vector is not None or self._db is None:
+                return vector if vector is not None else self._disk_get(key, now)
         
-        excluded_words = {'어떻다', '되다', '있다', '하다', '이다', '같다', '보다', '말하다'}
-        keywords = [k['keyword'] for k in keywords_info 
-                   if k['keyword'] not in excluded_words and len(k['keyword']) >= 2]
+        def disk_get():
+            with self._lock:
+                return self._disk_get(key, now)
         
-        # 원본 쿼리에서 직접 키워드 추출 + 동의어 매핑
-        if len(keywords) < 2:
-            direct_keywords = []
-            # 심카드/유심 동의어 처리
-            if '심카드' in original_query or '유심' in original_query:
-                direct_keywords.extend(['유심', '심카드'])
-            if '유출' in original_query:
-                direct_keywords.append('유출')
-            if '사건' in original_query or '사태' in original_query:
-                direct_keywords.extend(['사건', '사태'])
-            if '해킹' in original_query:
-                direct_keywords.extend(['해킹', '침입'])
-            keywords.extend(direct_keywords)
+        return await asyncio.to_thread(disk_get)
+    
+    def _memory_get(self, key: str, now: float) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, vector = entry
+        if now - created_at <= self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+        del self._entries[key]
+        self.expired += 1
+        return None
+    
+    def _disk_get(self, key: str, now: float) -> Optional[List[float]]:
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT created_at, vector FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                created_at, blob = row
+                if now - created_at <= self.ttl:
+                    vector = array.array('f', blob).tolist()
+                    self._remember(key, created_at, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+                self._db.execute("DELETE FROM query_embeddings WHERE key = ?", (key,))
+                self._db.commit()
+                self.expired += 1
         
-        # 동의어 확장
-        synonym_map = {
-            '심카드': ['유심', '심카드', 'USIM', 'SIM'],
-            '유심': ['유심', '심카드', 'USIM', 'SIM'],
-            '사건': ['사건', '사태', '문제'],
-            '해킹': ['해킹', '침입', '탈취']
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, model: str, vector: List[float]):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, model, created_at, vector) VALUES (?, ?, ?, ?)",
+                    (key, model, created_at, array.array('f', vector).tobytes())
+                )
+                # 행 수 상한을 넘으면 오래된 행부터 삭제
+                self._db.execute(
+                    "DELETE FROM query_embeddings WHERE key IN ("
+                    "SELECT key FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,)
+                )
+                self._db.commit()
+    
+    async def aput(self, key: str, model: str, vector: List[float]):
+        """이벤트 루프용 저장: SQLite 쓰기가 있으면 스레드에서 실행"""
+        if self._db is None:
+            self.put(key, model, vector)
+        else:
+            await asyncio.to_thread(self.put, key, model, vector)
+    
+    def _remember(self, key: str, created_at: float, vector: List[float]):
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        with self._lock:
+            rows = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0] if self._db is not None else 0
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'persistent_rows': rows,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': self.hits / total if total else 0.0,
         }
-        
-        expanded_keywords = []
-        for keyword in keywords:
-            if keyword in synonym_map:
-                expanded_keywords.extend(synonym_map[keyword])
-            else:
-                expanded_keywords.append(keyword)
-        
-        keywords = list(set(expanded_keywords))  # 중복 제거
-        
-        if not keywords:
-            return await neo4j_search.async_hybrid_search(original_query, {})
-        
-        # 검색 쿼리 생성 - 공백으로 분리 (Neo4j 풀텍스트는 기본적으로 OR 처리)
-        search_query = " ".join(keywords[:3])  # 상위 3개 키워드만
-        print(f"Neo4j fulltext search query: {search_query}")
-        
-        # 풀텍스트 검색 쿼리
-        cypher = """
-        CALL db.index.fulltext.queryNodes('knowledge_search', $query)
-        YIELD node, score 
-        WHERE score > 0.3
-        RETURN node.content as content, 
-               node.title as title, 
-               score 
-        ORDER BY score DESC 
-        LIMIT 3
-        """
-        
-        def execute_search():
-            with neo4j_search.graph.session() as session:
-                result = session.run(cypher, {"query": search_query})
-                return list(result)
-        
-        records = await asyncio.to_thread(execute_search)
-        
-        search_results = []
-        for record in records:
-            content = record.get('content', '')
-            if content and content.strip():
-                search_results.append({
-                    'content': content,
-                    'title': record.get('title', ''),
-                    'score': record.get('score', 0.0)
-                })
-        
-        print(f"Found {len(search_results)} fulltext results")
-        return search_results if search_results else await neo4j_search.async_hybrid_search(original_query, {})
-        
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.expired = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+query_embedding_cache = EmbeddingCache()
+
+async def embed_query(query: str) -> Optional[List[float]]:
+    """설정된 임베딩 백엔드(EMBEDDING_BACKEND)로 질문 벡터 생성 (캐시 우선, 백엔드를 만들 수 없으면 None)"""
+    from utils.embedders import get_embedder
+    try:
+        # 로컬 백엔드는 첫 호출에서 모델을 로딩하므로 이벤트 루프를 막지 않도록 스레드에서 가져온다
+        embedder = await asyncio.to_thread(get_embedder)
     except Exception as e:
-        print(f"Neo4j fulltext search error: {e}")
-        return await neo4j_search.async_hybrid_search(original_query, {})
+        print(f"Embedder initialization failed: {e}")
+        return None
+    
+    cache_key = EmbeddingCache.make_key(embedder.name, query)
+    cached = await query_embedding_cache.aget(cache_key)
+    if cached is not None:
+        return cached
+    
+    embedding = await embedder.embed_query(query)
+    await query_embedding_cache.aput(cache_key, embedder.name, embedding)
+    return embedding
 
-async def vector_search_neo4j(query: str, neo4j_search, limit: int = 3) -> List[Dict]:
-    """OpenAI 임베딩을 사용한 벡터 유사도 검색"""
+async def vector_search_neo4j(query: str, neo4j_search, limit: int = 3, query_embedding=None) -> List[Dict]:
+    """질문 임베딩을 사용한 벡터 유사도 검색 (query_embedding에 미리 시작한 임베딩 태스크를 넘길 수 있음)
+    
+    임베딩을 만들 수 없거나 검색이 실패하면 예외를 그대로 전달해 하이브리드 검색이 레그 실패로 기록하게 한다.
+    """
+    if query_embedding is None:
+        query_embedding = await embed_query(query)
+    elif asyncio.isfuture(query_embedding):
+        query_embedding = await query_embedding
+    if query_embedding is None:
+        raise RuntimeError("query embedding unavailable")
+    
+    from utils.neo4j_pool import run_query
+    records = await run_query(VECTOR_SEARCH_QUERY, {
+        "queryEmbedding": query_embedding,
+        "limit": limit
+    })
+    
+    return [{
+        'node_id': r.get('node_id'),
+        'content': r.get('content', ''),
+        'title': r.get('title', ''),
+        'score': r.get('score', 0.0)
+    } for r in records if r.get('content')]
+
+# 하이브리드 검색 레그별 제한 시간(초) - 느린 레그는 버리고 응답한 레그 결과만 사용
+HYBRID_LEG_TIMEOUTS = {
+    'fulltext': float(os.environ.get("HYBRID_FULLTEXT_TIMEOUT_SEC", "3")),
+    'vector': float(os.environ.get("HYBRID_VECTOR_TIMEOUT_SEC", "5")),
+}
+
+async def _run_search_leg(name: str, coro, timeout: float):
+    """검색 레그 하나를 제한 시간 안에 실행하고 (결과, 상태)를 반환 - 상태: ok | timeout | error"""
     try:
-        client = get_openai_client()
-        if not client:
-            return []
-        
-        # OpenAI 임베딩 생성
-        def create_embedding():
-            response = client.embeddings.create(
-                input=query,
-                model="text-embedding-3-small"
-            )
-            return response.data[0].embedding
-        
-        query_embedding = await asyncio.to_thread(create_embedding)
-        
-        # 벡터 검색 쿼리 (디버깅용 - 임계값 제거)
-        vector_cypher = """
-        CALL db.index.vector.queryNodes('embedding_index', $limit, $queryEmbedding)
-        YIELD node, score
-        RETURN node.content as content, 
-               node.title as title, 
-               score
-        ORDER BY score DESC
-        """
-        
-        def execute_vector_search():
-            with neo4j_search.graph.session() as session:
-                result = session.run(vector_cypher, {
-                    "queryEmbedding": query_embedding,
-                    "limit": limit
-                })
-                return list(result)
-        
-        records = await asyncio.to_thread(execute_vector_search)
-        
-        return [{
-            'content': r.get('content', ''),
-            'title': r.get('title', ''),
-            'score': r.get('score', 0.0)
-        } for r in records if r.get('content')]
-        
+        return await asyncio.wait_for(coro, timeout), 'ok'
+    except asyncio.TimeoutError:
+        print(f"Hybrid search {name} leg timed out after {timeout}s")
+        return [], 'timeout'
     except Exception as e:
-        print(f"Vector search error: {e}")
-        return []
+        print(f"Hybrid search {name} leg error: {e}")
+        return [], 'error'
+
+# 하이브리드 검색 결과 융합 설정 (HYBRID_FUSION=rrf|weighted)
+HYBRID_FUSION = os.environ.get("HYBRID_FUSION", "rrf").lower()
+HYBRID_LEG_WEIGHTS = {'fulltext': 1.0, 'vector': 0.8}
+RRF_K = 60
+
+def _result_key(result: Dict) -> str:
+    """노드 id 기준으로 중복 제거 (id가 없는 대체 검색 결과는 본문 기준)"""
+    return result.get('node_id') or result.get('content', '')
+
+def _fuse(result_lists: Dict[str, List[Dict]], leg_scores) -> List[Dict]:
+    """레그별 결과에 leg_scores(순위, 결과, 레그 결과 목록) 점수를 매겨 노드별로 합산하고 점수순 정렬"""
+    fused: Dict[str, Dict] = {}
+    for leg, results in result_lists.items():
+        for rank, result in enumerate(results, start=1):
+            key = _result_key(result)
+            if not key:
+                continue
+            contribution = leg_scores(leg, rank, result, results)
+            if key not in fused:
+                fused[key] = {**result, 'search_type': leg, 'legs': [leg], 'final_score': 0.0}
+            elif leg not in fused[key]['legs']:
+                fused[key]['legs'].append(leg)
+                fused[key]['search_type'] = 'hybrid'
+            fused[key]['final_score'] += contribution
+    return sorted(fused.values(), key=lambda x: x['final_score'], reverse=True)
 
-async def hybrid_search_neo4j(original_query: str, transformed_query: str, neo4j_search) -> List[Dict]:
-    """하이브리드 검색: 풀텍스트 + 벡터 검색"""
+def reciprocal_rank_fusion(result_lists: Dict[str, List[Dict]], weights: Dict[str, float] = None,
+                           k: int = RRF_K) -> List[Dict]:
+    """RRF: 레그별 점수 척도와 무관하게 순위만으로 합산 (weight / (k + rank))"""
+    weights = weights or {}
+    return _fuse(result_lists, lambda leg, rank, result, results: weights.get(leg, 1.0) / (k + rank))
+
+def weighted_score_fusion(result_lists: Dict[str, List[Dict]], weights: Dict[str, float] = None) -> List[Dict]:
+    """레그별로 점수를 min-max 정규화한 뒤 가중합 (Lucene 점수와 코사인 유사도를 같은 척도로 맞춤)"""
+    weights = weights or HYBRID_LEG_WEIGHTS
+    
+    def normalized(leg, rank, result, results):
+        scores = [r.get('score', 0.0) for r in results]
+        low, high = min(scores), max(scores)
+        norm = (result.get('score', 0.0) - low) / (high - low) if high > low else 1.0
+        return weights.get(leg, 1.0) * norm
+    
+    return _fuse(result_lists, normalized)
+
+FUSION_METHODS = {
+    'rrf': reciprocal_rank_fusion,
+    'weighted': weighted_score_fusion,
+}
+
+async def hybrid_search_neo4j(original_query: str, transformed_query: str, neo4j_search, query_embedding=None,
+                              fusion: str = None, limit: int = 5, core_keywords: Optional[List[str]] = None) -> List[Dict]:
+    """하이브리드 검색: 풀텍스트 + 벡터 검색을 동시에 실행
+    
+    core_keywords는 analyze_user_query_keywords가 이미 계산한 형태소 분석 결과로, 풀텍스트 레그가 재사용한다.
+    각 결과에는 응답한 레그 목록(answered_legs)과 일부 레그가 빠졌는지(시간 초과 또는 실패, partial)가 표시된다.
+    두 레그 모두 결과가 없을 때만 neo4j_search의 대체 검색을 사용한다.
+    """
     try:
-        # 1. 풀텍스트 검색
-        fulltext_results = await preprocess_and_search_neo4j(
-            original_query, transformed_query, neo4j_search
+        # 1. 풀텍스트/벡터 레그 동시 실행
+        (fulltext_results, fulltext_status), (vector_results, vector_status) = await asyncio.gather(
+            _run_search_leg(
+                'fulltext',
+                _fulltext_search(original_query, transformed_query, core_keywords),
+                HYBRID_LEG_TIMEOUTS['fulltext']
+            ),
+            _run_search_leg(
+                'vector',
+                vector_search_neo4j(original_query, neo4j_search, query_embedding=query_embedding),
+                HYBRID_LEG_TIMEOUTS['vector']
+            ),
         )
+        leg_status = {'fulltext': fulltext_status, 'vector': vector_status}
+        answered_legs = [leg for leg, status in leg_status.items() if status == 'ok']
+        partial = len(answered_legs) < len(leg_status)
         
-        # 2. 벡터 검색
-        vector_results = await vector_search_neo4j(original_query, neo4j_search)
+        # 2. 결과 융합 (노드 id 기준 중복 제거)
+        fusion_method = FUSION_METHODS.get(fusion or HYBRID_FUSION, reciprocal_rank_fusion)
+        combined_results = fusion_method({'fulltext': fulltext_results, 'vector': vector_results})
         
-        # 3. 결과 합성 및 중복 제거
-        combined_results = []
-        seen_content = set()
+        print(f"Hybrid search: {len(fulltext_results)} fulltext ({fulltext_status}) + "
+              f"{len(vector_results)} vector ({vector_status}) = {len(combined_results)} total")
         
-        # 풀텍스트 결과 (가중치 1.0)
-        for result in fulltext_results:
-            content = result['content']
-            if content not in seen_content:
-                combined_results.append({
-                    **result,
-                    'search_type': 'fulltext',
-                    'final_score': result['score']
-                })
-                seen_content.add(content)
-        
-        # 벡터 결과 (가중치 0.8)
-        for result in vector_results:
-            content = result['content']
-            if content not in seen_content:
-                combined_results.append({
-                    **result,
-                    'search_type': 'vector',
-                    'final_score': result['score'] * 0.8
-                })
-                seen_content.add(content)
-        
-        # 점수순 정렬
-        combined_results.sort(key=lambda x: x['final_score'], reverse=True)
-        
-        print(f"Hybrid search: {len(fulltext_results)} fulltext + {len(vector_results)} vector = {len(combined_results)} total")
+        if not combined_results:
+            return await neo4j_search.async_hybrid_search(original_query, {})
         
-        return combined_results[:5] if combined_results else await neo4j_search.async_hybrid_search(original_query, {})
+        return [
+            {**result, 'answered_legs': answered_legs, 'partial': partial}
+            for result in combined_results[:limit]
+        ]
         
     except Exception as e:
         print(f"Hybrid search error: {e}")
-        return await neo4j_search.async_hybrid_search(original_query, {})
\ No newline at end of file
+        return await neo4j_search.async_hybrid_search(original_query, {})
@@ -1,5 +1,5 @@
 from langgraph_sdk import get_client
-from typing import Dict, List, Any, Optional, AsyncIterator
+from typing import Dict, List, Any, Optional, AsyncIterator, Callable, Union
 import asyncio
 import json
 
@@ -144,7 +144,7 @@ async def send_message_and_wait_response(client, graph_id: str, thread_id: str,
         print(f"메시지 처리 오류: {str(e)}")
         raise e
 
-async def stream_run(client, thread_id: str, assistant_id: str, input_data: Optional[Dict[str, Any]] = None, stream_mode: str = "values"):
+async def stream_run(client, thread_id: str, assistant_id: str, input_data: Optional[Dict[str, Any]] = None, stream_mode: Union[str, List[str]] = "values"):
     """
     스트리밍 방식으로 실행 결과를 받습니다.
     
@@ -153,7 +153,7 @@ async def stream_run(client, thread_id: str, assistant_id: str, input_data: Opti
         thread_id: 스레드 ID
         assistant_id: 어시스턴트 ID
         input_data: 입력 데이터 (메시지 등)
-        stream_mode: 스트림 모드 ("values" 또는 "steps")
+        stream_mode: 스트림 모드 ("values", "messages-tuple" 등 또는 그 목록)
         
     Returns:
         AsyncIterator: 스트리밍 결과 이터레이터
@@ -193,7 +193,7 @@ async def get_last_assistant_message(messages: List[Dict[str, Any]]) -> Optional
                 return msg.get("content")
     return None
 
-async def generate_company_response_async(client, thread_id: str, user_message: str, company_id: str, scenario_id: str, user_id: str):
+async def generate_company_response_async(client, thread_id: str, user_message: str, company_id: str, scenario_id: str, user_id: str, on_token: Optional[Callable[[str], None]] = None):
     """
     사용자 메시지에 대한 기업 응답을 생성합니다 (스트리밍 방식).
     
@@ -204,6 +204,7 @@ async def generate_company_response_async(client, thread_id: str, user_message:
         company_id: 기업 ID
         scenario_id: 시나리오 ID
         user_id: 사용자 ID
+        on_token: 토큰이 도착할 때마다 지금까지 누적된 응답 텍스트로 호출되는 콜백
         
     Returns:
         str: 생성된 응답 메시지
@@ -231,9 +232,20 @@ async def generate_company_response_async(client, thread_id: str, user_message:
         response_chunks = []
         latest_ai_message = None
         
-        # 스트림 실행 및 청크 처리
-        async for chunk in await stream_run(client, thread_id, assistant_id, input_data, "values"):
-            if chunk.event == 'values':
+        # 토큰 단위로 누적 중인 응답
+        streamed_text = ""
+        
+        # 스트림 실행 및 청크 처리 (messages: 토큰 이벤트, values: 최종 상태)
+        async for chunk in await stream_run(client, thread_id, assistant_id, input_data, ["messages-tuple", "values"]):
+            if chunk.event == 'messages':
+                message_chunk, metadata = chunk.data
+                if metadata.get("langgraph_node") == "persona_assistant" and message_chunk.get("type") == "AIMessageChunk":
+                    token = message_chunk.get("content")
+                    if isinstance(token, str) and token:
+                        streamed_text += token
+                        if on_token:
+                            on_token(streamed_text)
+            elif chunk.event == 'values':
                 state = chunk.data
                 if 'messages' in state:
                     # 최신 AI 메시지 검색
@@ -244,8 +256,10 @@ async def generate_company_response_async(client, thread_id: str, user_message:
                         if current_message not in response_chunks:
                             response_chunks.append(current_message)
         
-        # 최종 응답 반환
-        return latest_ai_message if latest_ai_message else "응답을 생성하지 못했습니다."
+        # 최종 응답 반환 (최종 상태가 없으면 스트리밍된 텍스트 사용)
+        if latest_ai_message:
+            return latest_ai_message
+        return streamed_text if streamed_text else "응답을 생성하지 못했습니다."
     
     except Exception as e:
         print(f"응답 생성 오류: {str(e)}")
@@ -1,26 +1,657 @@
 # utils/model_utils.py
+import os
+import gc
+import json
+import time
+import shutil
 import asyncio
+import tempfile
 import torch
-from typing import Literal
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from collections import OrderedDict
+from functools import lru_cache
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Thread, Lock, get_ident
+from typing import Literal, List, Dict, Optional, Callable, Tuple, AsyncIterator, Any
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    TextIteratorStreamer,
+    DynamicCache,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
+from transformers.generation.streamers import BaseStreamer
 from peft import PeftModel
-from langchain_ollama.llms import OllamaLLM
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import httpx
+from ollama import AsyncClient
+from utils.inference_workers import worker_pool_enabled, get_worker_pool
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 
 MODEL_TYPE = Literal["solar", "qwen3", "ollama"]
 
-# 전역 모델 변수
-tokenizer = None
-model = None
-qwen3_tokenizer = None
-qwen3_model = None
+# 배치 스케줄러 설정 (환경변수로 조정 가능)
+BATCH_WINDOW_MS = float(os.environ.get("MODEL_BATCH_WINDOW_MS", "20"))
+MAX_BATCH_SIZE = int(os.environ.get("MODEL_MAX_BATCH_SIZE", "8"))
+
+@dataclass
+class _PendingGeneration:
+    """배치 대기 중인 생성 요청"""
+    prompt_ids: List[int]
+    generation_kwargs: Dict
+    future: asyncio.Future = field(repr=False)
+    # 스트리밍 요청이면 디코딩된 텍스트 조각을 받을 큐 (생성이 끝나면 None)
+    chunks: Optional[asyncio.Queue] = field(default=None, repr=False)
+
+class _BatchStreamer(BaseStreamer):
+    """배치 generate가 스텝마다 넘기는 행별 새 토큰을 디코딩해 스트리밍 요청에만 전달"""
+
+    def __init__(self, stream_tokenizer, sinks: List[Optional[Callable[[str], None]]]):
+        self.tokenizer = stream_tokenizer
+        self.sinks = sinks
+        self._tokens: List[List[int]] = [[] for _ in sinks]
+        self._sent = [0] * len(sinks)
+        self._prompt_seen = False
+
+    def put(self, value):
+        if not self._prompt_seen:
+            # 첫 호출은 (패딩된) 프롬프트 토큰
+            self._prompt_seen = True
+            return
+        for i, new_tokens in enumerate(value.reshape(len(self.sinks), -1).tolist()):
+            if self.sinks[i] is None:
+                continue
+            # 끝난 행에 채워지는 패딩 토큰은 특수 토큰이라 디코딩 결과에 나타나지 않는다
+            self._tokens[i].extend(new_tokens)
+            text = self.tokenizer.decode(self._tokens[i], skip_special_tokens=True)
+            # 멀티바이트 문자가 토큰 사이에 나뉘어 있으면 다음 토큰까지 기다린다
+            if text.endswith("\ufffd") or len(text) <= self._sent[i]:
+                continue
+            self.sinks[i](text[self._sent[i]:])
+            self._sent[i] = len(text)
+
+    def end(self):
+        pass
+
+class BatchingScheduler:
+    """짧은 시간 창 동안 모인 생성 요청을 하나의 배치 generate 호출로 처리하는 스케줄러"""
+
+    def __init__(self, model_getter: Callable[[], Tuple], window_ms: float = None, max_batch_size: int = None):
+        self.model_getter = model_getter
+        self.window_ms = BATCH_WINDOW_MS if window_ms is None else window_ms
+        self.max_batch_size = MAX_BATCH_SIZE if max_batch_size is None else max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+        # 큐에 있거나 생성 중인 요청 수 (프리픽스 캐시/배치 경로 선택에 사용)
+        self.pending = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        # 이벤트 루프가 바뀌면 큐와 워커를 새로 만든다
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, prompt_ids: List[int], generation_kwargs: Dict) -> str:
+        """생성 요청(프롬프트 토큰 ID)을 큐에 넣고 해당 요청의 디코딩 결과를 반환"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self.pending += 1
+        try:
+            await self._queue.put(_PendingGeneration(prompt_ids, dict(generation_kwargs), future))
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def submit_stream(self, prompt_ids: List[int], generation_kwargs: Dict) -> AsyncIterator[str]:
+        """submit과 같이 배치에 합류하되 디코딩되는 대로 텍스트 조각을 yield"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        chunks = asyncio.Queue()
+        self.pending += 1
+        try:
+            await self._queue.put(_PendingGeneration(prompt_ids, dict(generation_kwargs), future, chunks))
+            while True:
+                text = await chunks.get()
+                if text is None:
+                    break
+                yield text
+            # 생성 중 오류가 났으면 여기서 다시 발생
+            await future
+        finally:
+            self.pending -= 1
+
+    def _chunk_sink(self, chunks: asyncio.Queue) -> Callable[[str], None]:
+        """generate 스레드에서 이벤트 루프의 스트리밍 큐로 텍스트 조각을 넘기는 콜백"""
+        loop = self._loop
+        return lambda text: loop.call_soon_threadsafe(chunks.put_nowait, text)
+
+    async def _collect_batch(self) -> List[_PendingGeneration]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+
+            # 생성 파라미터가 같은 요청끼리만 하나의 generate로 묶는다
+            groups: Dict[Tuple, List[_PendingGeneration]] = {}
+            for request in batch:
+                key = tuple(sorted(request.generation_kwargs.items()))
+                groups.setdefault(key, []).append(request)
+
+            for requests in groups.values():
+                # 스트리밍 요청과 일반 요청이 같은 배치에 섞일 수 있다
+                streams = [self._chunk_sink(r.chunks) if r.chunks is not None else None for r in requests]
+                try:
+                    texts = await asyncio.to_thread(
+                        self._generate_batch,
+                        [r.prompt_ids for r in requests],
+                        requests[0].generation_kwargs,
+                        streams if any(streams) else None
+                    )
+                    for request, text in zip(requests, texts):
+                        if not request.future.done():
+                            request.future.set_result(text)
+                except Exception as e:
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                finally:
+                    # 스레드에서 넘긴 조각이 모두 큐에 들어간 뒤에 종료 신호를 보낸다
+                    for request in requests:
+                        if request.chunks is not None:
+                            request.chunks.put_nowait(None)
+
+    def _generate_batch(self, prompt_ids: List[List[int]], generation_kwargs: Dict, streams: List[Optional[Callable[[str], None]]] = None) -> List[str]:
+        batch_tokenizer, batch_model = self.model_getter()
+
+        # 디코더 모델은 왼쪽 패딩이어야 프롬프트 끝에서 바로 생성이 이어진다
+        batch_tokenizer.padding_side = "left"
+        if batch_tokenizer.pad_token is None:
+            batch_tokenizer.pad_token = batch_tokenizer.eos_token
+
+        inputs = batch_tokenizer.pad({"input_ids": prompt_ids}, padding=True, return_tensors="pt").to(batch_model.device)
+        with torch.no_grad():
+            outputs = batch_model.generate(
+                **inputs,
+                pad_token_id=batch_tokenizer.pad_token_id,
+                stopping_criteria=end_of_turn_stopping_criteria(batch_tokenizer, inputs["input_ids"].shape[1]),
+                streamer=_BatchStreamer(batch_tokenizer, streams) if streams else None,
+                **generation_kwargs
+            )
+
+        # 패딩된 프롬프트 길이 이후의 토큰만 각 요청의 응답으로 디코딩
+        prompt_length = inputs["input_ids"].shape[1]
+        return [
+            batch_tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip()
+            for output in outputs
+        ]
+
+_schedulers: Dict[str, BatchingScheduler] = {}
+
+def get_batch_scheduler(model_name: str) -> BatchingScheduler:
+    """레지스트리 모델 이름별 배치 스케줄러 싱글톤"""
+    if model_name not in _schedulers:
+        if model_name not in model_registry:
+            raise ValueError(f"배치 처리를 지원하지 않는 모델입니다: {model_name}")
+        _schedulers[model_name] = BatchingScheduler(lambda: model_registry.get(model_name))
+    return _schedulers[model_name]
+
+def configure_batching(window_ms: float = None, max_batch_size: int = None):
+    """배치 시간 창(ms)과 최대 배치 크기를 변경 (max_batch_size=1이면 배치 비활성화)"""
+    global BATCH_WINDOW_MS, MAX_BATCH_SIZE
+    if window_ms is not None:
+        BATCH_WINDOW_MS = window_ms
+    if max_batch_size is not None:
+        MAX_BATCH_SIZE = max_batch_size
+    for scheduler in _schedulers.values():
+        scheduler.window_ms = BATCH_WINDOW_MS
+        scheduler.max_batch_size = MAX_BATCH_SIZE
+
+# 스레드별 KV 캐시 프리픽스 설정 (메모리 예산, MB)
+PREFIX_CACHE_MAX_MB = float(os.environ.get("MODEL_PREFIX_CACHE_MAX_MB", "1024"))
+
+def _cache_nbytes(past_key_values) -> int:
+    """KV 캐시가 차지하는 텐서 메모리(bytes)"""
+    if hasattr(past_key_values, "layers"):
+        tensors = [t for layer in past_key_values.layers for t in (layer.keys, layer.values) if t is not None]
+    else:
+        tensors = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+@dataclass
+class _PrefixEntry:
+    """스레드별로 보관하는 토큰 시퀀스와 그에 대응하는 KV 캐시"""
+    input_ids: torch.Tensor
+    past_key_values: Any = field(repr=False)
+    nbytes: int = 0
+
+class PrefixKVCache:
+    """대화 스레드별 past-key-values를 보관하는 LRU 캐시 (메모리 예산 기준 축출)"""
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = int(PREFIX_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[Tuple, _PrefixEntry]" = OrderedDict()
+        self._lock = Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, key: Tuple, input_ids: torch.Tensor) -> Tuple[Optional[Any], int]:
+        """공통 프리픽스 길이만큼 잘라낸 KV 캐시를 꺼낸다 (generate가 캐시를 변경하므로 항목은 제거)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None, 0
+            self.total_bytes -= entry.nbytes
+
+        cached_ids = entry.input_ids
+        length = min(cached_ids.shape[-1], input_ids.shape[-1], entry.past_key_values.get_seq_length())
+        mismatch = (cached_ids[:length] != input_ids[:length]).nonzero()
+        prefix_length = int(mismatch[0]) if len(mismatch) else length
+        # 다음 토큰 로짓을 얻으려면 마지막 프롬프트 토큰은 반드시 새로 인코딩해야 한다
+        prefix_length = min(prefix_length, input_ids.shape[-1] - 1)
+
+        if prefix_length <= 0:
+            self.misses += 1
+            return None, 0
+
+        entry.past_key_values.crop(prefix_length)
+        self.hits += 1
+        return entry.past_key_values, prefix_length
+
+    def put(self, key: Tuple, input_ids: torch.Tensor, past_key_values):
+        nbytes = _cache_nbytes(past_key_values)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.nbytes
+            self._entries[key] = _PrefixEntry(input_ids, past_key_values, nbytes)
+            self.total_bytes += nbytes
+            # 예산을 넘으면 가장 오래 사용되지 않은 스레드부터 축출
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+
+    def drop_model(self, model_type: str):
+        """언로드된 모델의 캐시 항목 제거"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == model_type]:
+                self.total_bytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+prefix_cache = PrefixKVCache()
+
+def _generate_with_prefix_cache(cache_tokenizer, cache_model, prompt_ids: List[int], generation_kwargs: Dict, cache_key: Tuple) -> str:
+    """이전 턴의 KV 캐시를 재사용해 새로 추가된 접미부만 인코딩하여 생성"""
+    inputs = _ids_to_inputs(prompt_ids, cache_model.device)
+    input_ids = inputs["input_ids"][0]
+
+    past_key_values, prefix_length = prefix_cache.take(cache_key, input_ids)
+    if past_key_values is None:
+        past_key_values = DynamicCache()
+    print(f"프리픽스 캐시: {prefix_length}/{input_ids.shape[-1]} 토큰 재사용")
+
+    with torch.no_grad():
+        outputs = cache_model.generate(
+            **inputs,
+            past_key_values=past_key_values,
+            return_dict_in_generate=True,
+            stopping_criteria=end_of_turn_stopping_criteria(cache_tokenizer, input_ids.shape[-1]),
+            **generation_kwargs
+        )
+
+    sequence = outputs.sequences[0]
+    prefix_cache.put(cache_key, sequence.detach(), outputs.past_key_values)
+    return cache_tokenizer.decode(sequence[input_ids.shape[-1]:], skip_special_tokens=True).strip()
+
+# 스레드 키가 있는 요청의 생성 경로 (MODEL_PREFIX_CACHE_POLICY)
+#   auto:   모델이 한가하면 프리픽스 캐시 경로(지연시간 우선, 다음 턴의 캐시도 만든다),
+#           다른 요청이 대기/생성 중이면 배치 스케줄러에 합류(처리량 우선) (기본값)
+#   prefix: 항상 프리픽스 캐시 경로 (배치 안 함)
+#   batch:  항상 배치 스케줄러 (프리픽스 캐시 안 씀)
+PREFIX_CACHE_POLICY = os.environ.get("MODEL_PREFIX_CACHE_POLICY", "auto").lower()
+
+# 모델별로 프리픽스 캐시 경로에서 생성 중인 요청 수
+_prefix_generations: Dict[str, int] = {}
+
+def use_prefix_cache(model_name: str, cache_key) -> bool:
+    """이번 요청을 프리픽스 캐시 경로로 보낼지 배치 스케줄러로 보낼지 결정"""
+    if cache_key is None or PREFIX_CACHE_POLICY == "batch":
+        return False
+    if PREFIX_CACHE_POLICY == "prefix":
+        return True
+    busy = _prefix_generations.get(model_name, 0) + get_batch_scheduler(model_name).pending
+    return busy == 0
+
+async def _generate_local(local_tokenizer, local_model, model_name: str, prompt_ids: List[int], generation_kwargs: Dict, cache_key=None) -> str:
+    """프리픽스 캐시 경로와 배치 스케줄러 중 하나로 로컬 모델 생성"""
+    if not use_prefix_cache(model_name, cache_key):
+        # 동시 요청은 배치 스케줄러에서 하나의 generate 호출로 묶인다
+        return await get_batch_scheduler(model_name).submit(prompt_ids, generation_kwargs)
+
+    # 이전 턴의 KV 캐시 프리픽스를 재사용
+    _prefix_generations[model_name] = _prefix_generations.get(model_name, 0) + 1
+    try:
+        return await asyncio.to_thread(
+            _generate_with_prefix_cache, local_tokenizer, local_model, prompt_ids, generation_kwargs, (model_name, cache_key)
+        )
+    finally:
+        _prefix_generations[model_name] -= 1
+
+# 생성 토큰 예산 설정
+DEFAULT_MAX_NEW_TOKENS = int(os.environ.get("MODEL_MAX_NEW_TOKENS", "512"))
+MIN_NEW_TOKENS = 32
+MAX_PROMPT_TOKENS = int(os.environ.get("MODEL_MAX_PROMPT_TOKENS", "3072"))
+# 메시지마다 chat template이 덧붙이는 역할 토큰 등의 대략적인 오버헤드
+MESSAGE_OVERHEAD_TOKENS = 8
+
+# 모델별 대략적인 디코딩 속도 (tokens/sec). 지연시간 목표로 max_new_tokens를 정할 때 사용
+DECODE_TOKENS_PER_SECOND = {
+    "solar": float(os.environ.get("SOLAR_DECODE_TPS", "12")),
+    "qwen3": float(os.environ.get("QWEN3_DECODE_TPS", "25")),
+    "ollama": float(os.environ.get("OLLAMA_DECODE_TPS", "30")),
+}
+
+# 페르소나 응답이 끝났는데 모델이 다음 화자의 턴을 이어 쓰기 시작할 때 나타나는 마커
+END_OF_TURN_MARKERS = ["<|im_end|>", "<|endoftext|>", "### User:", "\n사용자:", "\n고객:", "\n시스템:"]
+
+def resolve_max_new_tokens(model_type: str, max_new_tokens: int = None, latency_slo: float = None) -> int:
+    """호출별 생성 토큰 상한 계산 (latency_slo가 있으면 디코딩 속도 기준으로 추가 제한)"""
+    budget = max_new_tokens or DEFAULT_MAX_NEW_TOKENS
+    if latency_slo:
+        tokens_per_second = DECODE_TOKENS_PER_SECOND.get(model_type, 20.0)
+        budget = min(budget, max(MIN_NEW_TOKENS, int(latency_slo * tokens_per_second)))
+    return budget
+
+def build_generation_kwargs(temperature: float, max_new_tokens: int) -> Dict:
+    """로컬 모델 generate 파라미터 (프롬프트 길이와 무관하게 새 토큰 수만 제한)"""
+    return {
+        "do_sample": True,
+        "temperature": temperature,
+        "max_new_tokens": max_new_tokens,
+        "repetition_penalty": 1.1,
+        "top_p": 0.95
+    }
+
+def strip_end_of_turn(text: str) -> str:
+    """응답에서 첫 턴 종료 마커 이후를 잘라낸다"""
+    positions = [text.find(marker) for marker in END_OF_TURN_MARKERS if marker in text]
+    return text[:min(positions)].strip() if positions else text.strip()
+
+class EndOfTurnCriteria(StoppingCriteria):
+    """생성된 부분의 끝에 턴 종료 마커가 나오면 해당 시퀀스의 생성을 멈춘다"""
+
+    def __init__(self, stop_tokenizer, prompt_length: int, markers: List[str] = None, window: int = 16):
+        self.tokenizer = stop_tokenizer
+        self.prompt_length = prompt_length
+        self.markers = markers or END_OF_TURN_MARKERS
+        self.window = window
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        start = max(self.prompt_length, input_ids.shape[-1] - self.window)
+        if start >= input_ids.shape[-1]:
+            return done
+        tails = self.tokenizer.batch_decode(input_ids[:, start:], skip_special_tokens=False)
+        for i, tail in enumerate(tails):
+            done[i] = any(marker in tail for marker in self.markers)
+        return done
+
+def end_of_turn_stopping_criteria(stop_tokenizer, prompt_length: int) -> StoppingCriteriaList:
+    return StoppingCriteriaList([EndOfTurnCriteria(stop_tokenizer, prompt_length)])
+
+def truncate_conversation(conversation: List[Dict[str, str]], count_tokens: Callable[[str], int], max_prompt_tokens: int) -> List[Dict[str, str]]:
+    """프롬프트가 한도를 넘으면 선두 시스템 메시지와 마지막 사용자 턴은 남기고 오래된 대화부터 제거"""
+    costs = [count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS for msg in conversation]
+    total = sum(costs)
+    if total <= max_prompt_tokens:
+        return conversation
+
+    head = 1 if conversation and conversation[0]["role"] == "system" else 0
+    # 마지막 사용자 메시지와 바로 앞의 턴 컨텍스트(system)는 보존
+    tail = len(conversation) - 1
+    while tail > head and conversation[tail]["role"] != "user":
+        tail -= 1
+    if tail - 1 >= head and conversation[tail - 1]["role"] == "system":
+        tail -= 1
+
+    cut = head
+    while total > max_prompt_tokens and cut < tail:
+        total -= costs[cut]
+        cut += 1
+    # 잘린 뒤 대화가 assistant 메시지로 시작하지 않도록 정리
+    while cut < tail and conversation[cut]["role"] == "assistant":
+        cut += 1
+
+    if cut > head:
+        print(f"프롬프트 길이 초과: 오래된 메시지 {cut - head}개 제외")
+    return conversation[:head] + conversation[cut:]
+
+def messages_to_conversation(messages) -> List[Dict[str, str]]:
+    """LangChain 메시지를 chat template용 role/content 딕셔너리 목록으로 변환"""
+    conversation = []
+    for msg in messages:
+        if isinstance(msg, SystemMessage):
+            conversation.append({"role": "system", "content": msg.content})
+        elif isinstance(msg, HumanMessage):
+            conversation.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, AIMessage):
+            conversation.append({"role": "assistant", "content": msg.content})
+        elif getattr(msg, 'role', None) == 'tool':
+            conversation.append({"role": "user", "content": f"도구 응답: {msg.content}"})
+    return conversation
+
+def _ids_to_inputs(prompt_ids: List[int], device) -> Dict[str, torch.Tensor]:
+    """프롬프트 토큰 ID 목록을 generate 입력 텐서로 변환"""
+    input_ids = torch.tensor([prompt_ids], dtype=torch.long, device=device)
+    return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+
+# 증분 렌더링 상태를 보관할 최대 스레드 수
+RENDER_CACHE_MAX_THREADS = int(os.environ.get("MODEL_RENDER_CACHE_MAX_THREADS", "256"))
+
+# 새 메시지만 렌더링할 때 앞에 붙이는 기준 메시지 (이 부분의 렌더링 결과는 잘라낸다)
+_DELTA_ANCHOR = [{"role": "user", "content": "."}]
+
+@dataclass
+class _RenderedConversation:
+    """스레드별로 렌더링된 대화 앞부분(_stable_length까지)의 텍스트와 토큰"""
+    messages: List[Dict[str, str]]
+    text: str
+    token_ids: List[int]
+
+def _stable_length(conversation: List[Dict[str, str]]) -> int:
+    """다음 턴 대화에도 그대로 남고 렌더링도 바뀌지 않는 앞부분의 메시지 수
+
+    페르소나 노드는 매 턴 [페르소나 system] + 이전 대화 + [턴 컨텍스트 system, 새 사용자 메시지]로
+    프롬프트를 만들고, 턴 컨텍스트는 다음 턴 대화에 남기지 않는다. 그래서 마지막 사용자 메시지 바로 앞에
+    system 메시지가 있으면 그 앞쪽까지만 캐시한다.
+
+    Qwen3 템플릿은 마지막 사용자 메시지 뒤의 assistant 메시지를 빈 <think></think> 블록과 함께
+    렌더링하고, 그 뒤에 사용자 메시지가 붙으면 블록 없이 다시 렌더링한다. 그래서 캐시하는 앞부분은
+    항상 사용자 메시지에서 끝나야 한다.
+    """
+    last_user = None
+    for i in range(len(conversation) - 1, -1, -1):
+        if conversation[i]["role"] == "user":
+            last_user = i
+            break
+    if last_user is None:
+        return 0
+    if last_user == 0 or conversation[last_user - 1]["role"] != "system":
+        return last_user + 1
+    # 턴 컨텍스트 앞의 마지막 사용자 메시지까지
+    for i in range(last_user - 2, -1, -1):
+        if conversation[i]["role"] == "user":
+            return i + 1
+    return 0
+
+class ConversationRenderer:
+    """스레드별 chat template 렌더링 결과와 토큰 ID를 보관하고 새로 추가된 메시지만 렌더링/토크나이즈"""
+
+    def __init__(self, render_tokenizer, max_threads: int = None):
+        self.tokenizer = render_tokenizer
+        self.max_threads = RENDER_CACHE_MAX_THREADS if max_threads is None else max_threads
+        self._states: "OrderedDict[Any, _RenderedConversation]" = OrderedDict()
+        self._lock = Lock()
+        # 템플릿 BOS 처리 방식을 그대로 따르기 위해 빈 문자열 인코딩 결과를 시작 토큰으로 사용
+        self._start_ids = render_tokenizer.encode("", add_special_tokens=True)
+        self._anchor_text: Optional[str] = None
+        self.incremental_tokens = self._supports_incremental_tokens()
+        self.delta_rendering = self._supports_delta_rendering()
+        self.count_tokens = lru_cache(maxsize=8192)(self._count_tokens)
+
+    def _encode(self, text: str) -> List[int]:
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self._encode(text))
+
+    def _template(self, conversation: List[Dict[str, str]], add_generation_prompt: bool = False) -> str:
+        return self.tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=add_generation_prompt)
+
+    def _render_delta(self, messages: List[Dict[str, str]], add_generation_prompt: bool = False) -> Optional[str]:
+        """기준 메시지 뒤에 새 메시지만 붙여 렌더링하고 기준 메시지 부분을 잘라낸 텍스트 (전체 대화를 다시 렌더링하지 않음)"""
+        if self._anchor_text is None:
+            self._anchor_text = self._template(_DELTA_ANCHOR)
+        anchor = self._anchor_text
+        rendered = self._template(_DELTA_ANCHOR + messages, add_generation_prompt)
+        if not rendered.startswith(anchor):
+            return None
+        return rendered[len(anchor):]
+
+    def _supports_incremental_tokens(self) -> bool:
+        """메시지 경계에서 나눠 토크나이즈해도 전체를 토크나이즈한 결과와 같은지 확인"""
+        sample = [
+            {"role": "user", "content": "유심 보호 서비스 어떻게 신청해요?"},
+            {"role": "assistant", "content": "네 고객님, 안내해 드리겠습니다."},
+            {"role": "user", "content": "요금이 있나요?"},
+        ]
+        try:
+            first = self._template(sample[:1])
+            both = self._template(sample)
+            if not both.startswith(first):
+                return False
+            return self._encode(both) == self._encode(first) + self._encode(both[len(first):])
+        except Exception:
+            return False
+
+    def _supports_delta_rendering(self) -> bool:
+        """새 메시지만 렌더링해 이어 붙인 결과가 전체 대화를 렌더링한 결과와 같은지 확인"""
+        sample = [
+            {"role": "system", "content": "당신은 SKT 고객센터 상담원입니다."},
+            {"role": "user", "content": "유심 보호 서비스 어떻게 신청해요?"},
+            {"role": "assistant", "content": "네 고객님, 안내해 드리겠습니다."},
+            {"role": "system", "content": "참고 자료: 유심 보호 서비스 안내"},
+            {"role": "user", "content": "요금이 있나요?"},
+        ]
+        try:
+            head = self._template(sample[:2])
+            stable = self._render_delta(sample[2:])
+            full = self._render_delta(sample[2:], add_generation_prompt=True)
+            return (
+                stable is not None and full is not None
+                and head + stable == self._template(sample)
+                and head + full == self._template(sample, add_generation_prompt=True)
+            )
+        except Exception:
+            return False
+
+    def render(self, conversation: List[Dict[str, str]], thread_key=None) -> List[int]:
+        """생성 프롬프트가 붙은 토큰 ID 반환. 이전 턴에 렌더링한 앞부분은 다시 렌더링/토크나이즈하지 않는다"""
+        if thread_key is None or not self.delta_rendering:
+            # 이어서 렌더링할 수 없는 템플릿은 전체를 한 번에 렌더링
+            return self._start_ids + self._encode(self._template(conversation, add_generation_prompt=True))
+
+        with self._lock:
+            state = self._states.get(thread_key)
+        stable = _stable_length(conversation)
+        rendered = None
+        if state and 0 < len(state.messages) <= stable \
+                and conversation[:len(state.messages)] == state.messages:
+            rendered = self._extend(state, conversation, stable)
+        if rendered is None:
+            # 첫 턴이거나 앞부분이 바뀐 경우(대화 잘림 등): 전체를 렌더링
+            rendered = self._render_full(conversation, stable)
+        new_state, prompt_ids = rendered
+
+        if new_state.messages:
+            with self._lock:
+                self._states[thread_key] = new_state
+                self._states.move_to_end(thread_key)
+                while len(self._states) > self.max_threads:
+                    self._states.popitem(last=False)
+        return prompt_ids
+
+    def _prompt_ids(self, state: _RenderedConversation, tail_text: str) -> List[int]:
+        if self.incremental_tokens:
+            return state.token_ids + self._encode(tail_text)
+        return self._start_ids + self._encode(state.text + tail_text)
+
+    def _state(self, messages: List[Dict[str, str]], text: str, previous: _RenderedConversation = None) -> _RenderedConversation:
+        if not self.incremental_tokens:
+            # 경계 분할이 안전하지 않은 토크나이저는 텍스트만 보관하고 토큰은 프롬프트마다 한 번에 인코딩
+            return _RenderedConversation(list(messages), text, [])
+        if previous is None:
+            return _RenderedConversation(list(messages), text, self._start_ids + self._encode(text))
+        return _RenderedConversation(list(messages), text, previous.token_ids + self._encode(text[len(previous.text):]))
+
+    def _render_full(self, conversation: List[Dict[str, str]], stable: int) -> Tuple[_RenderedConversation, List[int]]:
+        full_prompt = self._template(conversation, add_generation_prompt=True)
+        stable_text = self._template(conversation[:stable]) if stable else ""
+        if not stable or not full_prompt.startswith(stable_text):
+            empty = _RenderedConversation([], "", list(self._start_ids))
+            return empty, self._start_ids + self._encode(full_prompt)
+        state = self._state(conversation[:stable], stable_text)
+        return state, self._prompt_ids(state, full_prompt[len(stable_text):])
+
+    def _extend(self, state: _RenderedConversation, conversation: List[Dict[str, str]], stable: int) -> Optional[Tuple[_RenderedConversation, List[int]]]:
+        """이전 상태 뒤에 새로 추가된 메시지만 렌더링 (assistant 응답 + 새 사용자 메시지 등)"""
+        tail = conversation[len(state.messages):]
+        stable_tail = self._render_delta(tail[:stable - len(state.messages)]) if stable > len(state.messages) else ""
+        full_tail = self._render_delta(tail, add_generation_prompt=True)
+        if stable_tail is None or full_tail is None or not full_tail.startswith(stable_tail):
+            return None
+        new_state = self._state(conversation[:stable], state.text + stable_tail, state)
+        return new_state, self._prompt_ids(new_state, full_tail[len(stable_tail):])
+
+    def forget(self, thread_key):
+        with self._lock:
+            self._states.pop(thread_key, None)
+
+_renderers: Dict[Optional[str], ConversationRenderer] = {}
+
+def get_conversation_renderer(model_name: Optional[str], render_tokenizer) -> ConversationRenderer:
+    """모델별 대화 렌더러 싱글톤 (모델이 다시 로딩되어 토크나이저가 바뀌면 새로 생성)"""
+    renderer = _renderers.get(model_name)
+    if renderer is None or renderer.tokenizer is not render_tokenizer:
+        renderer = ConversationRenderer(render_tokenizer)
+        _renderers[model_name] = renderer
+    return renderer
 
 def load_solar_model():
-    global tokenizer, model
     try:
-        if tokenizer is not None and model is not None:
-            return
-            
         tokenizer = AutoTokenizer.from_pretrained("Upstage/SOLAR-10.7B-Instruct-v1.0")
         model = AutoModelForCausalLM.from_pretrained(
             "Upstage/SOLAR-10.7B-Instruct-v1.0",
@@ -28,77 +659,502 @@ def load_solar_model():
             torch_dtype=torch.float16,
         )
         print("SOLAR 모델 로딩 완료!")
+        return tokenizer, model
     except Exception as e:
         print(f"SOLAR 모델 로딩 중 오류 발생: {str(e)}")
         raise
 
+# Qwen3 페르소나 모델 경로
+QWEN3_BASE_MODEL = "Qwen/Qwen3-4B"
+QWEN3_ADAPTER_DIR = "./models/skt_persona_qwen3_final"
+QWEN3_MERGED_DIR = os.environ.get("QWEN3_MERGED_DIR", "./models/skt_persona_qwen3_merged")
+# cpu_int4 양자화 결과 저장 위치 (시작할 때마다 다시 양자화하지 않도록 한 번 만들어 재사용)
+QWEN3_INT4_DIR = os.environ.get("QWEN3_INT4_DIR", "./models/skt_persona_qwen3_int4")
+
+# Qwen3 추론 모드: default(GPU/fp16 + LoRA 어댑터) 또는 병합 가중치 기반 CPU 모드
+QWEN3_INFERENCE_MODES = ("default", "cpu_bf16", "cpu_int8", "cpu_int4")
+
 def load_qwen3_model():
-    global qwen3_tokenizer, qwen3_model
     try:
-        if qwen3_tokenizer is not None and qwen3_model is not None:
-            return
-            
-        base_model = "Qwen/Qwen3-4B"
-        output_dir = "./models/skt_persona_qwen3_final"
-        
-        qwen3_tokenizer = AutoTokenizer.from_pretrained(output_dir, trust_remote_code=True)
+        qwen3_tokenizer = AutoTokenizer.from_pretrained(QWEN3_ADAPTER_DIR, trust_remote_code=True)
         
         base_model_instance = AutoModelForCausalLM.from_pretrained(
-            base_model,
+            QWEN3_BASE_MODEL,
             device_map="auto",
             torch_dtype=torch.float16,
             trust_remote_code=True
         )
         
-        qwen3_model = PeftModel.from_pretrained(base_model_instance, output_dir)
+        qwen3_model = PeftModel.from_pretrained(base_model_instance, QWEN3_ADAPTER_DIR)
         qwen3_model.eval()
         
         print("Qwen3 모델 로딩 완료!")
+        return qwen3_tokenizer, qwen3_model
     except Exception as e:
         print(f"Qwen3 모델 로딩 중 오류 발생: {str(e)}")
         raise
 
-async def generate_solar_response(messages, temperature=0.2, max_length=4096):
+def _publish_model_dir(build: Callable[[str], None], output_dir: str, required_file: str) -> str:
+    """임시 디렉토리에 결과를 모두 쓴 뒤 os.replace로 한 번에 옮김 (중간에 죽어도 불완전한 디렉토리가 남지 않음)"""
+    if os.path.exists(os.path.join(output_dir, required_file)):
+        return output_dir
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(output_dir)}-", dir=parent)
     try:
-        if tokenizer is None or model is None:
-            await asyncio.to_thread(load_solar_model)
-        
-        conversation = []
-        for msg in messages:
-            if isinstance(msg, SystemMessage):
-                conversation.append({"role": "system", "content": msg.content})
-            elif isinstance(msg, HumanMessage):
-                conversation.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                conversation.append({"role": "assistant", "content": msg.content})
-            elif getattr(msg, 'role', None) == 'tool':
-                conversation.append({"role": "user", "content": f"도구 응답: {msg.content}"})
-        
-        prompt = await asyncio.to_thread(
-            lambda: tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=True)
+        build(tmp_dir)
+        os.replace(tmp_dir, output_dir)
+    except OSError:
+        # 다른 프로세스(추론 워커 등)가 먼저 만들었으면 그 결과를 사용
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(output_dir, required_file)):
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return output_dir
+
+def merge_qwen3_adapter(output_dir: str = QWEN3_MERGED_DIR) -> str:
+    """LoRA 어댑터를 베이스 가중치에 병합해 저장 (이미 병합본이 있으면 재사용)"""
+    def build(tmp_dir: str):
+        print(f"Qwen3 LoRA 어댑터 병합 중: {QWEN3_ADAPTER_DIR} -> {output_dir}")
+        base_model_instance = AutoModelForCausalLM.from_pretrained(
+            QWEN3_BASE_MODEL,
+            torch_dtype=torch.bfloat16,
+            trust_remote_code=True
         )
+        merged_model = PeftModel.from_pretrained(base_model_instance, QWEN3_ADAPTER_DIR).merge_and_unload()
+        merged_model.save_pretrained(tmp_dir, safe_serialization=True)
+        AutoTokenizer.from_pretrained(QWEN3_ADAPTER_DIR, trust_remote_code=True).save_pretrained(tmp_dir)
+        print("Qwen3 병합 모델 저장 완료!")
+
+    # config.json은 가중치보다 먼저 저장되므로 완료 표시로 쓰지 않고 토크나이저 설정(마지막에 저장)을 확인
+    return _publish_model_dir(build, output_dir, "tokenizer_config.json")
+
+def _load_merged_qwen3_bf16(merged_dir: str):
+    return AutoModelForCausalLM.from_pretrained(
+        merged_dir,
+        device_map="cpu",
+        torch_dtype=torch.bfloat16,
+        trust_remote_code=True
+    )
+
+def _quantize_linear_layers_int8(model):
+    """Linear 레이어를 하나씩 fp32로 올려 int8 동적 양자화 (모델 전체의 fp32 사본을 만들지 않는다)"""
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+    from torch.ao.quantization import default_dynamic_qconfig
+
+    for parent in list(model.modules()):
+        for child_name, child in list(parent.named_children()):
+            if type(child) is torch.nn.Linear:
+                child.float()
+                child.qconfig = default_dynamic_qconfig
+                setattr(parent, child_name, DynamicQuantizedLinear.from_float(child))
+    # 양자화된 Linear는 fp32 활성값을 받으므로 남은 임베딩/정규화 레이어도 fp32로 맞춘다
+    return model.float()
+
+def quantize_qwen3_int4(merged_dir: str, output_dir: str = QWEN3_INT4_DIR) -> str:
+    """병합 가중치를 optimum-quanto int4로 양자화해 state dict와 양자화 맵을 저장 (이미 있으면 재사용)"""
+    def build(tmp_dir: str):
+        from optimum.quanto import quantize, freeze, qint4, quantization_map
+        from safetensors.torch import save_file
+
+        print(f"Qwen3 int4 양자화 중: {merged_dir} -> {output_dir}")
+        model = _load_merged_qwen3_bf16(merged_dir)
+        quantize(model, weights=qint4)
+        freeze(model)
+        save_file(model.state_dict(), os.path.join(tmp_dir, "model.safetensors"))
+        model.config.save_pretrained(tmp_dir)
+        AutoTokenizer.from_pretrained(merged_dir, trust_remote_code=True).save_pretrained(tmp_dir)
+        with open(os.path.join(tmp_dir, "quantization_map.json"), "w", encoding="utf-8") as f:
+            json.dump(quantization_map(model), f)
+        print("Qwen3 int4 양자화 모델 저장 완료!")
+
+    return _publish_model_dir(build, output_dir, "quantization_map.json")
+
+def _load_qwen3_int4(quantized_dir: str):
+    """저장된 int4 가중치를 빈(meta) 모델에 바로 채워 로딩"""
+    from optimum.quanto import requantize
+    from safetensors.torch import load_file
+    from transformers import AutoConfig
+
+    config = AutoConfig.from_pretrained(quantized_dir, trust_remote_code=True)
+    with torch.device("meta"):
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=torch.bfloat16, trust_remote_code=True)
+    with open(os.path.join(quantized_dir, "quantization_map.json"), encoding="utf-8") as f:
+        qmap = json.load(f)
+    requantize(model, load_file(os.path.join(quantized_dir, "model.safetensors")), qmap, device=torch.device("cpu"))
+    model.tie_weights()
+    return model
+
+def load_qwen3_cpu_model(mode: str = "cpu_bf16"):
+    """병합된 Qwen3 가중치를 CPU에서 bf16 또는 int8/int4 가중치 양자화로 로딩
+    
+    int8은 bf16 가중치를 레이어 단위로 양자화하고, int4는 한 번 양자화해 저장한 결과를 다시 읽는다.
+    """
+    if mode not in QWEN3_INFERENCE_MODES[1:]:
+        raise ValueError(f"지원되지 않는 Qwen3 추론 모드입니다: {mode}")
+    try:
+        merged_dir = merge_qwen3_adapter()
         
-        inputs = await asyncio.to_thread(
-            lambda: tokenizer(prompt, return_tensors="pt").to(model.device)
-        )
+        if mode == "cpu_int4":
+            try:
+                import optimum.quanto  # noqa: F401
+            except ImportError:
+                raise ImportError("cpu_int4 모드에는 optimum-quanto가 필요합니다: pip install optimum-quanto")
+            quantized_dir = quantize_qwen3_int4(merged_dir)
+            qwen3_tokenizer = AutoTokenizer.from_pretrained(quantized_dir, trust_remote_code=True)
+            qwen3_model = _load_qwen3_int4(quantized_dir)
+        else:
+            qwen3_tokenizer = AutoTokenizer.from_pretrained(merged_dir, trust_remote_code=True)
+            qwen3_model = _load_merged_qwen3_bf16(merged_dir)
+            if mode == "cpu_int8":
+                # Linear 레이어 가중치를 int8로 동적 양자화 (활성값은 실행 시 양자화)
+                qwen3_model = _quantize_linear_layers_int8(qwen3_model)
         
-        generation_kwargs = {
-            "do_sample": True,
-            "temperature": temperature,
-            "max_length": max_length,
-            "repetition_penalty": 1.1,
-            "top_p": 0.95
+        qwen3_model.eval()
+        print(f"Qwen3 CPU 모델 로딩 완료! ({mode})")
+        return qwen3_tokenizer, qwen3_model
+    except Exception as e:
+        print(f"Qwen3 CPU 모델 로딩 중 오류 발생: {str(e)}")
+        raise
+
+def qwen3_model_name(inference_mode: str = None) -> str:
+    """추론 모드에 해당하는 레지스트리 모델 이름"""
+    if not inference_mode or inference_mode == "default":
+        return "qwen3"
+    if inference_mode not in QWEN3_INFERENCE_MODES:
+        raise ValueError(f"지원되지 않는 Qwen3 추론 모드입니다: {inference_mode}")
+    return f"qwen3:{inference_mode}"
+
+# 상주 모델 메모리 예산 (MB, 0이면 제한 없음)
+MODEL_MAX_RESIDENT_MB = float(os.environ.get("MODEL_MAX_RESIDENT_MB", "0"))
+
+def _parse_model_estimates(value: str) -> Dict[str, float]:
+    """"solar=21500,qwen3:cpu_int8=4600" 형식의 모델별 예상 메모리(MB)"""
+    estimates = {}
+    for item in value.split(","):
+        name, _, mb = item.strip().rpartition("=")
+        if name and mb:
+            estimates[name.strip()] = float(mb)
+    return estimates
+
+# 로딩 전에 자리를 비울 때 쓰는 모델별 예상 메모리 (MB). 한 번 로딩한 모델은 측정값을 사용
+MODEL_ESTIMATED_MB = _parse_model_estimates(os.environ.get("MODEL_ESTIMATED_MB", ""))
+
+@dataclass
+class ModelEntry:
+    """레지스트리에 등록된 모델의 로딩 상태"""
+    name: str
+    loader: Callable[[], Tuple] = field(repr=False)
+    state: str = "unloaded"  # unloaded | loading | loaded | failed
+    tokenizer: Any = field(default=None, repr=False)
+    model: Any = field(default=None, repr=False)
+    nbytes: int = 0
+    estimated_nbytes: int = 0  # 로딩 전 축출에 쓰는 예상 크기 (로딩 후에는 측정값으로 갱신, 언로드해도 유지)
+    load_seconds: float = 0.0
+    last_used: float = 0.0
+    error: Optional[str] = None
+    lock: Lock = field(default_factory=Lock, repr=False)
+
+class ModelRegistry:
+    """로컬 모델의 로딩(단일 실행), 사전 로딩, 상태 조회, 메모리 예산 기반 LRU 축출을 관리"""
+
+    def __init__(self, max_resident_bytes: int = None):
+        self.max_resident_bytes = int(MODEL_MAX_RESIDENT_MB * 1024 * 1024) if max_resident_bytes is None else max_resident_bytes
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = Lock()
+
+    def register(self, name: str, loader: Callable[[], Tuple], estimated_mb: float = 0):
+        """(tokenizer, model)을 반환하는 로더 등록 (estimated_mb는 MODEL_ESTIMATED_MB 환경변수가 우선)"""
+        estimated_mb = MODEL_ESTIMATED_MB.get(name, estimated_mb)
+        with self._lock:
+            self._entries[name] = ModelEntry(name=name, loader=loader, estimated_nbytes=int(estimated_mb * 1024 * 1024))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def _entry(self, name: str) -> ModelEntry:
+        if name not in self._entries:
+            raise ValueError(f"등록되지 않은 모델입니다: {name}")
+        return self._entries[name]
+
+    def get(self, name: str) -> Tuple:
+        """모델을 반환 (필요하면 로딩). 같은 모델의 동시 첫 요청은 한 번만 로딩한다"""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.state != "loaded":
+                entry.state = "loading"
+                # 로딩 중 메모리 사용량이 예산을 넘지 않도록 예상 크기만큼 먼저 자리를 비운다
+                self._evict_over_budget(keep=name, incoming=entry.estimated_nbytes)
+                started = time.perf_counter()
+                try:
+                    entry.tokenizer, entry.model = entry.loader()
+                except Exception as e:
+                    entry.state = "failed"
+                    entry.error = str(e)
+                    raise
+                entry.load_seconds = time.perf_counter() - started
+                entry.nbytes = self._model_nbytes(entry.model)
+                entry.estimated_nbytes = entry.nbytes
+                entry.state = "loaded"
+                entry.error = None
+            entry.last_used = time.monotonic()
+            tokenizer, model = entry.tokenizer, entry.model
+
+        # 예상보다 크게 측정된 경우를 대비해 로딩 후에도 한 번 더 확인
+        self._evict_over_budget(keep=name)
+        return tokenizer, model
+
+    async def aget(self, name: str) -> Tuple:
+        return await asyncio.to_thread(self.get, name)
+
+    def preload(self, names: List[str]):
+        """지정한 모델들을 미리 로딩 (실패해도 나머지는 계속 로딩)"""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"모델 사전 로딩 실패 ({name}): {str(e)}")
+
+    def preload_in_background(self, names: List[str]) -> Optional[Thread]:
+        """그래프 임포트/서버 시작을 막지 않도록 백그라운드 스레드에서 사전 로딩"""
+        if not names:
+            return None
+        thread = Thread(target=self.preload, args=(names,), daemon=True, name="model-preload")
+        thread.start()
+        return thread
+
+    def unload(self, name: str):
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.state != "loaded":
+                return
+            entry.tokenizer = None
+            entry.model = None
+            entry.nbytes = 0
+            entry.state = "unloaded"
+        prefix_cache.drop_model(name)
+        _renderers.pop(name, None)
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print(f"모델 언로드: {name}")
+
+    def status(self) -> Dict[str, Dict]:
+        """모델별 로딩 상태 보고"""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {
+            name: {
+                "state": entry.state,
+                "resident_mb": round(entry.nbytes / (1024 * 1024), 1),
+                "load_seconds": round(entry.load_seconds, 2),
+                "error": entry.error,
+            }
+            for name, entry in entries
         }
-        
-        outputs = await asyncio.to_thread(
-            lambda: model.generate(**inputs, **generation_kwargs)
+
+    def _evict_over_budget(self, keep: str, incoming: int = 0):
+        """상주 모델 + 새로 올릴 모델(incoming bytes)이 예산을 넘으면 오래 사용하지 않은 모델부터 언로드"""
+        if self.max_resident_bytes <= 0:
+            return
+        while True:
+            with self._lock:
+                loaded = [e for e in self._entries.values() if e.state == "loaded"]
+            if sum(e.nbytes for e in loaded) + incoming <= self.max_resident_bytes:
+                return
+            candidates = [e for e in loaded if e.name != keep]
+            if not candidates:
+                if incoming:
+                    print(f"모델 메모리 예산 초과 예상: {keep} 로딩에 {incoming / (1024 * 1024):.0f}MB 필요")
+                return
+            self.unload(min(candidates, key=lambda e: e.last_used).name)
+
+    @staticmethod
+    def _model_nbytes(model) -> int:
+        if hasattr(model, "get_memory_footprint"):
+            return int(model.get_memory_footprint())
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+
+model_registry = ModelRegistry()
+# 기본 예상 크기: 파라미터 수 x 가중치 바이트 수 (SOLAR 10.7B fp16, Qwen3 4B fp16/bf16/int8/int4)
+model_registry.register("solar", load_solar_model, estimated_mb=20500)
+model_registry.register("qwen3", load_qwen3_model, estimated_mb=7700)
+for _mode, _estimated_mb in zip(QWEN3_INFERENCE_MODES[1:], (7700, 4600, 3000)):
+    model_registry.register(qwen3_model_name(_mode), lambda mode=_mode: load_qwen3_cpu_model(mode), estimated_mb=_estimated_mb)
+
+def preload_models_from_env() -> Optional[Thread]:
+    """PRELOAD_MODELS 환경변수(예: "qwen3,solar", "qwen3:cpu_int8")에 지정된 모델을 백그라운드에서 사전 로딩"""
+    names = [name.strip() for name in os.environ.get("PRELOAD_MODELS", "").split(",") if name.strip()]
+    return model_registry.preload_in_background(names)
+
+# 추측 디코딩(assisted decoding) 설정: 초안 모델이 지정된 백엔드에서만 활성화
+SPECULATIVE_DECODING = {
+    "solar": {
+        "draft_model": os.environ.get("SOLAR_DRAFT_MODEL"),
+        "lookahead": int(os.environ.get("SOLAR_DRAFT_LOOKAHEAD", "5")),
+    },
+    "qwen3": {
+        "draft_model": os.environ.get("QWEN3_DRAFT_MODEL"),
+        "lookahead": int(os.environ.get("QWEN3_DRAFT_LOOKAHEAD", "5")),
+    },
+}
+
+def configure_speculative_decoding(model_type: str, draft_model: Optional[str], lookahead: int = 5):
+    """모델 타입별 초안 모델과 한 번에 제안할 토큰 수 설정 (draft_model=None이면 비활성화)"""
+    if model_type not in SPECULATIVE_DECODING:
+        raise ValueError(f"추측 디코딩을 지원하지 않는 모델 타입입니다: {model_type}")
+    SPECULATIVE_DECODING[model_type] = {"draft_model": draft_model, "lookahead": lookahead}
+
+def load_draft_model(model_id: str):
+    try:
+        draft_tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
+        draft_model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            device_map="auto",
+            torch_dtype="auto",
+            trust_remote_code=True
         )
+        draft_model.eval()
+        print(f"초안 모델 로딩 완료! ({model_id})")
+        return draft_tokenizer, draft_model
+    except Exception as e:
+        print(f"초안 모델 로딩 중 오류 발생 ({model_id}): {str(e)}")
+        raise
+
+async def get_assisted_kwargs(model_type: str) -> Dict:
+    """추측 디코딩이 켜져 있으면 generate에 넘길 assistant_model 인자 반환"""
+    settings = SPECULATIVE_DECODING.get(model_type) or {}
+    draft_model_id = settings.get("draft_model")
+    if not draft_model_id:
+        return {}
+    
+    registry_name = f"draft:{draft_model_id}"
+    if registry_name not in model_registry:
+        model_registry.register(registry_name, lambda: load_draft_model(draft_model_id))
+    _, draft_model = await model_registry.aget(registry_name)
+    return {
+        "assistant_model": draft_model,
+        "num_assistant_tokens": settings.get("lookahead", 5),
+        # 제안 토큰 수를 수락률에 따라 조정하지 않고 고정
+        "num_assistant_tokens_schedule": "constant",
+    }
+
+@dataclass
+class SpeculativeStats:
+    """추측 디코딩 누적 통계
+
+    검증 단계마다 페르소나 모델 forward가 한 번 실행되고, 수락된 초안 토큰 수 + 1개(수정/추가 토큰)가 생성된다.
+    그래서 수락된 토큰 수는 생성 토큰 수 - 검증 단계 수로 계산한다 (마지막 단계가 토큰 상한에서 잘리면 약간 적게 셈).
+    """
+    calls: int = 0
+    steps: int = 0
+    new_tokens: int = 0
+    proposed_tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def accepted_tokens(self) -> int:
+        return max(0, self.new_tokens - self.steps)
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted_tokens / self.proposed_tokens if self.proposed_tokens else 0.0
+
+    def record(self, steps: int, new_tokens: int, lookahead: int, seconds: float):
+        self.calls += 1
+        self.steps += steps
+        self.new_tokens += new_tokens
+        self.proposed_tokens += steps * lookahead
+        self.seconds += seconds
+        print(f"추측 디코딩: {new_tokens}토큰 / 검증 {steps}회, 누적 수락률 {self.acceptance_rate:.1%}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "new_tokens": self.new_tokens,
+            "verification_steps": self.steps,
+            "accepted_tokens": self.accepted_tokens,
+            "proposed_tokens": self.proposed_tokens,
+            "acceptance_rate": round(self.acceptance_rate, 3),
+            "tokens_per_second": round(self.new_tokens / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+# 모델 타입별 추측 디코딩 통계
+speculative_stats: Dict[str, SpeculativeStats] = {model_type: SpeculativeStats() for model_type in SPECULATIVE_DECODING}
+
+def speculative_decoding_status() -> Dict[str, Dict]:
+    """모델 타입별 추측 디코딩 수락률/처리량 보고"""
+    return {model_type: stats.as_dict() for model_type, stats in speculative_stats.items()}
+
+@contextmanager
+def _count_forward_calls(counted_model):
+    """이 스레드에서 실행된 모델 forward 횟수를 센다 (추측 디코딩에서는 검증 단계 수)"""
+    # PEFT 래퍼의 generate는 내부 transformers 모델의 forward를 호출한다
+    if hasattr(counted_model, "get_base_model"):
+        counted_model = counted_model.get_base_model()
+    counter = [0]
+    thread_id = get_ident()
+
+    def hook(module, args, output):
+        # 같은 모델로 동시에 생성 중인 다른 요청의 forward는 제외
+        if get_ident() == thread_id:
+            counter[0] += 1
+
+    handle = counted_model.register_forward_hook(hook)
+    try:
+        yield counter
+    finally:
+        handle.remove()
+
+def _generate_assisted(assisted_tokenizer, assisted_model, prompt_ids: List[int], generation_kwargs: Dict, assisted_kwargs: Dict, stats: SpeculativeStats = None) -> str:
+    """초안 모델이 제안한 토큰을 페르소나 모델이 검증하는 방식으로 생성 (배치 크기 1)"""
+    inputs = _ids_to_inputs(prompt_ids, assisted_model.device)
+    prompt_length = inputs["input_ids"].shape[-1]
+    started = time.perf_counter()
+    with torch.no_grad(), _count_forward_calls(assisted_model) as steps:
+        outputs = assisted_model.generate(
+            **inputs,
+            stopping_criteria=end_of_turn_stopping_criteria(assisted_tokenizer, prompt_length),
+            **assisted_kwargs,
+            **generation_kwargs
+        )
+    if stats is not None:
+        stats.record(steps[0], outputs.shape[-1] - prompt_length, assisted_kwargs.get("num_assistant_tokens", 5), time.perf_counter() - started)
+    return assisted_tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True).strip()
+
+async def _render_local_prompt(prompt_tokenizer, messages, max_prompt_tokens: int = None, model_name: str = None, cache_key=None) -> List[int]:
+    """프롬프트 길이 한도에 맞게 오래된 대화를 잘라낸 뒤 스레드별 증분 렌더러로 프롬프트 토큰 ID 생성"""
+    conversation = messages_to_conversation(messages)
+    limit = max_prompt_tokens or MAX_PROMPT_TOKENS
+    renderer = get_conversation_renderer(model_name, prompt_tokenizer)
+
+    def render():
+        truncated = truncate_conversation(conversation, renderer.count_tokens, limit)
+        return renderer.render(truncated, cache_key)
+
+    return await asyncio.to_thread(render)
+
+async def generate_solar_response(messages, temperature=0.2, max_new_tokens=None, cache_key=None, latency_slo=None, max_prompt_tokens=None):
+    try:
+        tokenizer, model = await model_registry.aget("solar")
         
-        output_text = await asyncio.to_thread(
-            lambda: tokenizer.decode(outputs[0], skip_special_tokens=True)
+        prompt_ids = await _render_local_prompt(tokenizer, messages, max_prompt_tokens, "solar", cache_key)
+        generation_kwargs = build_generation_kwargs(
+            temperature, resolve_max_new_tokens("solar", max_new_tokens, latency_slo)
         )
         
-        response_only = output_text[len(prompt):].strip()
+        assisted_kwargs = await get_assisted_kwargs("solar")
+        if assisted_kwargs:
+            # 추측 디코딩은 배치 크기 1만 지원하므로 배치/프리픽스 캐시 경로를 거치지 않는다
+            response_only = await asyncio.to_thread(
+                _generate_assisted, tokenizer, model, prompt_ids, generation_kwargs, assisted_kwargs, speculative_stats["solar"]
+            )
+        else:
+            response_only = await _generate_local(tokenizer, model, "solar", prompt_ids, generation_kwargs, cache_key)
+        response_only = strip_end_of_turn(response_only)
         print(f"SOLAR 생성 결과: {response_only}")
         return response_only
         
@@ -106,47 +1162,25 @@ async def generate_solar_response(messages, temperature=0.2, max_length=4096):
         print(f"SOLAR 응답 생성 중 오류 발생: {str(e)}")
         return f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
 
-async def generate_qwen3_response(messages, temperature=0.2, max_length=4096):
+async def generate_qwen3_response(messages, temperature=0.2, max_new_tokens=None, cache_key=None, latency_slo=None, max_prompt_tokens=None, inference_mode=None):
     try:
-        if qwen3_tokenizer is None or qwen3_model is None:
-            await asyncio.to_thread(load_qwen3_model)
-        
-        conversation = []
-        for msg in messages:
-            if isinstance(msg, SystemMessage):
-                conversation.append({"role": "system", "content": msg.content})
-            elif isinstance(msg, HumanMessage):
-                conversation.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                conversation.append({"role": "assistant", "content": msg.content})
-            elif getattr(msg, 'role', None) == 'tool':
-                conversation.append({"role": "user", "content": f"도구 응답: {msg.content}"})
-        
-        prompt = await asyncio.to_thread(
-            lambda: qwen3_tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=True)
-        )
-        
-        inputs = await asyncio.to_thread(
-            lambda: qwen3_tokenizer(prompt, return_tensors="pt").to(qwen3_model.device)
-        )
-        
-        generation_kwargs = {
-            "do_sample": True,
-            "temperature": temperature,
-            "max_length": max_length,
-            "repetition_penalty": 1.1,
-            "top_p": 0.95
-        }
+        registry_name = qwen3_model_name(inference_mode)
+        qwen3_tokenizer, qwen3_model = await model_registry.aget(registry_name)
         
-        outputs = await asyncio.to_thread(
-            lambda: qwen3_model.generate(**inputs, **generation_kwargs)
+        prompt_ids = await _render_local_prompt(qwen3_tokenizer, messages, max_prompt_tokens, registry_name, cache_key)
+        generation_kwargs = build_generation_kwargs(
+            temperature, resolve_max_new_tokens("qwen3", max_new_tokens, latency_slo)
         )
         
-        output_text = await asyncio.to_thread(
-            lambda: qwen3_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        )
-        
-        response_only = output_text[len(prompt):].strip()
+        assisted_kwargs = await get_assisted_kwargs("qwen3")
+        if assisted_kwargs:
+            # 추측 디코딩은 배치 크기 1만 지원하므로 배치/프리픽스 캐시 경로를 거치지 않는다
+            response_only = await asyncio.to_thread(
+                _generate_assisted, qwen3_tokenizer, qwen3_model, prompt_ids, generation_kwargs, assisted_kwargs, speculative_stats["qwen3"]
+            )
+        else:
+            response_only = await _generate_local(qwen3_tokenizer, qwen3_model, registry_name, prompt_ids, generation_kwargs, cache_key)
+        response_only = strip_end_of_turn(response_only)
         print(f"Qwen3 생성 결과: {response_only}")
         return response_only
         
@@ -154,41 +1188,72 @@ async def generate_qwen3_response(messages, temperature=0.2, max_length=4096):
         print(f"Qwen3 응답 생성 중 오류 발생: {str(e)}")
         return f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
 
-async def generate_ollama_response(messages, model_name="gemma3:4b", temperature=0.7, max_length=4096):
-    try:
-        client = OllamaLLM(
-            model=model_name,
-            temperature=temperature,
+# Ollama 연결 설정
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+# 요청 사이에 모델을 메모리에 유지할 시간 (Ollama keep_alive 형식, 예: "30m", "-1"은 무기한)
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "10"))
+
+_ollama_client: Optional[AsyncClient] = None
+_ollama_client_loop = None
+
+def _close_ollama_client(client: AsyncClient, loop):
+    """이벤트 루프가 바뀌어 교체된 클라이언트의 httpx 연결 풀을 닫음 (원래 루프가 돌고 있으면 그 루프에서, 아니면 별도 스레드에서)"""
+    async def run_close():
+        try:
+            await client._client.aclose()
+        except Exception as e:
+            print(f"이전 Ollama 클라이언트 종료 중 오류: {e}")
+
+    if loop is not None and not loop.is_closed() and loop.is_running():
+        asyncio.run_coroutine_threadsafe(run_close(), loop)
+    else:
+        Thread(target=asyncio.run, args=(run_close(),), daemon=True, name="ollama-client-close").start()
+
+def get_ollama_client() -> AsyncClient:
+    """HTTP 연결을 재사용하는 Ollama 비동기 클라이언트 싱글톤 (이벤트 루프가 바뀌면 이전 클라이언트를 닫고 새로 생성)"""
+    global _ollama_client, _ollama_client_loop
+    loop = asyncio.get_running_loop()
+    if _ollama_client is None or _ollama_client_loop is not loop:
+        if _ollama_client is not None:
+            _close_ollama_client(_ollama_client, _ollama_client_loop)
+        _ollama_client = AsyncClient(
+            host=OLLAMA_HOST,
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+                keepalive_expiry=300,
+            ),
         )
+        _ollama_client_loop = loop
+    return _ollama_client
+
+def _ollama_chat_request(messages, model_name: str, temperature: float, max_new_tokens: int, latency_slo: float, max_prompt_tokens: int) -> Dict:
+    """Ollama /api/chat 요청 인자 구성 (구조화된 메시지 그대로 전달)"""
+    # Ollama 토크나이저는 로컬에 없으므로 문자 수로 토큰 수를 근사
+    conversation = truncate_conversation(
+        messages_to_conversation(messages),
+        lambda text: len(text) // 2 + 1,
+        max_prompt_tokens or MAX_PROMPT_TOKENS
+    )
+    return {
+        "model": model_name,
+        "messages": conversation,
+        "options": {
+            "temperature": temperature,
+            "num_predict": resolve_max_new_tokens("ollama", max_new_tokens, latency_slo),
+            "stop": END_OF_TURN_MARKERS,
+        },
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }
+
+async def generate_ollama_response(messages, model_name="gemma3:4b", temperature=0.7, max_new_tokens=None, latency_slo=None, max_prompt_tokens=None):
+    try:
+        request = _ollama_chat_request(messages, model_name, temperature, max_new_tokens, latency_slo, max_prompt_tokens)
         
-        formatted_messages = []
-        for msg in messages:
-            if isinstance(msg, SystemMessage):
-                formatted_messages.append({"role": "system", "content": msg.content})
-            elif isinstance(msg, HumanMessage):
-                formatted_messages.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                formatted_messages.append({"role": "assistant", "content": msg.content})
-            elif getattr(msg, 'role', None) == 'tool':
-                formatted_messages.append({"role": "user", "content": f"도구 응답: {msg.content}"})
-        
-        prompt_text = ""
-        for msg in formatted_messages:
-            role = msg["role"]
-            content = msg["content"]
-            if role == "system":
-                prompt_text += f"시스템: {content}\n\n"
-            elif role == "user":
-                prompt_text += f"사용자: {content}\n\n"
-            elif role == "assistant":
-                prompt_text += f"어시스턴트: {content}\n\n"
-        
-        prompt_text += "어시스턴트: "
-        
-        response = await asyncio.to_thread(
-            lambda: client.invoke(prompt_text)
-        )
+        result = await get_ollama_client().chat(**request, stream=False)
         
+        response = strip_end_of_turn(result["message"]["content"])
         print(f"Ollama ({model_name}) 생성 결과: {response}")
         return response
         
@@ -196,14 +1261,264 @@ async def generate_ollama_response(messages, model_name="gemma3:4b", temperature
         print(f"Ollama 응답 생성 중 오류 발생: {str(e)}")
         return f"죄송합니다, Ollama 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
 
-async def generate_model_response(messages, model_type: MODEL_TYPE = "qwen3", temperature=0.2, max_length=4096, ollama_model_name=None):
-    """통합 모델 응답 생성 함수"""
+async def generate_model_response(messages, model_type: MODEL_TYPE = "qwen3", temperature=0.2, max_new_tokens=None, ollama_model_name=None, cache_key=None, latency_slo=None, max_prompt_tokens=None, qwen3_inference_mode=None):
+    """통합 모델 응답 생성 함수
+
+    Args:
+        max_new_tokens: 생성 토큰 상한 (없으면 MODEL_MAX_NEW_TOKENS)
+        cache_key: 로컬 모델에서 KV 캐시 프리픽스를 재사용할 스레드 키
+        latency_slo: 디코딩 시간 목표(초). 모델별 디코딩 속도로 max_new_tokens를 추가로 제한
+        max_prompt_tokens: 프롬프트 토큰 한도. 넘으면 오래된 대화부터 잘라냄
+        qwen3_inference_mode: Qwen3 추론 모드 (QWEN3_INFERENCE_MODES 중 하나)
+    """
+    if model_type in ("solar", "qwen3") and worker_pool_enabled():
+        # 로컬 모델 생성을 워커 프로세스로 넘겨 API 프로세스의 GIL 경합을 피한다
+        model_name = "solar" if model_type == "solar" else qwen3_model_name(qwen3_inference_mode)
+        try:
+            return await get_worker_pool(model_name).submit(
+                messages=messages,
+                model_type=model_type,
+                temperature=temperature,
+                max_new_tokens=max_new_tokens,
+                cache_key=cache_key,
+                latency_slo=latency_slo,
+                max_prompt_tokens=max_prompt_tokens,
+                qwen3_inference_mode=qwen3_inference_mode,
+            )
+        except Exception as e:
+            print(f"추론 워커 응답 생성 중 오류 발생: {str(e)}")
+            return f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
+
+    if model_type == "solar":
+        return await generate_solar_response(messages, temperature, max_new_tokens, cache_key, latency_slo, max_prompt_tokens)
+    elif model_type == "qwen3":
+        return await generate_qwen3_response(messages, temperature, max_new_tokens, cache_key, latency_slo, max_prompt_tokens, qwen3_inference_mode)
+    elif model_type == "ollama":
+        model_name = ollama_model_name or "gemma3:4b"
+        return await generate_ollama_response(messages, model_name, temperature, max_new_tokens, latency_slo, max_prompt_tokens)
+    else:
+        raise ValueError(f"지원되지 않는 모델 타입입니다: {model_type}")
+
+async def _stop_at_end_of_turn(stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """스트림에서 턴 종료 마커가 나타나면 그 앞까지만 전달 (마커가 조각 사이에 걸칠 수 있어 일부를 보류)"""
+    holdback = max(len(marker) for marker in END_OF_TURN_MARKERS) - 1
+    buffer = ""
+    async for text in stream:
+        buffer += text
+        positions = [buffer.find(marker) for marker in END_OF_TURN_MARKERS if marker in buffer]
+        if positions:
+            if buffer[:min(positions)]:
+                yield buffer[:min(positions)]
+            return
+        if len(buffer) > holdback:
+            yield buffer[:len(buffer) - holdback]
+            buffer = buffer[len(buffer) - holdback:]
+    if buffer:
+        yield buffer
+
+async def _stream_local_generation(stream_tokenizer, stream_model, prompt_ids: List[int], generation_kwargs: Dict, cache_key: Tuple = None, assisted_kwargs: Dict = None, stats: SpeculativeStats = None) -> AsyncIterator[str]:
+    """별도 스레드에서 generate를 실행하고 TextIteratorStreamer로 디코딩된 토큰을 전달"""
+    streamer = TextIteratorStreamer(stream_tokenizer, skip_prompt=True, skip_special_tokens=True)
+    inputs = _ids_to_inputs(prompt_ids, stream_model.device)
+    prompt_length = inputs["input_ids"].shape[-1]
+    stopping_criteria = end_of_turn_stopping_criteria(stream_tokenizer, prompt_length)
+    errors = []
+
+    def run_generate():
+        try:
+            if cache_key is None:
+                started = time.perf_counter()
+                with torch.no_grad(), _count_forward_calls(stream_model) as steps:
+                    outputs = stream_model.generate(
+                        **inputs,
+                        streamer=streamer,
+                        stopping_criteria=stopping_criteria,
+                        **(assisted_kwargs or {}),
+                        **generation_kwargs
+                    )
+                if assisted_kwargs and stats is not None:
+                    stats.record(steps[0], outputs.shape[-1] - prompt_length, assisted_kwargs.get("num_assistant_tokens", 5), time.perf_counter() - started)
+                return
+
+            # 스레드 키가 있으면 이전 턴의 KV 캐시 프리픽스를 재사용
+            input_ids = inputs["input_ids"][0]
+            past_key_values, _ = prefix_cache.take(cache_key, input_ids)
+            with torch.no_grad():
+                outputs = stream_model.generate(
+                    **inputs,
+                    past_key_values=past_key_values if past_key_values is not None else DynamicCache(),
+                    return_dict_in_generate=True,
+                    streamer=streamer,
+                    stopping_criteria=stopping_criteria,
+                    **generation_kwargs
+                )
+            prefix_cache.put(cache_key, outputs.sequences[0].detach(), outputs.past_key_values)
+        except Exception as e:
+            errors.append(e)
+            # 스트리머 대기 중인 소비자를 깨우기 위해 종료 신호 전달
+            streamer.end()
+
+    thread = Thread(target=run_generate, daemon=True)
+    thread.start()
+
+    iterator = iter(streamer)
+    while True:
+        text = await asyncio.to_thread(next, iterator, None)
+        if text is None:
+            break
+        if text:
+            yield text
+
+    await asyncio.to_thread(thread.join)
+    if errors:
+        raise errors[0]
+
+async def _stream_local(stream_tokenizer, stream_model, model_name: str, prompt_ids: List[int], generation_kwargs: Dict, cache_key=None, assisted_kwargs: Dict = None) -> AsyncIterator[str]:
+    """_generate_local과 같은 정책으로 스트리밍 생성 경로 선택 (프리픽스 캐시 또는 배치 스케줄러)"""
+    if assisted_kwargs:
+        # 추측 디코딩은 배치 크기 1만 지원하므로 배치/프리픽스 캐시 경로를 거치지 않는다
+        stats = speculative_stats["solar" if model_name == "solar" else "qwen3"]
+        async for text in _stream_local_generation(stream_tokenizer, stream_model, prompt_ids, generation_kwargs, assisted_kwargs=assisted_kwargs, stats=stats):
+            yield text
+        return
+
+    if not use_prefix_cache(model_name, cache_key):
+        # 동시 요청과 같은 배치로 생성하면서 이 요청의 토큰만 받아 전달
+        async for text in get_batch_scheduler(model_name).submit_stream(prompt_ids, generation_kwargs):
+            yield text
+        return
+
+    _prefix_generations[model_name] = _prefix_generations.get(model_name, 0) + 1
+    try:
+        async for text in _stream_local_generation(stream_tokenizer, stream_model, prompt_ids, generation_kwargs, (model_name, cache_key)):
+            yield text
+    finally:
+        _prefix_generations[model_name] -= 1
+
+async def stream_solar_response(messages, temperature=0.2, max_new_tokens=None, cache_key=None, latency_slo=None, max_prompt_tokens=None) -> AsyncIterator[str]:
+    try:
+        tokenizer, model = await model_registry.aget("solar")
+        
+        prompt_ids = await _render_local_prompt(tokenizer, messages, max_prompt_tokens, "solar", cache_key)
+        generation_kwargs = build_generation_kwargs(
+            temperature, resolve_max_new_tokens("solar", max_new_tokens, latency_slo)
+        )
+        
+        assisted_kwargs = await get_assisted_kwargs("solar")
+        stream = _stream_local(tokenizer, model, "solar", prompt_ids, generation_kwargs, cache_key, assisted_kwargs)
+        async for text in _stop_at_end_of_turn(stream):
+            yield text
+        
+    except Exception as e:
+        print(f"SOLAR 스트리밍 중 오류 발생: {str(e)}")
+        yield f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
+
+async def stream_qwen3_response(messages, temperature=0.2, max_new_tokens=None, cache_key=None, latency_slo=None, max_prompt_tokens=None, inference_mode=None) -> AsyncIterator[str]:
+    try:
+        registry_name = qwen3_model_name(inference_mode)
+        qwen3_tokenizer, qwen3_model = await model_registry.aget(registry_name)
+        
+        prompt_ids = await _render_local_prompt(qwen3_tokenizer, messages, max_prompt_tokens, registry_name, cache_key)
+        generation_kwargs = build_generation_kwargs(
+            temperature, resolve_max_new_tokens("qwen3", max_new_tokens, latency_slo)
+        )
+        
+        assisted_kwargs = await get_assisted_kwargs("qwen3")
+        stream = _stream_local(qwen3_tokenizer, qwen3_model, registry_name, prompt_ids, generation_kwargs, cache_key, assisted_kwargs)
+        async for text in _stop_at_end_of_turn(stream):
+            yield text
+        
+    except Exception as e:
+        print(f"Qwen3 스트리밍 중 오류 발생: {str(e)}")
+        yield f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
+
+async def _ollama_chat_stream(request: Dict) -> AsyncIterator[str]:
+    async for part in await get_ollama_client().chat(**request, stream=True):
+        text = part["message"]["content"]
+        if text:
+            yield text
+
+async def stream_ollama_response(messages, model_name="gemma3:4b", temperature=0.7, max_new_tokens=None, latency_slo=None, max_prompt_tokens=None) -> AsyncIterator[str]:
+    try:
+        request = _ollama_chat_request(messages, model_name, temperature, max_new_tokens, latency_slo, max_prompt_tokens)
+        
+        async for text in _stop_at_end_of_turn(_ollama_chat_stream(request)):
+            yield text
+        
+    except Exception as e:
+        print(f"Ollama 스트리밍 중 오류 발생: {str(e)}")
+        yield f"죄송합니다, Ollama 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
+
+async def stream_model_response(messages, model_type: MODEL_TYPE = "qwen3", temperature=0.2, max_new_tokens=None, ollama_model_name=None, cache_key=None, latency_slo=None, max_prompt_tokens=None, qwen3_inference_mode=None) -> AsyncIterator[str]:
+    """통합 모델 스트리밍 응답 생성 함수 (디코딩되는 대로 텍스트 조각을 yield, 인자는 generate_model_response와 동일)"""
+    if model_type in ("solar", "qwen3") and worker_pool_enabled():
+        # 워커 프로세스가 디코딩한 조각을 결과 큐로 받아 그대로 전달
+        model_name = "solar" if model_type == "solar" else qwen3_model_name(qwen3_inference_mode)
+        try:
+            async for text in get_worker_pool(model_name).submit_stream(
+                messages=messages,
+                model_type=model_type,
+                temperature=temperature,
+                max_new_tokens=max_new_tokens,
+                cache_key=cache_key,
+                latency_slo=latency_slo,
+                max_prompt_tokens=max_prompt_tokens,
+                qwen3_inference_mode=qwen3_inference_mode,
+            ):
+                yield text
+        except Exception as e:
+            print(f"추론 워커 스트리밍 중 오류 발생: {str(e)}")
+            yield f"죄송합니다, 응답을 생성하는 중에 오류가 발생했습니다: {str(e)}"
+        return
+
     if model_type == "solar":
-        return await generate_solar_response(messages, temperature, max_length)
+        stream = stream_solar_response(messages, temperature, max_new_tokens, cache_key, latency_slo, max_prompt_tokens)
     elif model_type == "qwen3":
-        return await generate_qwen3_response(messages, temperature, max_length)
+        stream = stream_qwen3_response(messages, temperature, max_new_tokens, cache_key, latency_slo, max_prompt_tokens, qwen3_inference_mode)
     elif model_type == "ollama":
         model_name = ollama_model_name or "gemma3:4b"
-        return await generate_ollama_response(messages, model_name, temperature, max_length)
+        stream = stream_ollama_response(messages, model_name, temperature, max_new_tokens, latency_slo, max_prompt_tokens)
     else:
-        raise ValueError(f"지원되지 않는 모델 타입입니다: {model_type}")
\ No newline at end of file
+        raise ValueError(f"지원되지 않는 모델 타입입니다: {model_type}")
+    
+    async for text in stream:
+        yield text
+
+class PersonaChatModel(BaseChatModel):
+    """generate_model_response / stream_model_response를 LangChain 채팅 모델로 감싼 래퍼
+
+    그래프 노드에서 ainvoke로 호출하면 LangGraph `messages` 스트림 모드에
+    토큰 단위 이벤트가 전달됩니다.
+    """
+    model_type: str = "qwen3"
+    temperature: float = 0.2
+    max_new_tokens: Optional[int] = None
+    latency_slo: Optional[float] = None
+    max_prompt_tokens: Optional[int] = None
+    ollama_model_name: Optional[str] = None
+    cache_key: Optional[str] = None
+    qwen3_inference_mode: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"persona-{self.model_type}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return asyncio.run(self._agenerate(messages, stop=stop, **kwargs))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = await generate_model_response(
+            messages, self.model_type, self.temperature, self.max_new_tokens, self.ollama_model_name,
+            self.cache_key, self.latency_slo, self.max_prompt_tokens, self.qwen3_inference_mode
+        )
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async for text in stream_model_response(
+            messages, self.model_type, self.temperature, self.max_new_tokens, self.ollama_model_name,
+            self.cache_key, self.latency_slo, self.max_prompt_tokens, self.qwen3_inference_mode
+        ):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
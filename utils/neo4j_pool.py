@@ -0,0 +1,174 @@
+# utils/neo4j_pool.py
+import os
+import time
+import atexit
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any
+
+from neo4j import AsyncGraphDatabase, AsyncDriver, READ_ACCESS, WRITE_ACCESS
+
+from graphDB.neo4j import Neo4jHybridSearch
+
+# Neo4j 연결 설정
+NEO4J_URI = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USERNAME = os.environ.get("NEO4J_USERNAME", "neo4j")
+NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "password123")
+NEO4J_DATABASE = os.environ.get("NEO4J_DATABASE") or None
+
+# 커넥션 풀 설정 (턴마다 Bolt 핸드셰이크/인증을 반복하지 않도록 프로세스 전역 드라이버를 재사용)
+NEO4J_POOL_SETTINGS = {
+    "max_connection_pool_size": int(os.environ.get("NEO4J_MAX_POOL_SIZE", "50")),
+    "connection_acquisition_timeout": float(os.environ.get("NEO4J_ACQUISITION_TIMEOUT_SEC", "10")),
+    "max_connection_lifetime": float(os.environ.get("NEO4J_MAX_CONNECTION_LIFETIME_SEC", "3600")),
+    "liveness_check_timeout": float(os.environ.get("NEO4J_LIVENESS_CHECK_SEC", "30")),
+    "keep_alive": True,
+}
+
+class _PoolMetrics:
+    """풀 사용량 지표 (드라이버는 공개 API로 풀 상태를 제공하지 않으므로 세션 단위로 집계)"""
+
+    def __init__(self):
+        self.drivers_created = 0
+        self.sessions_opened = 0
+        self.active_sessions = 0
+        self.peak_active_sessions = 0
+        self.session_errors = 0
+        self.total_session_time = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "drivers_created": self.drivers_created,
+            "sessions_opened": self.sessions_opened,
+            "active_sessions": self.active_sessions,
+            "peak_active_sessions": self.peak_active_sessions,
+            "session_errors": self.session_errors,
+            "avg_session_ms": round(self.total_session_time / self.sessions_opened * 1000, 2) if self.sessions_opened else 0.0,
+            "max_pool_size": NEO4J_POOL_SETTINGS["max_connection_pool_size"],
+        }
+
+pool_metrics = _PoolMetrics()
+
+_driver: Optional[AsyncDriver] = None
+_driver_loop = None
+_hybrid_search: Optional[Neo4jHybridSearch] = None
+_hybrid_search_loop = None
+
+def _dispose(close, loop, label: str):
+    """이벤트 루프가 바뀌어 교체된 인스턴스를 닫음 (원래 루프가 돌고 있으면 그 루프에서, 아니면 별도 스레드에서)"""
+    async def run_close():
+        try:
+            await close()
+        except Exception as e:
+            print(f"이전 {label} 종료 중 오류: {e}")
+
+    if loop is not None and not loop.is_closed() and loop.is_running():
+        asyncio.run_coroutine_threadsafe(run_close(), loop)
+    else:
+        threading.Thread(target=asyncio.run, args=(run_close(),), daemon=True, name=f"neo4j-close-{label}").start()
+
+def get_async_driver() -> AsyncDriver:
+    """커넥션 풀을 공유하는 Neo4j 비동기 드라이버 싱글톤 (이벤트 루프가 바뀌면 이전 드라이버를 닫고 새로 생성)"""
+    global _driver, _driver_loop
+    loop = asyncio.get_running_loop()
+    if _driver is None or _driver_loop is not loop:
+        if _driver is not None:
+            _dispose(_driver.close, _driver_loop, "Neo4j 드라이버")
+        _driver = AsyncGraphDatabase.driver(
+            NEO4J_URI,
+            auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+            **NEO4J_POOL_SETTINGS,
+        )
+        _driver_loop = loop
+        pool_metrics.drivers_created += 1
+    return _driver
+
+def get_neo4j_search() -> Neo4jHybridSearch:
+    """턴마다 새로 만들지 않고 공유하는 Neo4jHybridSearch 인스턴스 (닫지 말 것)"""
+    global _hybrid_search, _hybrid_search_loop
+    loop = asyncio.get_running_loop()
+    if _hybrid_search is None or _hybrid_search_loop is not loop:
+        if _hybrid_search is not None:
+            _dispose(_hybrid_search.async_close, _hybrid_search_loop, "Neo4jHybridSearch")
+        _hybrid_search = Neo4jHybridSearch(
+            uri=NEO4J_URI,
+            username=NEO4J_USERNAME,
+            password=NEO4J_PASSWORD
+        )
+        _hybrid_search_loop = loop
+    return _hybrid_search
+
+@asynccontextmanager
+async def neo4j_session(**kwargs):
+    """공유 드라이버에서 세션을 빌려 쓰고 사용량을 기록"""
+    if NEO4J_DATABASE and "database" not in kwargs:
+        kwargs["database"] = NEO4J_DATABASE
+    start = time.perf_counter()
+    pool_metrics.sessions_opened += 1
+    pool_metrics.active_sessions += 1
+    pool_metrics.peak_active_sessions = max(pool_metrics.peak_active_sessions, pool_metrics.active_sessions)
+    try:
+        async with get_async_driver().session(**kwargs) as session:
+            yield session
+    except Exception:
+        pool_metrics.session_errors += 1
+        raise
+    finally:
+        pool_metrics.active_sessions -= 1
+        pool_metrics.total_session_time += time.perf_counter() - start
+
+async def run_query(query: str, parameters: Dict[str, Any] = None, read_only: bool = True) -> List[Dict[str, Any]]:
+    """공유 드라이버로 Cypher 실행 후 레코드를 dict 목록으로 반환
+    
+    쿼리 문자열은 모듈 상수로 고정하고 값은 parameters로만 넘겨야 서버의 쿼리 플랜 캐시가 재사용된다.
+    관리형 트랜잭션이라 일시적인 연결 오류는 드라이버가 재시도한다.
+    """
+    async def work(tx):
+        result = await tx.run(query, parameters or {})
+        return await result.data()
+
+    async with neo4j_session(default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS) as session:
+        if read_only:
+            return await session.execute_read(work)
+        return await session.execute_write(work)
+
+async def neo4j_health_check() -> Dict[str, Any]:
+    """연결 확인 및 왕복 지연 측정"""
+    start = time.perf_counter()
+    try:
+        await get_async_driver().verify_connectivity()
+        return {
+            "status": "ok",
+            "uri": NEO4J_URI,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            **pool_metrics.as_dict(),
+        }
+    except Exception as e:
+        return {"status": "error", "uri": NEO4J_URI, "error": str(e), **pool_metrics.as_dict()}
+
+def neo4j_pool_status() -> Dict[str, Any]:
+    return pool_metrics.as_dict()
+
+async def close_neo4j():
+    """공유 드라이버와 검색 인스턴스 종료 (서버 종료 시 호출)"""
+    global _driver, _driver_loop, _hybrid_search, _hybrid_search_loop
+    driver, search = _driver, _hybrid_search
+    _driver = _driver_loop = _hybrid_search = _hybrid_search_loop = None
+    if driver is not None:
+        await driver.close()
+    if search is not None:
+        await search.async_close()
+
+def _close_at_exit():
+    # 서버 종료 시에는 agents/webapp.py의 lifespan이 close_neo4j를 호출한다.
+    # 스크립트 등에서 루프가 멈춘 뒤(닫히기 전)에 남아 있으면 그 루프에서 정리
+    loop = _driver_loop or _hybrid_search_loop
+    if loop is None or loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(close_neo4j())
+    except Exception as e:
+        print(f"Neo4j 드라이버 종료 중 오류: {e}")
+
+atexit.register(_close_at_exit)